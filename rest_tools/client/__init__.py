@@ -3,6 +3,7 @@
 from . import utils
 from .client import (
     MAX_RETRIES,
+    BatchResult,
     CalcRetryFromBackoffMax,
     CalcRetryFromWaittimeMax,
     RestClient,
@@ -10,7 +11,10 @@ from .client import (
 from .client_credentials import ClientCredentialsAuth
 from .device_client import DeviceGrantAuth, SavedDeviceGrantAuth
 from .openid_client import OpenIDRestClient
+from .pool import SharedPool, get_shared_pool, shared_pool_stats
 from .session import AsyncSession, Session
+from .token_cache import DEFAULT_TOKEN_CACHE, TokenCache
+from .unix import unix_socket_url
 
 __all__ = [
     "RestClient",
@@ -20,8 +24,15 @@ __all__ = [
     "SavedDeviceGrantAuth",
     "AsyncSession",
     "Session",
+    "SharedPool",
+    "get_shared_pool",
+    "shared_pool_stats",
+    "TokenCache",
+    "DEFAULT_TOKEN_CACHE",
+    "unix_socket_url",
     "CalcRetryFromBackoffMax",
     "CalcRetryFromWaittimeMax",
     "MAX_RETRIES",
+    "BatchResult",
     "utils",
 ]
@@ -9,20 +9,26 @@ a json-encoded dictionary as necessary.
 # fmt:quotes-ok
 
 import asyncio
+import concurrent.futures
 import dataclasses as dc
 import logging
 import math
 import os
+import threading
 import time
-from typing import Any, Callable, Generator, Optional, Union
+import weakref
+from typing import Any, AsyncGenerator, Callable, Generator, Iterable, Optional, Union
 
-import jwt
 import requests
 import urllib3.util
 
 from .. import telemetry as wtt
 from ..utils.json_util import JSONType, json_decode
+from .pool import SharedPool
 from .session import AsyncSession, Session
+from .token_cache import token_expiration
+from .transport import TRANSPORTS, AsyncTransport, FuturesTransport, TornadoTransport
+from .unix import unix_socket_path
 
 MAX_RETRIES = 30
 
@@ -105,6 +111,35 @@ class CalcRetryFromWaittimeMax:
         return retries
 
 
+RequestSpec = Union[tuple[str, str], tuple[str, str, Optional[dict[str, Any]]]]
+
+
+@dc.dataclass
+class BatchResult:
+    """The outcome of one request in a `RestClient.request_many` batch.
+
+    Exactly one of `result` or `error` is meaningful: check `ok`.
+    """
+
+    index: int  # position in the given requests
+    method: str
+    path: str
+    result: JSONType = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _unpack_request_spec(spec: RequestSpec) -> tuple[str, str, Optional[dict[str, Any]]]:
+    if len(spec) == 2:
+        return spec[0], spec[1], None
+    elif len(spec) == 3:
+        return spec[0], spec[1], spec[2]  # type: ignore[misc]
+    raise ValueError(f"request must be (method, path) or (method, path, args): {spec!r}")
+
+
 def _log_retries_values(
     retries: int, timeout: float, backoff_factor: float, logger: logging.Logger
 ) -> None:
@@ -132,6 +167,7 @@ class RestClient:
     Args:
         address (str):
             base address of REST API
+            (for a Unix domain socket, see `unix_socket_url()`)
         token (str):
             (optional) access token, or a function generating an access token
         timeout (int):
@@ -151,6 +187,17 @@ class RestClient:
             (optional) auth-basic password
         logger (logging.Logger):
             (optional) supply a logger to use
+        transport (str):
+            (optional) engine for async `request()` calls (default: 'requests')
+            'requests' runs calls in a thread pool (see `AsyncSession`);
+            'tornado' runs calls natively on the event loop, no threads
+        pool (SharedPool):
+            (optional) share connections & worker threads with other clients,
+            see `get_shared_pool()` (only for the 'requests' transport)
+        token_refresh_fraction (float):
+            (optional) with a token function, renew the token in the background
+            once this fraction of its lifetime has passed (ex: 0.75), instead of
+            blocking a request when it expires
     """
 
     def __init__(
@@ -161,12 +208,23 @@ class RestClient:
         retries: Union[int, CalcRetryFromBackoffMax, CalcRetryFromWaittimeMax] = 10,
         backoff_factor: float = 0.3,
         logger: Optional[logging.Logger] = None,
+        transport: str = 'requests',
+        pool: Optional[SharedPool] = None,
+        token_refresh_fraction: Optional[float] = None,
         **kwargs: Any,
     ) -> None:
         self.address = address
         self.kwargs = kwargs
         self.logger = logger if logger else logging.getLogger('RestClient')
 
+        if transport not in TRANSPORTS:
+            raise ValueError(f"transport must be one of {TRANSPORTS}: {transport}")
+        self.transport_type = transport
+        if pool and transport != 'requests':
+            raise ValueError(f"pool is only supported by the 'requests' transport: {transport}")
+        self.pool = pool
+        self.transport: AsyncTransport
+
         self.timeout = float(timeout)
         if self.timeout < 0.0:
             raise ValueError(f"timeout must be positive: {self.timeout}")
@@ -197,72 +255,172 @@ class RestClient:
         self._token_expire_delay_offset = 5
         self.access_token: Optional[Union[str, bytes]] = None
         self.token_func: Optional[Callable[[], Union[str, bytes]]] = None
+        # decoded `exp` of the token it was decoded from (see `_get_token_exp()`)
+        self._token_exp: tuple[Optional[Union[str, bytes]], float] = (None, 0.)
+        if token_refresh_fraction is not None and not 0. < token_refresh_fraction < 1.:
+            raise ValueError(f"token_refresh_fraction must be between 0 and 1: {token_refresh_fraction}")
+        self.token_refresh_fraction = token_refresh_fraction
+        self._token_refresh_at = float('inf')
+        # token refreshes are single-flight, in a background thread (see `_refresh_token()`)
+        self._token_lock = threading.Lock()
+        self._token_future: Optional[concurrent.futures.Future] = None
+        self._token_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
         if token:
             if isinstance(token, (str, bytes)):
                 self.access_token = token
             elif callable(token):
                 self.token_func = token
 
+        # sync sessions are persistent & per-thread (see `_sync_session()`)
+        self._sync_local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._sync_sessions: weakref.WeakSet[requests.Session] = weakref.WeakSet()  # dies with its thread
+
         self.session = self.open()  # start session
 
-    def open(self, sync: bool = False) -> requests.Session:
-        """Open the http session."""
-        self.logger.debug('establish REST http session')
+    def _new_session(self, sync: bool = False) -> requests.Session:
+        """Make a new http session, configured with headers/auth/certs."""
+        session: requests.Session
         if sync:
-            self.session = Session(
+            session = Session(
                 self.retries,
                 backoff_factor=self.backoff_factor,
+                pool=self.pool,
             )
+        elif self.transport_type == 'tornado':
+            # only used to prepare requests -- the transport does the I/O
+            session = requests.Session()
         else:
-            self.session = AsyncSession(
+            session = AsyncSession(
                 self.retries,
                 backoff_factor=self.backoff_factor,
+                pool=self.pool,
             )
-        self.session.headers = {  # type: ignore[assignment]
+        session.headers = {  # type: ignore[assignment]
             'Content-Type': 'application/json',
         }
         if 'username' in self.kwargs and 'password' in self.kwargs:
-            self.session.auth = (self.kwargs['username'], self.kwargs['password'])
+            session.auth = (self.kwargs['username'], self.kwargs['password'])
         if 'sslcert' in self.kwargs:
             if 'sslkey' in self.kwargs:
-                self.session.cert = (self.kwargs['sslcert'], self.kwargs['sslkey'])
+                session.cert = (self.kwargs['sslcert'], self.kwargs['sslkey'])
             else:
-                self.session.cert = self.kwargs['sslcert']
+                session.cert = self.kwargs['sslcert']
         if 'cacert' in self.kwargs:
-            self.session.verify = self.kwargs['cacert']
+            session.verify = self.kwargs['cacert']
+        return session
+
+    def open(self, sync: bool = False) -> requests.Session:
+        """Open the http session."""
+        self.logger.debug('establish REST http session')
+        self.session = self._new_session(sync)
+
+        if not sync:
+            if self.transport_type == 'tornado':
+                self.transport = TornadoTransport(
+                    self.session,
+                    self.retries,
+                    backoff_factor=self.backoff_factor,
+                    unix_socket=unix_socket_path(self.address),
+                )
+            else:
+                self.transport = FuturesTransport(self.session)
 
         return self.session
 
+    def _sync_session(self) -> requests.Session:
+        """Get this thread's long-lived sync session, for connection reuse.
+
+        `requests.Session` is not thread-safe, so each thread gets its own.
+        """
+        try:
+            return self._sync_local.session
+        except AttributeError:
+            session = self._new_session(sync=True)
+            with self._sync_lock:
+                self._sync_sessions.add(session)
+            self._sync_local.session = session
+            return session
+
     def close(self) -> None:
         """Close the http session."""
         self.logger.info('close REST http session')
         if self.session:
             self.session.close()
-
-    def _get_token(self) -> None:
-        if self.access_token:
-            # check if expired
-            try:
-                # NOTE: PyJWT mis-type-hinted arg #1 as a str, but byte is also fine
-                # https://github.com/jpadilla/pyjwt/pull/605#issuecomment-772082918
-                data = jwt.decode(
-                    self.access_token,  # type: ignore[arg-type]
-                    algorithms=['RS256', 'RS512'],
-                    options={"verify_signature": False},
-                )
-                # account for an X second delay over the wire, so expire sooner
-                if data['exp'] < time.time() + self._token_expire_delay_offset:
-                    raise Exception()
-                return
-            except Exception:
-                self.access_token = None
-                self.logger.debug('token expired')
-
+        self.transport.close()
+        with self._sync_lock:
+            for session in list(self._sync_sessions):
+                session.close()
+            self._sync_sessions.clear()
+        self._sync_local = threading.local()
+        with self._token_lock:
+            if self._token_executor:
+                self._token_executor.shutdown(wait=False)
+                self._token_executor = None
+
+    def _get_token_exp(self) -> float:
+        """Get the access token's expiration, decoding it only once per token.
+
+        An undecodable token is treated as already expired.
+        """
+        token, exp = self._token_exp
+        if token is not self.access_token:
+            token = self.access_token
+            decoded = token_expiration(token) if token else None
+            exp = float('-inf') if decoded is None else decoded
+            self._token_exp = (token, exp)
+        return exp
+
+    def _acquire_token(self) -> None:
+        """Call the token function, and schedule the next background refresh."""
+        acquired = time.time()
         try:
-            self.access_token = self.token_func()  # type: ignore[misc]  # ty: ignore[call-non-callable]
+            token = self.token_func()  # type: ignore[misc]  # ty: ignore[call-non-callable]
         except Exception:
             self.logger.warning('acquiring access token failed')
+            if self.token_refresh_fraction and self.access_token:
+                # try again halfway to the current token's expiration
+                self._token_refresh_at = time.time() + max(0., self._get_token_exp() - time.time()) / 2
             raise
+        self.access_token = token
+        exp = self._get_token_exp()  # decode once, on acquisition
+        if self.token_refresh_fraction and exp > acquired:
+            self._token_refresh_at = acquired + (exp - acquired) * self.token_refresh_fraction
+        else:
+            self._token_refresh_at = float('inf')
+
+    def _refresh_token(self) -> concurrent.futures.Future:
+        """Start a token refresh in the background, or join the one in flight."""
+        with self._token_lock:
+            if self._token_future is None or self._token_future.done():
+                if not self._token_executor:
+                    self._token_executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=1,
+                        thread_name_prefix='RestClient-token',
+                    )
+                self._token_future = self._token_executor.submit(self._acquire_token)
+            return self._token_future
+
+    def _token_valid(self) -> bool:
+        """Check the current token, and start a background refresh if it is due."""
+        if self.access_token:
+            now = time.time()
+            # account for an X second delay over the wire, so expire sooner
+            if self._get_token_exp() >= now + self._token_expire_delay_offset:
+                if now >= self._token_refresh_at:
+                    self._refresh_token()
+                return True
+            self.logger.debug('token expired')
+        return False
+
+    def _get_token(self) -> None:
+        if not self._token_valid():
+            self._refresh_token().result()
+
+    async def _get_token_async(self) -> None:
+        if not self._token_valid():
+            # wait off the event loop
+            await asyncio.wrap_future(self._refresh_token())
 
     def _prepare(
         self,
@@ -275,9 +433,6 @@ class RestClient:
         if not args:
             args = {}
 
-        # auto-inject the current span's info into the HTTP headers
-        wtt.inject_span_carrier_if_recording(self.session.headers)  # type: ignore[arg-type]  # ty: ignore[invalid-argument-type]
-
         if path.startswith('/'):
             path = path[1:]
         url = os.path.join(self.address, path)
@@ -293,8 +448,11 @@ class RestClient:
         if self.token_func:
             self._get_token()
 
-        if not headers:
-            headers = {}
+        # copy, so the caller's dict is not modified
+        headers = dict(headers) if headers else {}
+
+        # auto-inject the current span's info into the HTTP headers
+        wtt.inject_span_carrier_if_recording(headers)
 
         if self.access_token:
             headers['Authorization'] = 'Bearer ' + _to_str(self.access_token)
@@ -304,6 +462,17 @@ class RestClient:
 
         return (url, kwargs)
 
+    def _token_rejected(self) -> None:
+        """Called when the server rejects the access token (a 401).
+
+        Does nothing by default; see `ClientCredentialsAuth`.
+        """
+
+    def _raise_for_status(self, r: requests.Response) -> None:
+        if r.status_code == 401 and self.token_func:
+            self._token_rejected()
+        r.raise_for_status()
+
     def _decode(self, content: Union[str, bytes, bytearray]) -> JSONType:
         """Internal method for translating response from json."""
         if not content:
@@ -340,11 +509,12 @@ class RestClient:
         Returns:
             dict: json dict or raw string
         """
+        if self.token_func:
+            await self._get_token_async()
         url, kwargs = self._prepare(method, path, args, headers)
         try:
-            # session: AsyncSession; So, self.session.request() -> Future
-            r: requests.Response = await asyncio.wrap_future(self.session.request(method, url, **kwargs))  # type: ignore[arg-type]  # ty: ignore[invalid-argument-type]
-            r.raise_for_status()
+            r = await self.transport.request(method, url, **kwargs)
+            self._raise_for_status(r)
             return self._decode(r.content)
         except requests.exceptions.HTTPError as e:
             if method == 'DELETE' and e.response.status_code == 404:
@@ -377,15 +547,10 @@ class RestClient:
         Returns:
             dict: json dict or raw string
         """
-        s = self.session
-        try:
-            self.open(sync=True)
-            url, kwargs = self._prepare(method, path, args, headers)
-            r: requests.Response = self.session.request(method, url, **kwargs)  # type: ignore
-            r.raise_for_status()
-            return self._decode(r.content)
-        finally:
-            self.session = s
+        url, kwargs = self._prepare(method, path, args, headers)
+        r = self._sync_session().request(method, url, **kwargs)
+        self._raise_for_status(r)
+        return self._decode(r.content)
 
     @wtt.spanned(
         span_namer=wtt.SpanNamer(use_this_arg='method'),
@@ -419,15 +584,128 @@ class RestClient:
         if chunk_size is not None and chunk_size < 1:
             chunk_size = None
 
-        s = self.session
-        try:
-            self.open(sync=True)
-            url, kwargs = self._prepare(method, path, args, headers)
-            resp: requests.Response = self.session.request(method, url, stream=True, **kwargs)  # type: ignore
-            resp.raise_for_status()
+        url, kwargs = self._prepare(method, path, args, headers)
+        # closing the response releases the connection back to the pool
+        with self._sync_session().request(method, url, stream=True, **kwargs) as resp:
+            self._raise_for_status(resp)
             for line in resp.iter_lines(chunk_size=chunk_size, delimiter=b'\n'):
                 decoded = self._decode(line.strip())
                 if decoded:  # skip `None`
                     yield decoded
+
+    async def request_many(
+        self,
+        requests: Iterable[RequestSpec],
+        concurrency: int = 10,
+        headers: Optional[dict[str, str]] = None,
+    ) -> AsyncGenerator[BatchResult, None]:
+        """Send many requests to REST Server, with bounded concurrency.
+
+        Results are yielded as they complete (not in the given order).
+        A failed request does not fail the batch -- its exception is
+        set on its `BatchResult`.
+
+        Args:
+            requests (iterable): (method, path) or (method, path, args) tuples,
+                consumed lazily
+            concurrency (int): max requests in flight at once
+            headers (dict): any headers to pass to every request
+
+        Yields:
+            BatchResult: each request's result or error
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1: {concurrency}")
+
+        async def one(index: int, spec: RequestSpec) -> BatchResult:
+            method, path, args = _unpack_request_spec(spec)
+            ret = BatchResult(index, method, path)
+            try:
+                ret.result = await self.request(method, path, args, headers)
+            except Exception as e:
+                ret.error = e
+            return ret
+
+        specs = enumerate(requests)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                # refill up to the limit, only creating tasks as slots free up
+                for index, spec in specs:
+                    pending.add(asyncio.create_task(one(index, spec)))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:  # the caller stopped early
+                task.cancel()
+
+    def request_many_seq(
+        self,
+        requests: Iterable[RequestSpec],
+        concurrency: int = 10,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Generator[BatchResult, None, None]:
+        """Send many requests to REST Server, with bounded concurrency.
+
+        Sequential (thread-based) version of `request_many`.
+
+        Requests run on the client's `pool` executor, so its threads and
+        their connections are reused between calls (its `max_workers` then
+        caps the concurrency, and do not call this from a task already on
+        that pool), or else on threads made for this call.
+
+        Args:
+            requests (iterable): (method, path) or (method, path, args) tuples,
+                consumed lazily
+            concurrency (int): max requests in flight at once
+            headers (dict): any headers to pass to every request
+
+        Yields:
+            BatchResult: each request's result or error
+        """
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1: {concurrency}")
+
+        def one(index: int, spec: RequestSpec) -> BatchResult:
+            method, path, args = _unpack_request_spec(spec)
+            ret = BatchResult(index, method, path)
+            try:
+                ret.result = self.request_seq(method, path, args, headers)
+            except Exception as e:
+                ret.error = e
+            return ret
+
+        own_executor = None
+        if self.pool:
+            executor: concurrent.futures.Executor = self.pool.executor
+            if concurrency > self.pool.max_workers:
+                self.logger.warning(
+                    f"request_many_seq: {concurrency=} is capped by the pool's max_workers={self.pool.max_workers}"
+                )
+        else:
+            executor = own_executor = concurrent.futures.ThreadPoolExecutor(
+                concurrency, thread_name_prefix="request_many_seq"
+            )
+        specs = enumerate(requests)
+        pending: set[concurrent.futures.Future] = set()
+        try:
+            while True:
+                for index, spec in specs:
+                    pending.add(executor.submit(one, index, spec))
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)  # type: ignore[assignment]
+                for fut in done:
+                    yield fut.result()
         finally:
-            self.session = s
+            for fut in pending:  # the caller stopped early
+                fut.cancel()
+            if own_executor:
+                own_executor.shutdown(wait=False)
@@ -1,9 +1,10 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 
 import requests
 
 from .client import RestClient
+from .token_cache import TokenCache, TokenKey
 from ..utils.auth import OpenIDAuth
 
 
@@ -18,19 +19,26 @@ class ClientCredentialsAuth(RestClient):
         client_secret (str): client secret
         timeout (int): request timeout (optional)
         retries (int): number of retries to attempt (optional)
+        token_cache (TokenCache): share tokens with other clients using the
+            same credentials, ex: `DEFAULT_TOKEN_CACHE` (optional)
     """
 
+    SCOPE = 'offline_access'
+
     def __init__(
         self,
         address: str,
         token_url: str,
         client_id: str,
         client_secret: str,
+        token_cache: Optional[TokenCache] = None,
         **kwargs: Any,
     ) -> None:
-        self.auth = OpenIDAuth(token_url)
+        self.token_url = token_url
+        self._auth: Optional[OpenIDAuth] = None
         self.client_id = client_id
         self.client_secret = client_secret
+        self.token_cache = token_cache
         super().__init__(
             address=address,
             token=self.make_access_token,
@@ -38,7 +46,30 @@ class ClientCredentialsAuth(RestClient):
             **kwargs,
         )
 
+    @property
+    def auth(self) -> OpenIDAuth:
+        """The OpenID discovery for `token_url`, made on first use."""
+        if self._auth is None:
+            self._auth = OpenIDAuth(self.token_url)
+        return self._auth
+
+    def _token_key(self) -> TokenKey:
+        assert self.token_cache
+        return self.token_cache.make_key(self.token_url, self.client_id, self.SCOPE, self.client_secret)
+
     def make_access_token(self) -> str:
+        if not self.token_cache:
+            return self._mint_access_token()
+        return self.token_cache.get(self._token_key(), self._mint_access_token)  # type: ignore[return-value]
+
+    def _token_rejected(self) -> None:
+        """Drop a rejected token from the cache, so the next request gets a new one."""
+        if self.token_cache:
+            self.logger.info('access token rejected, dropping it from the token cache')
+            self.token_cache.invalidate(self._token_key())
+            self._token_exp = (self.access_token, float('-inf'))
+
+    def _mint_access_token(self) -> str:
         if not self.auth.token_url:
             self.auth._refresh_keys()
 
@@ -47,7 +78,7 @@ class ClientCredentialsAuth(RestClient):
             'grant_type': 'client_credentials',
             'client_id': self.client_id,
             'client_secret': self.client_secret,
-            'scope': 'offline_access',
+            'scope': self.SCOPE,
         }
 
         try:
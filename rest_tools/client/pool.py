@@ -0,0 +1,221 @@
+"""A process-wide registry of connection pools & executors, shared by host.
+
+By default, each `RestClient` owns its own connection pool and thread
+pool. Clients made with the same `SharedPool` instead share one sized
+pool of connections and one bounded executor:
+
+    pool = get_shared_pool('https://my.site.here', pool_maxsize=32)
+    rc1 = RestClient('https://my.site.here/api', pool=pool)
+    rc2 = RestClient('https://my.site.here/api', token=..., pool=pool)
+
+Use `SharedPool.stats()` (or `shared_pool_stats()`) to check for
+saturation and queueing.
+"""
+
+# fmt:off
+
+import dataclasses as dc
+import logging
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dc.dataclass(frozen=True)
+class PoolStats:
+    """A snapshot of a `SharedPool`'s usage."""
+
+    key: str
+    max_workers: int
+    pool_maxsize: int
+    queued: int  # submitted, waiting for a worker thread
+    in_flight: int  # running in a worker thread
+    max_queued: int  # peak of `queued`
+    completed: int
+    total_queue_time: float  # seconds spent waiting for a worker thread, over all requests
+    connections_in_use: int  # checked out of the connection pool(s)
+
+    @property
+    def saturation(self) -> float:
+        """Fraction of worker threads that are busy."""
+        return self.in_flight / self.max_workers
+
+
+class _SharedPoolAdapter(HTTPAdapter):
+    """An `HTTPAdapter` with its own retry config, but a shared `PoolManager`."""
+
+    def __init__(self, poolmanager: urllib3.PoolManager, **kwargs: Any) -> None:
+        self._shared_poolmanager = poolmanager
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        self.poolmanager = self._shared_poolmanager
+
+    def close(self) -> None:
+        pass  # the pool belongs to the `SharedPool`, not to this session
+
+
+class SharedPool:
+    """A connection pool and a bounded executor, shared by many `RestClient`s.
+
+    Args:
+        key (str): registry key (ex: 'https://my.site.here')
+        pool_maxsize (int): max connections kept open, per host
+        max_workers (int): max worker threads (default: `pool_maxsize`)
+        pool_block (bool): wait for a free connection, instead of opening
+            an extra connection that is discarded after use
+    """
+
+    def __init__(
+        self,
+        key: str,
+        pool_maxsize: int = 10,
+        max_workers: Optional[int] = None,
+        pool_block: bool = False,
+    ) -> None:
+        self.key = key
+        self.pool_maxsize = pool_maxsize
+        self.max_workers = max_workers if max_workers else pool_maxsize
+        self.poolmanager = urllib3.PoolManager(maxsize=pool_maxsize, block=pool_block)
+        self.executor = _TrackingExecutor(self, max_workers=self.max_workers, thread_name_prefix=f'SharedPool-{key}')
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._total_queue_time = 0.
+
+    def adapter(self, retry: Retry) -> HTTPAdapter:
+        """Make an adapter (with this retry config) that uses the shared connections."""
+        return _SharedPoolAdapter(self.poolmanager, max_retries=retry)
+
+    def stats(self) -> PoolStats:
+        """Get a snapshot of this pool's usage."""
+        in_use = 0
+        for pool_key in self.poolmanager.pools.keys():
+            conn_pool = self.poolmanager.pools.get(pool_key)
+            if conn_pool is not None and conn_pool.pool is not None:
+                # the queue holds idle connections (or None placeholders)
+                in_use += conn_pool.pool.maxsize - conn_pool.pool.qsize()
+        with self._lock:
+            return PoolStats(
+                key=self.key,
+                max_workers=self.max_workers,
+                pool_maxsize=self.pool_maxsize,
+                queued=self._queued,
+                in_flight=self._in_flight,
+                max_queued=self._max_queued,
+                completed=self._completed,
+                total_queue_time=self._total_queue_time,
+                connections_in_use=in_use,
+            )
+
+    def close(self) -> None:
+        """Shut down the executor and close all connections."""
+        self.executor.shutdown(wait=False)
+        self.poolmanager.clear()
+
+    def _on_submit(self) -> None:
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+    def _on_start(self, submitted: float) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._in_flight += 1
+            self._total_queue_time += time.monotonic() - submitted
+
+    def _on_done(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+
+
+class _TrackingExecutor(ThreadPoolExecutor):
+    """A `ThreadPoolExecutor` that reports queueing to its `SharedPool`."""
+
+    def __init__(self, pool: SharedPool, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._shared_pool = pool
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        pool = self._shared_pool
+        submitted = time.monotonic()
+
+        def run() -> Any:
+            pool._on_start(submitted)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                pool._on_done()
+
+        pool._on_submit()
+        try:
+            return super().submit(run)
+        except Exception:
+            with pool._lock:
+                pool._queued -= 1
+            raise
+
+
+_POOLS: dict[str, SharedPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool_key(address: str) -> str:
+    parts = urllib.parse.urlsplit(address)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def get_shared_pool(
+    address: str,
+    pool_maxsize: int = 10,
+    max_workers: Optional[int] = None,
+    pool_block: bool = False,
+) -> SharedPool:
+    """Get the process-wide `SharedPool` for `address`'s host, making it if needed.
+
+    The sizing args only apply when the pool is first made.
+
+    Args:
+        address (str): any url on the host (ex: a `RestClient` address)
+        pool_maxsize (int): max connections kept open, per host
+        max_workers (int): max worker threads (default: `pool_maxsize`)
+        pool_block (bool): wait for a free connection when all are in use
+
+    Returns:
+        SharedPool: the shared pool
+    """
+    key = _pool_key(address)
+    with _POOLS_LOCK:
+        if key not in _POOLS:
+            _POOLS[key] = SharedPool(key, pool_maxsize, max_workers, pool_block)
+        elif (pool_maxsize, max_workers or pool_maxsize) != (_POOLS[key].pool_maxsize, _POOLS[key].max_workers):
+            LOGGER.debug('shared pool %s already exists, ignoring new sizing', key)
+        return _POOLS[key]
+
+
+def shared_pool_stats() -> dict[str, PoolStats]:
+    """Get a snapshot of every registered `SharedPool`'s usage."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    return {p.key: p.stats() for p in pools}
+
+
+def close_shared_pools() -> None:
+    """Close and unregister every `SharedPool`."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for p in pools:
+        p.close()
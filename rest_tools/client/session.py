@@ -6,21 +6,26 @@
 # fmt:off
 # pylint: skip-file
 
-from typing import Collection
+from typing import TYPE_CHECKING, Collection, Optional
 
 import requests
 from requests.adapters import HTTPAdapter
 from requests_futures.sessions import FuturesSession  # type: ignore[import]
 from urllib3.util.retry import Retry
 
+from .unix import UNIX_SCHEME, UnixAdapter
 
-def AsyncSession(
+if TYPE_CHECKING:
+    from .pool import SharedPool
+
+
+def make_retry(
     retries: int,
     backoff_factor: float,
-    allowed_methods: Collection[str] = ('HEAD', 'TRACE', 'GET', 'POST', 'PATCH', 'PUT', 'OPTIONS', 'DELETE'),
-    status_forcelist: Collection[int] = (408, 429, 500, 502, 503, 504),
-) -> FuturesSession:
-    """Return a Session object with full retry capabilities.
+    allowed_methods: Collection[str],
+    status_forcelist: Collection[int],
+) -> Retry:
+    """Return the `urllib3` retry configuration shared by all sessions/transports.
 
     Args:
         retries (int): number of retries
@@ -29,10 +34,9 @@ def AsyncSession(
         status_forcelist (collection): http status codes to retry on
 
     Returns:
-        :py:class:`requests.Session`: session object
+        :py:class:`urllib3.util.retry.Retry`: retry object
     """
-    session = FuturesSession()
-    retry = Retry(
+    return Retry(
         total=retries,
         connect=retries,
         read=retries,
@@ -42,9 +46,33 @@ def AsyncSession(
         status_forcelist=status_forcelist,
         backoff_factor=backoff_factor,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+
+
+def AsyncSession(
+    retries: int,
+    backoff_factor: float,
+    allowed_methods: Collection[str] = ('HEAD', 'TRACE', 'GET', 'POST', 'PATCH', 'PUT', 'OPTIONS', 'DELETE'),
+    status_forcelist: Collection[int] = (408, 429, 500, 502, 503, 504),
+    pool: Optional['SharedPool'] = None,
+) -> FuturesSession:
+    """Return a Session object with full retry capabilities.
+
+    Args:
+        retries (int): number of retries
+        backoff_factor (float): speed factor for retries (in seconds)
+        allowed_methods (collection): http methods to retry on
+        status_forcelist (collection): http status codes to retry on
+        pool (SharedPool): (optional) share this pool's connections
+
+    Returns:
+        :py:class:`requests.Session`: session object
+    """
+    session = FuturesSession(executor=pool.executor) if pool else FuturesSession()
+    retry = make_retry(retries, backoff_factor, allowed_methods, status_forcelist)
+    adapter = pool.adapter(retry) if pool else HTTPAdapter(max_retries=retry)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
+    session.mount(f'{UNIX_SCHEME}://', UnixAdapter(max_retries=retry))
     return session
 
 
@@ -53,6 +81,7 @@ def Session(
     backoff_factor: float,
     allowed_methods: Collection[str] = ('HEAD', 'TRACE', 'GET', 'POST', 'PUT', 'OPTIONS', 'DELETE'),
     status_forcelist: Collection[int] = (408, 429, 500, 502, 503, 504),
+    pool: Optional['SharedPool'] = None,
 ) -> requests.Session:
     """Return a Session object with full retry capabilities.
 
@@ -61,22 +90,15 @@ def Session(
         backoff_factor (float): speed factor for retries (in seconds)
         allowed_methods (collection): http methods to retry on
         status_forcelist (collection): http status codes to retry on
+        pool (SharedPool): (optional) share this pool's connections
 
     Returns:
         :py:class:`requests.Session`: session object
     """
     session = requests.Session()
-    retry = Retry(
-        total=retries,
-        connect=retries,
-        read=retries,
-        redirect=retries,
-        # status=retries,
-        allowed_methods=allowed_methods,
-        status_forcelist=status_forcelist,
-        backoff_factor=backoff_factor,
-    )
-    adapter = HTTPAdapter(max_retries=retry)
+    retry = make_retry(retries, backoff_factor, allowed_methods, status_forcelist)
+    adapter = pool.adapter(retry) if pool else HTTPAdapter(max_retries=retry)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
+    session.mount(f'{UNIX_SCHEME}://', UnixAdapter(max_retries=retry))
     return session
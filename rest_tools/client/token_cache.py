@@ -0,0 +1,187 @@
+"""A process-wide cache of access tokens, shared by clients with the same credentials.
+
+Clients that log in with the same service account (token url, client id,
+scope, and secret) reuse one valid token instead of each minting their own:
+
+    cache = TokenCache(path='/tmp/my-tokens')  # optional file tier
+    rc = ClientCredentialsAuth(..., token_cache=cache)
+
+With a `path`, tokens are also saved to files in that directory, so other
+processes on the node can read them instead of minting another. The
+directory must be owned by the current user and private (mode 0700); it
+is made that way if missing.
+"""
+
+# fmt:off
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+import jwt
+
+LOGGER = logging.getLogger(__name__)
+
+TokenKey = tuple[str, ...]
+
+
+def token_expiration(token: Union[str, bytes]) -> Optional[float]:
+    """Get a JWT's `exp`, without verifying it, or None if it is opaque."""
+    try:
+        # NOTE: PyJWT mis-type-hinted arg #1 as a str, but byte is also fine
+        # https://github.com/jpadilla/pyjwt/pull/605#issuecomment-772082918
+        data = jwt.decode(
+            token,  # type: ignore[arg-type]
+            algorithms=['RS256', 'RS512'],
+            options={'verify_signature': False},
+        )
+        return float(data['exp'])
+    except Exception:
+        return None
+
+
+class TokenCache:
+    """A thread-safe access token cache, with an optional file tier.
+
+    Minting is single-flight per key: concurrent callers that miss wait
+    for one token request. Callers are expected to be off the event loop
+    (`RestClient` calls its token function in a background thread).
+
+    Args:
+        path (str): (optional) directory for the file tier
+        min_ttl (float): min seconds a cached token must still be valid for
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, min_ttl: float = 30.) -> None:
+        self.path = Path(path) if path else None
+        self.min_ttl = min_ttl
+        self._tokens: dict[TokenKey, tuple[Union[str, bytes], float]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[TokenKey, threading.Lock] = {}
+
+    @staticmethod
+    def make_key(token_url: str, client_id: str, scope: str, client_secret: str = '') -> TokenKey:
+        """Make a cache key; the secret is hashed, so is never stored."""
+        secret_hash = hashlib.sha256(client_secret.encode('utf-8')).hexdigest() if client_secret else ''
+        return (token_url, client_id, scope, secret_hash)
+
+    def _file(self, key: TokenKey) -> Path:
+        assert self.path
+        name = hashlib.sha256(json.dumps(key).encode('utf-8')).hexdigest()
+        return self.path / f'{name}.json'
+
+    def _valid(self, exp: float) -> bool:
+        return exp > time.time() + self.min_ttl
+
+    @staticmethod
+    def _trusted(fd: int) -> bool:
+        """Only trust files that we own and that nobody else can write."""
+        st = os.fstat(fd)
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & 0o022
+
+    def _trusted_dir(self) -> bool:
+        """Only use a directory that we own and that nobody else can access."""
+        assert self.path
+        st = os.stat(self.path)
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & 0o077
+
+    def _read_file(self, key: TokenKey) -> Optional[tuple[str, float]]:
+        try:
+            if not self._trusted_dir():
+                LOGGER.warning('ignoring untrusted token cache directory: %s', self.path)
+                return None
+            with open(self._file(key)) as f:
+                if not self._trusted(f.fileno()):
+                    LOGGER.warning('ignoring untrusted cached token file: %s', f.name)
+                    return None
+                data = json.load(f)
+            return data['access_token'], float(data['exp'])
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOGGER.debug('cannot read cached token file', exc_info=True)
+            return None
+
+    def _write_file(self, key: TokenKey, token: Union[str, bytes], exp: float) -> None:
+        assert self.path
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        try:
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if not self._trusted_dir():
+                LOGGER.warning('not writing to untrusted token cache directory: %s', self.path)
+                return
+            # write then rename, so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')  # mode 0600
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'access_token': token, 'exp': exp}, f)
+                os.replace(tmp, self._file(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except Exception:
+            LOGGER.warning('cannot write cached token file', exc_info=True)
+
+    def get(self, key: TokenKey, mint: Callable[[], Union[str, bytes]]) -> Union[str, bytes]:
+        """Get a valid token for `key`, calling `mint()` only if none is cached.
+
+        Tokens without a readable `exp` (opaque tokens) are not cached.
+        """
+        with self._lock:
+            cached = self._tokens.get(key)
+            if cached and self._valid(cached[1]):
+                return cached[0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another caller may have minted it while we waited
+            with self._lock:
+                cached = self._tokens.get(key)
+            if cached and self._valid(cached[1]):
+                return cached[0]
+
+            if self.path:
+                from_file = self._read_file(key)
+                if from_file and self._valid(from_file[1]):
+                    LOGGER.debug('using token from file cache')
+                    with self._lock:
+                        self._tokens[key] = from_file
+                    return from_file[0]
+
+            token = mint()
+            exp = token_expiration(token)
+            if exp is not None:
+                with self._lock:
+                    self._tokens[key] = (token, exp)
+                if self.path:
+                    self._write_file(key, token, exp)
+            return token
+
+    def invalidate(self, key: TokenKey) -> None:
+        """Drop a token (ex: it was rejected by the server)."""
+        with self._lock:
+            self._tokens.pop(key, None)
+        if self.path:
+            try:
+                self._file(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """Drop all in-memory tokens."""
+        with self._lock:
+            self._tokens.clear()
+
+
+DEFAULT_TOKEN_CACHE = TokenCache()
@@ -0,0 +1,259 @@
+"""Pluggable async transports for `RestClient.request`.
+
+A transport takes the already-prepared `(method, url, kwargs)` triple
+from `RestClient._prepare` and returns a `requests.Response`, so the
+client's decoding and error handling are identical for every engine.
+
+- `FuturesTransport` runs blocking `requests` calls in the
+  `requests_futures` thread pool (the historical behavior).
+- `TornadoTransport` runs requests natively on the event loop with
+  tornado's `AsyncHTTPClient`, with no worker threads.
+"""
+
+# fmt:off
+
+import asyncio
+import datetime
+import logging
+import ssl
+import weakref
+from typing import Any, Collection, Optional, Union
+
+import requests
+import requests.structures
+import requests.utils
+import tornado.httpclient
+import tornado.ioloop
+import tornado.iostream
+import tornado.simple_httpclient
+import urllib3.exceptions
+import urllib3.response
+from requests_futures.sessions import FuturesSession  # type: ignore[import]
+from urllib3.util.retry import Retry
+
+from .session import make_retry
+from .unix import UnixResolver
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncTransport:
+    """Base class for the engine that sends `RestClient.request` calls."""
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send the request, and return the (not yet status-checked) response."""
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Release any held resources."""
+
+
+class FuturesTransport(AsyncTransport):
+    """Run `requests` calls in a `FuturesSession` thread pool.
+
+    Concurrency is bounded by the session's executor size.
+
+    Args:
+        session (FuturesSession): a session made by `AsyncSession`
+    """
+
+    def __init__(self, session: FuturesSession) -> None:
+        self.session = session
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        return await asyncio.wrap_future(self.session.request(method, url, **kwargs))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def _to_urllib3_error(exc: Exception, url: str) -> urllib3.exceptions.HTTPError:
+    """Translate a tornado connection-level error to its urllib3 equivalent.
+
+    This lets `Retry.increment` pick the right counter (connect vs. read).
+    """
+    if isinstance(exc, tornado.simple_httpclient.HTTPTimeoutError):
+        if 'connecting' in str(exc):
+            return urllib3.exceptions.ConnectTimeoutError(str(exc))
+        return urllib3.exceptions.ReadTimeoutError(None, url, str(exc))  # type: ignore[arg-type]
+    if isinstance(exc, ssl.SSLError):
+        return urllib3.exceptions.SSLError(exc)
+    if isinstance(exc, OSError):
+        return urllib3.exceptions.NewConnectionError(None, str(exc))  # type: ignore[arg-type]
+    return urllib3.exceptions.ProtocolError('Connection aborted.', exc)
+
+
+def _to_requests_error(
+    exc: urllib3.exceptions.MaxRetryError,
+    request: requests.PreparedRequest,
+) -> requests.exceptions.RequestException:
+    """Translate an exhausted retry to the exception `requests` would raise.
+
+    Mirrors `requests.adapters.HTTPAdapter.send`.
+    """
+    reason = exc.reason
+    if isinstance(reason, urllib3.exceptions.ConnectTimeoutError) and not isinstance(reason, urllib3.exceptions.NewConnectionError):
+        return requests.exceptions.ConnectTimeout(exc, request=request)
+    if isinstance(reason, urllib3.exceptions.ResponseError):
+        return requests.exceptions.RetryError(exc, request=request)
+    if isinstance(reason, urllib3.exceptions.SSLError):
+        return requests.exceptions.SSLError(exc, request=request)
+    return requests.exceptions.ConnectionError(exc, request=request)
+
+
+def _to_urllib3_response(resp: tornado.httpclient.HTTPResponse, method: str, url: str) -> urllib3.response.HTTPResponse:
+    """Wrap the status & headers for `Retry.increment`/`Retry.get_retry_after`."""
+    return urllib3.response.HTTPResponse(
+        headers=dict(resp.headers),
+        status=resp.code,
+        request_method=method,
+        request_url=url,
+        preload_content=False,
+    )
+
+
+def _to_requests_response(resp: tornado.httpclient.HTTPResponse, request: requests.PreparedRequest) -> requests.Response:
+    """Convert a tornado response so callers can use the `requests` API."""
+    r = requests.Response()
+    r.status_code = resp.code
+    r.reason = resp.reason
+    r.headers = requests.structures.CaseInsensitiveDict(resp.headers)
+    r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+    r._content = resp.body or b''
+    r.url = resp.effective_url
+    r.request = request
+    r.elapsed = datetime.timedelta(seconds=resp.request_time or 0)
+    return r
+
+
+def _read_body(body: Any) -> Union[bytes, str, None]:
+    """Read a streaming (file or iterable) request body; tornado needs it whole."""
+    if body is None or isinstance(body, (bytes, str)):
+        return body
+    if hasattr(body, 'read'):
+        body = body.read()
+        return body if isinstance(body, (bytes, str)) else bytes(body)
+    return b''.join(c.encode('utf-8') if isinstance(c, str) else bytes(c) for c in body)
+
+
+class TornadoTransport(AsyncTransport):
+    """Run requests natively on the event loop with tornado's `AsyncHTTPClient`.
+
+    Retries & backoff use the same `urllib3` `Retry` configuration as
+    `AsyncSession`, so the retry counts, backoff times, `Retry-After`
+    handling, and raised `requests` exceptions all match.
+
+    Headers, auth, and certs are taken from the given (unused for I/O)
+    `requests.Session`, which is used only to prepare each request.
+
+    NOTE: `timeout` is applied as both the connect timeout and the
+    total request timeout.
+
+    Args:
+        session (requests.Session): session holding the headers/auth/certs
+        retries (int): number of retries
+        backoff_factor (float): speed factor for retries (in seconds)
+        max_clients (int): max concurrent requests per event loop
+        unix_socket (str): (optional) send all requests to this Unix domain socket
+        allowed_methods (collection): http methods to retry on
+        status_forcelist (collection): http status codes to retry on
+    """
+
+    def __init__(
+        self,
+        session: requests.Session,
+        retries: int,
+        backoff_factor: float,
+        max_clients: int = 1000,
+        unix_socket: Optional[str] = None,
+        allowed_methods: Collection[str] = ('HEAD', 'TRACE', 'GET', 'POST', 'PATCH', 'PUT', 'OPTIONS', 'DELETE'),
+        status_forcelist: Collection[int] = (408, 429, 500, 502, 503, 504),
+    ) -> None:
+        self.session = session
+        self.retry = make_retry(retries, backoff_factor, allowed_methods, status_forcelist)
+        self.max_clients = max_clients
+        self.unix_socket = unix_socket
+        # AsyncHTTPClient is bound to an IOLoop, so keep one per loop
+        self._clients: weakref.WeakKeyDictionary[tornado.ioloop.IOLoop, tornado.httpclient.AsyncHTTPClient] = weakref.WeakKeyDictionary()
+
+    def _client(self) -> tornado.httpclient.AsyncHTTPClient:
+        loop = tornado.ioloop.IOLoop.current()
+        try:
+            return self._clients[loop]
+        except KeyError:
+            kwargs: dict[str, Any] = {}
+            if self.unix_socket:
+                kwargs['resolver'] = UnixResolver(socket_path=self.unix_socket)
+            client = tornado.httpclient.AsyncHTTPClient(force_instance=True, max_clients=self.max_clients, **kwargs)
+            self._clients[loop] = client
+            return client
+
+    def _http_request(self, prepared: requests.PreparedRequest, timeout: Optional[float]) -> tornado.httpclient.HTTPRequest:
+        kwargs: dict[str, Any] = {}
+        verify: Union[bool, str] = self.session.verify
+        if verify is False:
+            kwargs['validate_cert'] = False
+        elif isinstance(verify, str):
+            kwargs['ca_certs'] = verify
+        cert = self.session.cert
+        if isinstance(cert, tuple):
+            kwargs['client_cert'], kwargs['client_key'] = cert
+        elif cert:
+            kwargs['client_cert'] = cert
+        if not prepared.method or not prepared.url:
+            raise ValueError('request needs a method and url')
+        url = prepared.url
+        if self.unix_socket:
+            url = 'http://localhost' + prepared.path_url  # the resolver picks the socket
+        headers = {k: v.decode('latin-1') if isinstance(v, bytes) else v for k, v in prepared.headers.items()}
+        body = _read_body(prepared.body)
+        if body is not prepared.body:
+            headers.pop('Transfer-Encoding', None)  # sent whole, with a Content-Length
+        return tornado.httpclient.HTTPRequest(
+            url,
+            method=prepared.method,
+            headers=headers,
+            body=body,
+            connect_timeout=timeout,
+            request_timeout=timeout,
+            allow_nonstandard_methods=True,  # GET w/o body, POST w/ empty body, etc.
+            **kwargs,
+        )
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        timeout = kwargs.pop('timeout', None)
+        prepared = self.session.prepare_request(requests.Request(method, url, **kwargs))
+        http_request = self._http_request(prepared, timeout)
+
+        retry: Retry = self.retry
+        while True:
+            try:
+                resp = await self._client().fetch(http_request, raise_error=False)
+            except (tornado.httpclient.HTTPClientError, tornado.iostream.StreamClosedError, OSError) as e:
+                try:
+                    retry = retry.increment(method, url, error=_to_urllib3_error(e, url))
+                except urllib3.exceptions.MaxRetryError as exc:
+                    raise _to_requests_error(exc, prepared) from e
+                backoff = retry.get_backoff_time()
+            else:
+                if not retry.is_retry(method, resp.code, 'Retry-After' in resp.headers):
+                    return _to_requests_response(resp, prepared)
+                u3_resp = _to_urllib3_response(resp, method, url)
+                try:
+                    retry = retry.increment(method, url, response=u3_resp)
+                except urllib3.exceptions.MaxRetryError as exc:
+                    raise _to_requests_error(exc, prepared) from None
+                # like `Retry.sleep()`: prefer a server's Retry-After, else backoff
+                retry_after = retry.get_retry_after(u3_resp) if retry.respect_retry_after_header else None
+                backoff = retry_after or retry.get_backoff_time()
+            LOGGER.debug('retrying %s %s in %.2fs', method, url, backoff)
+            await asyncio.sleep(backoff)
+
+    def close(self) -> None:
+        for client in list(self._clients.values()):
+            client.close()
+        self._clients.clear()
+        self.session.close()
+
+
+TRANSPORTS = ('requests', 'tornado')
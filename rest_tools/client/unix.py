@@ -0,0 +1,117 @@
+"""HTTP over Unix domain sockets, for `RestClient`.
+
+An address like `http+unix://%2Fvar%2Frun%2Fapi.sock/api` talks to the
+server listening on `/var/run/api.sock` (see `RestServer.startup`), with
+`/api` as the base path. Build one with `unix_socket_url()`:
+
+    rc = RestClient(unix_socket_url('/var/run/api.sock', '/api'))
+
+This skips the TCP loopback stack, for co-located services.
+"""
+
+# fmt:off
+
+import socket
+import threading
+import urllib.parse
+from typing import Any, Optional
+
+import requests
+import tornado.netutil
+import urllib3
+import urllib3.connection
+import urllib3.exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.timeout import Timeout
+
+UNIX_SCHEME = 'http+unix'
+
+
+def unix_socket_url(socket_path: str, path: str = '') -> str:
+    """Make an `http+unix://` url for a socket path, and a path on the server."""
+    return f'{UNIX_SCHEME}://{urllib.parse.quote(socket_path, safe="")}{path}'
+
+
+def unix_socket_path(url: str) -> Optional[str]:
+    """Get the socket path from an `http+unix://` url, or None for other urls."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme != UNIX_SCHEME:
+        return None
+    return urllib.parse.unquote(parts.netloc)
+
+
+class UnixHTTPConnection(urllib3.connection.HTTPConnection):
+    """An `HTTPConnection` that connects to a Unix domain socket."""
+
+    def __init__(self, *args: Any, socket_path: str, **kwargs: Any) -> None:
+        self.socket_path = socket_path
+        super().__init__(*args, **kwargs)
+
+    def _new_conn(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(Timeout.resolve_default_timeout(self.timeout))
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise urllib3.exceptions.NewConnectionError(self, f'Failed to connect to {self.socket_path}: {e}') from e
+        return sock
+
+
+class UnixHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    """A connection pool for one Unix domain socket."""
+
+    ConnectionCls = UnixHTTPConnection
+
+    def __init__(self, socket_path: str, **kwargs: Any) -> None:
+        self.socket_path = socket_path
+        super().__init__('localhost', socket_path=socket_path, **kwargs)
+
+
+class UnixAdapter(HTTPAdapter):
+    """A `requests` adapter for `http+unix://` urls, with a pool per socket."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        self._pools: dict[str, UnixHTTPConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _pool(self, url: str) -> UnixHTTPConnectionPool:
+        socket_path = unix_socket_path(url)
+        if not socket_path:
+            raise requests.exceptions.InvalidURL(f'not an {UNIX_SCHEME} url: {url}')
+        with self._pools_lock:
+            pool = self._pools.get(socket_path)
+            if pool is None:
+                pool = self._pools[socket_path] = UnixHTTPConnectionPool(
+                    socket_path,
+                    maxsize=self._pool_maxsize,
+                    block=self._pool_block,
+                )
+            return pool
+
+    def get_connection_with_tls_context(self, request: requests.PreparedRequest, verify: Any, proxies: Any = None, cert: Any = None) -> UnixHTTPConnectionPool:
+        return self._pool(request.url)  # type: ignore[arg-type]
+
+    def get_connection(self, url: str, proxies: Any = None) -> UnixHTTPConnectionPool:
+        return self._pool(url)
+
+    def request_url(self, request: requests.PreparedRequest, proxies: Any) -> str:
+        return request.path_url
+
+    def close(self) -> None:
+        super().close()
+        with self._pools_lock:
+            for pool in self._pools.values():
+                pool.close()
+            self._pools.clear()
+
+
+class UnixResolver(tornado.netutil.Resolver):
+    """A tornado `Resolver` that sends every host to one Unix domain socket."""
+
+    def initialize(self, socket_path: str) -> None:
+        self.socket_path = socket_path
+
+    async def resolve(self, host: str, port: int, family: socket.AddressFamily = socket.AF_UNSPEC) -> list[tuple[int, Any]]:
+        return [(socket.AF_UNIX, self.socket_path)]
@@ -1,12 +1,15 @@
 """Tools for working with OpenAPI."""
 
-import asyncio
 import importlib
+import itertools
 import logging
 import os
+import re
 import sys
+import weakref
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast
+from urllib.parse import parse_qs, urljoin
 
 import requests
 import tornado
@@ -17,9 +20,11 @@ try:
     from jsonschema_path import SchemaPath
     from openapi_core.contrib import requests as openapi_core_requests
     from openapi_core.exceptions import OpenAPIError
+    from openapi_core.schema.parameters import get_style_and_explode
     from openapi_core.validation.exceptions import ValidationError
     from openapi_spec_validator import validate
     from openapi_spec_validator.readers import read_from_filename
+    from werkzeug.datastructures import ImmutableMultiDict
 
     openapi_available = True
 except (ImportError, ModuleNotFoundError):
@@ -224,9 +229,282 @@ def _schema_error_to_human_readable(err):  # noqa: C901  # ignore "too complex"
     return f"{field_path!r}: {reason}" if field_path else reason
 
 
+# parameter schema types that are compiled; others are left to openapi-core
+_SIMPLE_PARAM_TYPES = ("string", "integer", "number", "boolean")
+
+# see openapi_core.templating.paths.parsers.PathParser
+_PATH_VARIABLE_PATTERN = re.compile(r"\{([^}]*)\}")
+
+
+def _path_template_regex(template: str) -> tuple[str, list[str]]:
+    """Get a regex for an OpenAPI path template (like openapi-core's), and its variables."""
+    names: list[str] = []
+    parts: list[str] = []
+    i = 0
+    for m in _PATH_VARIABLE_PATTERN.finditer(template):
+        start = m.start()
+        parts.append(re.escape(template[i:start]))
+        parts.append(f"(?P<g{len(names)}>[^/]*)")
+        names.append(m.group(1))
+        i = m.end()
+    parts.append(re.escape(template[i:]))
+    return "".join(parts), names
+
+
+def _path_templates_overlap(a: str, b: str) -> bool:
+    """Could two path templates both match the end of the same url?
+
+    Conservative: any segment with a variable is taken to match anything.
+    """
+    for x, y in zip(reversed(a.split("/")[1:]), reversed(b.split("/")[1:])):
+        if "{" not in x and "{" not in y and x != y:
+            return False
+    return True
+
+
+class _CompiledOperation:
+    """An operation's request validators, made once.
+
+    `is_valid()` only says if a request is certainly valid. Anything
+    else -- an invalid request, or a feature not compiled here (security,
+    header or cookie parameters, non-JSON bodies, styled parameters) -- is
+    left to openapi-core's full validation, which makes the error.
+    """
+
+    def __init__(
+        self, openapi_spec: "openapi_core.OpenAPI", path: "SchemaPath", operation: "SchemaPath"
+    ) -> None:
+        self.supported = False
+        self.params: list[tuple[str, str, bool, bool, Any, Any]] = []
+        self.has_body = "requestBody" in operation
+        self.body_required = False
+        self.body_content_types: list[str] = []
+        self.json_body = False
+        self.json_body_validator: Any = None
+        try:
+            self._compile(openapi_spec.request_validator, path, operation)
+        except Exception:
+            LOGGER.debug("cannot compile OpenAPI operation", exc_info=True)
+        else:
+            self.supported = True
+
+    def _compile(self, rv: Any, path: "SchemaPath", operation: "SchemaPath") -> None:
+        def schema_validator(schema: "SchemaPath") -> Any:
+            return rv.schema_validators_factory.create(
+                rv.spec,
+                schema,
+                format_validators=rv.format_validators,
+                extra_format_validators=rv.extra_format_validators,
+                forbid_unspecified_additional_properties=rv.forbid_unspecified_additional_properties,
+                enforce_properties_required=rv.enforce_properties_required,
+            )
+
+        security = None
+        if "security" in rv.spec:
+            security = rv.spec / "security"
+        if "security" in operation:
+            security = operation / "security"
+        if security:
+            raise ValueError("security requirements are not compiled")
+
+        # parameters -- operation params override path params
+        seen = set()
+        for param in itertools.chain(
+            operation.get("parameters", SchemaPath.from_dict({})),
+            path.get("parameters", SchemaPath.from_dict({})),
+        ):
+            name = (param / "name").read_str()
+            location = (param / "in").read_str()
+            if (name, location) in seen:
+                continue
+            seen.add((name, location))
+            if location not in ("path", "query"):
+                raise ValueError(f"{location} parameters are not compiled")
+            if "content" in param or "allowEmptyValue" in param:
+                raise ValueError("complex parameters are not compiled")
+            if (param / "deprecated").read_bool(default=False):
+                raise ValueError("deprecated parameters are not compiled")
+            schema = param / "schema"
+            if (schema / "type").read_str("") not in _SIMPLE_PARAM_TYPES:
+                raise ValueError("non-primitive parameters are not compiled")
+            style, explode = get_style_and_explode(param)
+            if style != ("simple" if location == "path" else "form"):
+                raise ValueError(f"{style!r} style parameters are not compiled")
+            self.params.append(
+                (
+                    location,
+                    name,
+                    (param / "required").read_bool(default=False),
+                    "default" in schema,
+                    rv.style_deserializers_factory.create(
+                        rv.spec, schema, style, explode, name=name
+                    ),
+                    schema_validator(schema),
+                )
+            )
+
+        # body
+        if self.has_body:
+            request_body = operation / "requestBody"
+            self.body_required = (request_body / "required").read_bool(default=False)
+            content = request_body / "content"
+            self.body_content_types = list(content.str_keys())
+            if "application/json" in content:
+                media_type = content / "application/json"
+                if "encoding" not in media_type:
+                    self.json_body = True
+                    if "schema" in media_type:
+                        self.json_body_validator = schema_validator(media_type / "schema")
+
+    def _is_json(self, content_type: str | None) -> bool:
+        """Is this the 'application/json' media type, as openapi-core finds it?"""
+        if content_type is None:
+            return False
+        mime_type, *parameters = content_type.split(";")
+        if mime_type.lower().rstrip() != "application/json":
+            return False
+        if parameters and content_type in self.body_content_types:
+            return False
+        return all(p.count("=") == 1 for p in parameters)
+
+    def is_valid(self, zelf: "tornado.web.RequestHandler", path_variables: dict[str, str]) -> bool:
+        """Check the request, without going through openapi-core's request model."""
+        if not self.supported:
+            return False
+        req = zelf.request
+
+        query: Any = None
+        for location, name, required, has_default, deserializer, validator in self.params:
+            if location == "path":
+                params = path_variables
+            else:
+                if query is None:
+                    query = ImmutableMultiDict(parse_qs(req.query))
+                params = query
+            try:
+                value = deserializer.deserialize(params)
+            except KeyError:
+                if has_default or not required:
+                    continue
+                return False
+            if location == "query" and value == "":
+                return False
+            validator.validate(value)
+
+        if self.has_body:
+            if not req.body:
+                return not self.body_required
+            if not self.json_body or req.body_arguments:
+                return False
+            if not self._is_json(req.headers.get("Content-Type")):
+                return False
+            try:
+                value = zelf.json_body_arguments  # type: ignore[attr-defined]
+            except tornado.web.HTTPError:
+                return False  # not a JSON object
+            if self.json_body_validator is not None:
+                self.json_body_validator.validate(value)
+        return True
+
+
+class _CompiledOperations:
+    """Find and compile the operation for requests, once per spec path.
+
+    A spec path is looked up with openapi-core's path finder the first
+    time; later requests that match it are mapped to it directly, unless
+    other spec paths could also match the same urls.
+    """
+
+    MAX_ROUTES = 256  # the host is client-controlled, so limit these
+
+    def __init__(self, openapi_spec: "openapi_core.OpenAPI") -> None:
+        self.openapi_spec = openapi_spec
+        self._operations: dict[tuple[str, str], _CompiledOperation] = {}
+        # (method, host url, path regex, path variables, operation)
+        self._routes: list[tuple[str, str, re.Pattern, list[str], _CompiledOperation]] = []
+
+    def _is_unambiguous(self, method: str, template: str, paths: "SchemaPath") -> bool:
+        """Is this always the path that openapi-core finds, for urls it matches?"""
+        literal = "{" not in template
+        for other, path in paths.str_items():
+            if other == template or method not in path:
+                continue
+            if literal and "{" in other:
+                continue  # literal paths are found first
+            if _path_templates_overlap(template, other):
+                return False
+        return True
+
+    def find(self, req: "tornado.httputil.HTTPServerRequest") -> tuple[_CompiledOperation, dict[str, str]] | None:
+        """Get the compiled operation for a request, and its path variables."""
+        method = req.method.lower() if req.method else "get"
+        host_url = f"{req.protocol}://{req.host}"
+        path = req.path
+        if "%" in path:
+            return None  # the path finder sees the re-quoted url
+        if req.protocol not in ("http", "https") or not host_url.isascii():
+            return None  # the path finder sees the url normalized by requests
+        for r_method, r_host_url, regex, names, operation in self._routes:
+            if r_method == method and r_host_url == host_url:
+                if m := regex.fullmatch(path):
+                    return operation, {n: m.group(f"g{i}") for i, n in enumerate(names)}
+
+        rv: Any = self.openapi_spec.request_validator
+        try:
+            found = rv.path_finder.find(method, urljoin(host_url, path))
+        except OpenAPIError:
+            return None
+        template = found.path_result.pattern
+        key = (method, template)
+        if key not in self._operations:
+            self._operations[key] = _CompiledOperation(
+                self.openapi_spec, found.path, found.operation
+            )
+        operation = self._operations[key]
+
+        if len(self._routes) < self.MAX_ROUTES and self._is_unambiguous(
+            method, template, rv.spec / "paths"
+        ):
+            body, names = _path_template_regex(template)
+            if m := re.search(f"{body}$", path):
+                regex = re.compile(re.escape(path[: m.start()]) + body)
+                self._routes.append((method, host_url, regex, names, operation))
+        return operation, dict(found.path_result.variables or {})
+
+
+_COMPILED_OPERATIONS: "weakref.WeakKeyDictionary[openapi_core.OpenAPI, _CompiledOperations]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _is_valid_request(
+    openapi_spec: "openapi_core.OpenAPI", zelf: tornado.web.RequestHandler
+) -> bool:
+    """Check a request with the spec's compiled operations.
+
+    Returns True only if the request is valid. False means: unknown, use
+    openapi-core.
+    """
+    try:
+        operations = _COMPILED_OPERATIONS[openapi_spec]
+    except KeyError:
+        operations = _COMPILED_OPERATIONS[openapi_spec] = _CompiledOperations(openapi_spec)
+    try:
+        found = operations.find(zelf.request)
+        return found is not None and found[0].is_valid(zelf, found[1])
+    except Exception:
+        return False
+
+
 def validate_request(openapi_spec: "openapi_core.OpenAPI"):  # type: ignore
     """A REST-endpoint wrapper to validate requests against an OpenAPI spec.
 
+    Each operation's schemas are compiled once, the first time it is
+    requested, and valid requests are checked against them directly
+    (JSON bodies as `json_body_arguments`). Invalid requests, and
+    operations using features that are not compiled, go through
+    openapi-core's full validation, which makes the 400 error.
+
     Example:
     ```
     class MyRestHandler(RestHandler):
@@ -243,6 +521,8 @@ def validate_request(openapi_spec: "openapi_core.OpenAPI"):  # type: ignore
     def make_wrapper(method):  # type: ignore[no-untyped-def]
         async def wrapper(zelf: tornado.web.RequestHandler, *args, **kwargs):  # type: ignore[no-untyped-def]
             LOGGER.debug("validating with openapi spec")
+            if _is_valid_request(openapi_spec, zelf):
+                return await method(zelf, *args, **kwargs)
             # NOTE - don't change data (unmarshal) b/c we are downstream of data separation
             try:
                 # https://openapi-core.readthedocs.io/en/latest/validation.html
@@ -331,10 +611,12 @@ async def request_and_validate(
 
     NOTE: this essentially mimics RestClient.request() with added features.
     """
+    if rc.token_func:
+        await rc._get_token_async()
     url, kwargs = rc._prepare(method, path, args=args)
 
     # run request as async in case of other dependent, concurrent actions (ex: test suite runs server in same process)
-    response = await asyncio.wrap_future(rc.session.request(method, url, **kwargs))  # type: ignore[var-annotated,arg-type]  # ty: ignore[invalid-argument-type]
+    response = await rc.transport.request(method, url, **kwargs)
 
     try:
         openapi_spec.validate_response(
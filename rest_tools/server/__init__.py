@@ -1,5 +1,6 @@
 """Sub-package __init__."""
 
+from .admission import ConcurrencyLimiter, ConcurrencyLimits
 from .arghandler import ArgumentHandler, ArgumentSource
 from .decorators import (
     authenticated,
@@ -18,12 +19,19 @@ from .handler import (
     RestHandler,
     RestHandlerSetup,
 )
+from .metrics import Metrics, MetricsHandler
+from .policy import AuthDecisionCache
+from .ratelimit import rate_limit
 from .server import RestServer
 
 __all__ = [
     "RestServer",
     "RestHandlerSetup",
     "RestHandler",
+    "Metrics",
+    "MetricsHandler",
+    "ConcurrencyLimiter",
+    "ConcurrencyLimits",
     "KeycloakUsernameMixin",
     "OpenIDCookieHandlerMixin",
     "OpenIDLoginHandler",
@@ -34,7 +42,9 @@ __all__ = [
     "keycloak_role_auth",
     "token_attribute_role_mapping_auth",
     "TokenAttributeRoleMappingProtocol",
+    "AuthDecisionCache",
     "ArgumentHandler",
     "ArgumentSource",
     "validate_request",
+    "rate_limit",
 ]
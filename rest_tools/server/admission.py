@@ -0,0 +1,139 @@
+"""
+Per-route concurrency limits, with a bounded admission queue.
+
+Each route (the `RouteStats` key, so by default the handler class's
+full name) can have at most `max_in_flight` requests running. More
+requests wait in a FIFO queue of at most `max_queue`, for at most
+`queue_timeout` seconds; past that, they get a fast 503 with a
+`Retry-After` based on the queue depth. This keeps one expensive route
+from taking over the event loop.
+
+Set up through `RestHandlerSetup`, with defaults for every route and
+overrides by route:
+
+    RestHandlerSetup({'concurrency': {
+        'max_in_flight': 50, 'max_queue': 100, 'queue_timeout': 5,
+        'routes': {'myapp.handlers.ReportHandler': {'max_in_flight': 2, 'max_queue': 10}},
+    }})
+"""
+
+# fmt:off
+
+import asyncio
+import logging
+import math
+from collections import deque
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Limit the number of concurrent requests, with a bounded FIFO queue.
+
+    Args:
+        max_in_flight (int): max requests running at once
+        max_queue (int): max requests waiting for a slot
+        queue_timeout (float): max seconds to wait for a slot (default: no limit)
+    """
+    def __init__(self, max_in_flight, max_queue=0, queue_timeout=None):
+        if max_in_flight < 1:
+            raise ValueError(f'max_in_flight must be at least 1: {max_in_flight}')
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.service_time = 0.  # moving average of request time, for `retry_after()`
+        self._waiters = deque()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    async def acquire(self):
+        """
+        Wait for a slot.
+
+        Returns:
+            bool: True if a slot was acquired, False if rejected
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        timer = loop.call_later(self.queue_timeout, self._expire, waiter) if self.queue_timeout is not None else None
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()  # got a slot just as we were cancelled, so pass it on
+            else:
+                self._remove(waiter)
+            raise
+        finally:
+            if timer:
+                timer.cancel()
+
+    def release(self, service_time=None):
+        """
+        Free a slot, handing it to the next waiter in the queue.
+
+        Args:
+            service_time (float): (optional) how long the request took
+        """
+        if service_time is not None:
+            self.service_time += (service_time - self.service_time) / 8
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)  # the slot stays in flight
+                return
+        self.in_flight -= 1
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            self._remove(waiter)
+            waiter.set_result(False)
+
+    def _remove(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def retry_after(self):
+        """Estimate the seconds until a new request could get a slot."""
+        wait = self.service_time * (len(self._waiters) + 1) / self.max_in_flight
+        return max(1, math.ceil(wait))
+
+
+class ConcurrencyLimits(dict):
+    """
+    A `ConcurrencyLimiter` per route, made on first use.
+
+    Routes without a limit map to None.
+
+    Args:
+        max_in_flight (int): default max requests running at once, per route (default: no limit)
+        max_queue (int): default max requests waiting for a slot
+        queue_timeout (float): default max seconds to wait for a slot
+        routes (dict): per-route overrides of the above
+    """
+    def __init__(self, max_in_flight=None, max_queue=0, queue_timeout=None, routes=None):
+        super().__init__()
+        self.defaults = {'max_in_flight': max_in_flight, 'max_queue': max_queue, 'queue_timeout': queue_timeout}
+        self.routes = routes if routes else {}
+
+    def __missing__(self, key):
+        config = dict(self.defaults)
+        config.update(self.routes.get(key, {}))
+        if config['max_in_flight']:
+            value = self[key] = ConcurrencyLimiter(**config)
+        else:
+            value = self[key] = None
+        return value
@@ -9,7 +9,7 @@ import re
 import sys
 import time
 import traceback
-from typing import Any, Union, cast
+from typing import Any, Iterable, Optional, Union, cast
 
 import tornado.web
 from tornado.escape import to_unicode
@@ -65,6 +65,104 @@ INVALID_CHOICE_PATTERN = re.compile(r"(argument .+: invalid choice: .+)")
 FROM_ARGUMENT_TYPE_ERROR_PATTERN = re.compile(r"(argument .+: .+)")
 
 
+###############################################################################
+# Compiled Arguments
+
+# `add_argument()` kwargs that a compiled argument handles
+COMPILED_KWARGS = {
+    "type",
+    "default",
+    "required",
+    "dest",
+    "choices",
+    "nargs",
+    "help",
+    "metavar",
+    "action",
+}
+
+
+def _invalid_choice(name: str, value: Any, choices: Iterable[Any]) -> str:
+    fmt = str if sys.version_info >= (3, 13) else repr
+    return (
+        f"argument {name}: invalid choice: {value!r} "
+        f"(choose from {', '.join(fmt(c) for c in choices)})"
+    )
+
+
+class _CompiledArgument:
+    """An `add_argument()` spec, checked once, that validates values directly.
+
+    This covers the key-value arguments that `ArgumentHandler` is meant
+    for, with the same results and 400 messages as `argparse`.
+    """
+
+    __slots__ = ("name", "dest", "type", "default", "required", "choices", "nargs")
+
+    def __init__(self, name: str, kwargs: dict[str, Any]) -> None:
+        self.name = name
+        self.dest = kwargs.get("dest") or name.replace("-", "_")
+        self.type = kwargs.get("type")
+        if self.type is not None and not callable(self.type):
+            raise ValueError(f"{self.type!r} is not callable")
+        self.default = kwargs.get("default")
+        self.required = kwargs.get("required", False)
+        self.choices = kwargs.get("choices")
+        self.nargs = kwargs.get("nargs")
+
+    @staticmethod
+    def supports(args: tuple, kwargs: dict[str, Any]) -> bool:
+        """Can an `add_argument()` call be compiled? Otherwise, use `argparse`."""
+        if args or not COMPILED_KWARGS.issuperset(kwargs):
+            return False
+        if kwargs.get("action") not in (None, "store"):
+            return False
+        nargs = kwargs.get("nargs")
+        if isinstance(nargs, int) and not isinstance(nargs, bool):
+            return nargs > 0
+        return nargs in (None, "?", "*", "+")
+
+    def error(self, msg: str) -> tornado.web.HTTPError:
+        return tornado.web.HTTPError(400, reason=f"argument {self.name}: {msg}")
+
+    def convert(self, value: Any) -> Any:
+        """Apply `type` to a value."""
+        if self.type is None:
+            return value
+        try:
+            return self.type(value)
+        except argparse.ArgumentTypeError as e:
+            raise self.error(str(e)) from e
+        except (TypeError, ValueError) as e:
+            raise self.error("invalid type") from e
+
+    def check(self, value: Any) -> Any:
+        """Apply `type` to a value, then check `choices`."""
+        value = self.convert(value)
+        if self.choices is not None and value not in self.choices:
+            raise tornado.web.HTTPError(
+                400, reason=_invalid_choice(self.name, value, self.choices)
+            )
+        return value
+
+    def take(self, values: list[Any]) -> tuple[Any, int]:
+        """Get the value from an argument's values.
+
+        Returns:
+            the value, and the number of values that were not used
+        """
+        nargs = self.nargs
+        if nargs is None or nargs == "?":
+            return self.check(values[0]), len(values) - 1
+        elif nargs == "*" or nargs == "+":
+            return [self.check(v) for v in values], 0
+        elif len(values) < nargs:
+            plural = "argument" if nargs == 1 else "arguments"
+            raise self.error(f"expected {nargs} {plural}")
+        else:
+            return [self.check(v) for v in values[:nargs]], len(values) - nargs
+
+
 ###############################################################################
 
 
@@ -72,23 +170,41 @@ class ArgumentHandler:
     """Helper class for argument parsing, defaulting, and casting.
 
     Like argparse.ArgumentParser, but for REST & JSON-body arguments.
+
+    Arguments are compiled by `add_argument()` and checked directly
+    against the request's arguments; only argument options that need it
+    (like flag-oriented `action`s) fall back to `argparse`.
+
+    An instance can be made once per handler class and method, without
+    a `rest_handler`, and then given the handler on each `parse_args()`:
+
+        class Fruits(RestHandler):
+            GET_ARGS = ArgumentHandler(ArgumentSource.QUERY_ARGUMENTS)
+            GET_ARGS.add_argument("limit", type=int, default=10)
+
+            async def get(self):
+                args = self.GET_ARGS.parse_args(self)
     """
 
     def __init__(
-        self, argument_source: ArgumentSource, rest_handler: RestHandler
+        self,
+        argument_source: ArgumentSource,
+        rest_handler: Optional[RestHandler] = None,
     ) -> None:
         if sys.version_info < (3, 9):
             # ArgumentParser's `exit_on_error` is only python 3.9+
-            self._argparser: argparse.ArgumentParser  # mypy hack
             self.argument_source: ArgumentSource  # mypy hack
-            self.rest_handler: RestHandler  # mypy hack
+            self.rest_handler: Optional[RestHandler]  # mypy hack
             raise RuntimeError(
                 f"{self.__class__.__name__} is supported only for python 3.9+"
             )
 
-        self._argparser = argparse.ArgumentParser(exit_on_error=False)
         self.argument_source = argument_source
         self.rest_handler = rest_handler
+        self._arguments: dict[str, _CompiledArgument] = {}
+        self._calls: list[tuple[str, tuple, dict[str, Any]]] = []  # for `argparse`
+        self._argparser: Optional[argparse.ArgumentParser] = None
+        self._json_body_arguments: dict[str, Any] = {}  # while parsing, for `argparse`
 
     def add_argument(
         self,
@@ -125,22 +241,52 @@ class ArgumentHandler:
         just make sure to test it first :)
         """
 
+        # TYPE
+        if kwargs.get("type") is bool:
+            kwargs["type"] = _universal_to_bool
+
+        # REQUIRED
+        if "default" not in kwargs:
+            if "required" not in kwargs:
+                # no default? then it's required
+                kwargs["required"] = True
+            elif not kwargs["required"]:
+                raise ValueError(
+                    f"Argument '{name}' marked as not required but no default was provided."
+                )
+
+        self._calls.append((name, args, kwargs))
+        if self._argparser is None and _CompiledArgument.supports(args, kwargs):
+            if name in self._arguments:
+                raise argparse.ArgumentError(
+                    None, f"argument --{name}: conflicting option string: --{name}"
+                )
+            self._arguments[name] = _CompiledArgument(name, kwargs)
+        elif self._argparser is None:
+            # switch all the arguments over to argparse
+            self._argparser = argparse.ArgumentParser(exit_on_error=False)
+            for call in self._calls:
+                self._add_to_argparser(*call)
+        else:
+            self._add_to_argparser(name, args, kwargs)
+
+    def _add_to_argparser(self, name: str, args: tuple, kwargs: dict[str, Any]) -> None:
+        """Add an argument to the `argparse` parser."""
+
         def retrieve_json_body_arg(parsed_val: Any) -> Any:
             if parsed_val != USE_CACHED_VALUE_PLACEHOLDER:
                 return parsed_val  # this must be the **default** value
             # replace placeholder value with actual value
             key = cast(str, name or kwargs.get("dest"))
             try:
-                return self.rest_handler.json_body_arguments[key]
+                return self._json_body_arguments[key]
             except KeyError as e:
                 # just in case, intercept so the user doesn't get a 400
                 raise RuntimeError(
                     f"key '{key}' should exist in json body arguments"
                 ) from e
 
-        # TYPE
-        if kwargs.get("type") is bool:
-            kwargs["type"] = _universal_to_bool
+        kwargs = dict(kwargs)
         if self.argument_source == ArgumentSource.JSON_BODY_ARGUMENTS:
             if "type" in kwargs:
                 typ = kwargs["type"]  # put in var to avoid unintended recursion
@@ -148,18 +294,10 @@ class ArgumentHandler:
             else:
                 kwargs["type"] = retrieve_json_body_arg
 
-        # REQUIRED
-        if "default" not in kwargs:
-            if "required" not in kwargs:
-                # no default? then it's required
-                kwargs["required"] = True
-            elif not kwargs["required"]:
-                raise ValueError(
-                    f"Argument '{name}' marked as not required but no default was provided."
-                )
-
         # prepend with '--' and add!
-        self._argparser.add_argument(f"--{name}", *args, **kwargs)
+        cast(argparse.ArgumentParser, self._argparser).add_argument(
+            f"--{name}", *args, **kwargs
+        )
 
     @staticmethod
     def _translate_error(
@@ -227,32 +365,126 @@ class ArgumentHandler:
         LOGGER.error(f"error timestamp: {ts}")
         return f"Unknown argument-handling error ({ts})"
 
-    def parse_args(self) -> argparse.Namespace:
-        """Get the args -- like argparse.parse_args but parses a dict."""
-        arg_strings: list[str] = []
+    def _lookup(self, key: str) -> Optional[_CompiledArgument]:
+        """Find an argument by name, or unambiguous prefix (like `argparse`)."""
+        try:
+            return self._arguments[key]
+        except KeyError:
+            pass
+        if not key:
+            return None
+        matches = [a for n, a in self._arguments.items() if n.startswith(key)]
+        if len(matches) > 1:
+            raise tornado.web.HTTPError(
+                400,
+                reason=f"ambiguous option: {key} could match {', '.join(a.name for a in matches)}",
+            )
+        return matches[0] if matches else None
+
+    def _parse_compiled(self, items: Iterable[tuple[str, list[Any]]]) -> argparse.Namespace:
+        """Check the arguments against the compiled arguments."""
+        namespace: dict[str, Any] = {}
+        for arg in self._arguments.values():
+            if arg.dest not in namespace and arg.default is not argparse.SUPPRESS:
+                namespace[arg.dest] = arg.default
+
+        seen = set()
+        unrecognized: list[str] = []
+        extra_values = False
+        for key, values in items:
+            found = self._lookup(key)
+            if found is None:
+                unrecognized.append(key)
+                continue
+            seen.add(found.name)
+            namespace[found.dest], extra = found.take(values)
+            extra_values |= extra > 0
+
+        missing = []
+        for arg in self._arguments.values():
+            if arg.name in seen:
+                continue
+            if arg.required:
+                missing.append(arg.name)
+            elif isinstance(arg.default, str) and namespace.get(arg.dest) is arg.default:
+                namespace[arg.dest] = arg.convert(arg.default)
+        if missing:
+            raise tornado.web.HTTPError(
+                400,
+                reason=f"the following arguments are required: {', '.join(missing)}",
+            )
 
-        # json-encoded body arguments
-        if self.argument_source == ArgumentSource.JSON_BODY_ARGUMENTS:
-            for key, _ in self.rest_handler.json_body_arguments.items():
-                arg_strings.append(f"--{key}")
-                # use cached value (see add_argument()) to avoid unneeded encoding & decoding
+        if unrecognized or extra_values:
+            raise tornado.web.HTTPError(
+                400, reason=f"unrecognized arguments: {', '.join(unrecognized)}"
+            )
+        return argparse.Namespace(**namespace)
+
+    def _parse_argparse(self, items: Iterable[tuple[str, list[Any]]]) -> argparse.Namespace:
+        """Parse the arguments with `argparse`."""
+        arg_strings: list[str] = []
+        for key, values in items:
+            arg_strings.append(f"--{key}")
+            if self.argument_source == ArgumentSource.JSON_BODY_ARGUMENTS:
+                # use cached value (see _add_to_argparser()) to avoid unneeded encoding & decoding
                 arg_strings.append(USE_CACHED_VALUE_PLACEHOLDER)
-        # query arguments
-        elif self.argument_source == ArgumentSource.QUERY_ARGUMENTS:
-            for key, vlist in self.rest_handler.request.arguments.items():
-                arg_strings.append(f"--{key}")
-                arg_strings.extend(to_unicode(v) for v in vlist)
-        # error
-        else:
-            raise ValueError(f"Invalid argument_source: {self.argument_source}")
+            else:
+                arg_strings.extend(values)
 
         # parse
         with contextlib.redirect_stderr(io.StringIO()) as f:
             try:
-                return self._argparser.parse_args(args=arg_strings)
+                return cast(argparse.ArgumentParser, self._argparser).parse_args(
+                    args=arg_strings
+                )
             except (Exception, SystemExit) as e:
                 exc = e
                 captured_stderr = f.getvalue()
         # handle exception outside of context manager so *this* stderr is not intercepted
         msg = self._translate_error(exc, captured_stderr)
         raise tornado.web.HTTPError(400, reason=msg)
+
+    def parse_args(self, rest_handler: Optional[RestHandler] = None) -> argparse.Namespace:
+        """Get the args -- like argparse.parse_args but parses a dict.
+
+        Args:
+            rest_handler: the request's handler (default: the one given to `__init__`)
+        """
+        rest_handler = rest_handler or self.rest_handler
+        if rest_handler is None:
+            raise ValueError("no rest_handler to get arguments from")
+
+        items: Iterable[tuple[str, list[Any]]]
+        # json-encoded body arguments
+        if self.argument_source == ArgumentSource.JSON_BODY_ARGUMENTS:
+            json_body_arguments = rest_handler.json_body_arguments
+            items = ((k, [v]) for k, v in json_body_arguments.items())
+        # query arguments
+        elif self.argument_source == ArgumentSource.QUERY_ARGUMENTS:
+            items = (
+                (k, [to_unicode(v) for v in vlist])
+                for k, vlist in rest_handler.request.arguments.items()
+            )
+        # error
+        else:
+            raise ValueError(f"Invalid argument_source: {self.argument_source}")
+
+        if self._argparser is not None:
+            self._json_body_arguments = (
+                json_body_arguments
+                if self.argument_source == ArgumentSource.JSON_BODY_ARGUMENTS
+                else {}
+            )
+            try:
+                return self._parse_argparse(items)
+            finally:
+                self._json_body_arguments = {}
+
+        try:
+            return self._parse_compiled(items)
+        except tornado.web.HTTPError:
+            raise
+        except Exception as e:
+            # an unexpected error from a `type`
+            msg = self._translate_error(e, "")
+            raise tornado.web.HTTPError(400, reason=msg) from e
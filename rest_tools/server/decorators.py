@@ -3,7 +3,6 @@
 # fmt:off
 
 import logging
-import re
 from functools import wraps
 from inspect import isawaitable
 from typing import Protocol
@@ -12,6 +11,7 @@ import requests.exceptions
 import tornado.web
 
 from .. import openapi_tools, telemetry as wtt
+from .policy import AttributeRolePolicy
 
 LOGGER = logging.getLogger(__name__)
 
@@ -62,27 +62,58 @@ def catch_error(method):
             raise  # tornado can handle this
         except tornado.httpclient.HTTPError:
             raise  # tornado can handle this
-        except requests.exceptions.HTTPError as e:
-            LOGGER.warning('Error in website handler', exc_info=True)
-            try:
-                self.statsd.incr(self.__class__.__name__+'.error')
-            except Exception:
-                pass  # ignore statsd errors
-            if e.response.status_code == 403:
-                code = 403
-                message = 'Error authenticating user'
+        except Exception as e:
+            _send_error(self, e)
+        return None
+    return wrapper
+
+
+def _send_error(self, e):
+    """Log an unhandled handler error, and send the error response."""
+    LOGGER.warning('Error in website handler', exc_info=True)
+    try:
+        self.statsd.incr(self.__class__.__name__+'.error')
+    except Exception:
+        pass  # ignore statsd errors
+    if isinstance(e, requests.exceptions.HTTPError):
+        if e.response.status_code == 403:
+            code = 403
+            message = 'Error authenticating user'
+        else:
+            code = 500
+            message = 'Error contacting backend in '+self.__class__.__name__
+    else:
+        code = 500
+        message = 'Error in '+self.__class__.__name__
+    self.send_error(code, reason=message)
+
+
+########################################################################################################################
+
+
+def _auth_wrapper(method, authorize):
+    """Wrap a handler method with authentication, `authorize(self)`, and error handling.
+
+    The same as stacking `@authenticated @catch_error`, with the
+    authorization check first, but in a single coroutine per request.
+    """
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if not self.current_user:
+            raise tornado.web.HTTPError(403, reason="authentication failed")
+        try:
+            authorize(self)
+            ret = method(self, *args, **kwargs)
+            if isawaitable(ret):
+                return await ret
             else:
-                code = 500
-                message = 'Error contacting backend in '+self.__class__.__name__
-            self.send_error(code, reason=message)
-        except Exception:
-            LOGGER.warning('Error in website handler', exc_info=True)
-            try:
-                self.statsd.incr(self.__class__.__name__+'.error')
-            except Exception:
-                pass  # ignore statsd errors
-            message = 'Error in '+self.__class__.__name__
-            self.send_error(500, reason=message)
+                return ret
+        except tornado.web.HTTPError:
+            raise  # tornado can handle this
+        except tornado.httpclient.HTTPError:
+            raise  # tornado can handle this
+        except Exception as e:
+            _send_error(self, e)
         return None
     return wrapper
 
@@ -90,6 +121,28 @@ def catch_error(method):
 ########################################################################################################################
 
 
+_MISSING = object()
+
+
+def _cached_decision(self, cache, policy, roles, decide):
+    """Get `decide(self)` for the request's token, from `cache` if set.
+
+    A decision of None is a denial.
+    """
+    token = getattr(self, 'auth_key', None) if cache is not None else None
+    if not token or not isinstance(token, str):
+        return decide(self)
+    key = cache.key(token, policy, roles)
+    decision = cache.get(key, _MISSING)
+    if decision is _MISSING:
+        decision = decide(self)
+        cache.set(key, decision, self.auth_data.get('exp'))
+    return decision
+
+
+########################################################################################################################
+
+
 def role_authorization(**_auth):
     """Handle RBAC authorization.
 
@@ -100,32 +153,31 @@ def role_authorization(**_auth):
 
     Args:
         roles (list): The roles to match
+        cache (AuthDecisionCache): (optional) cache decisions per token
 
     Raises:
         :py:class:`tornado.web.HTTPError`
     """
-    def make_wrapper(method):
-        @authenticated
-        @catch_error
-        @wraps(method)
-        async def wrapper(self, *args, **kwargs):
-            roles = _auth.get('roles', [])
-
-            auth_role = self.auth_data.get('role',None)
-            if roles and auth_role in roles:
-                wtt.set_current_span_attribute('self.auth_data.roles', auth_role)
-            else:
-                LOGGER.info('roles: %r', roles)
-                LOGGER.info('token_role: %r', auth_role)
-                LOGGER.info('role mismatch')
-                raise tornado.web.HTTPError(403, reason="authorization failed")
+    roles = _auth.get('roles', [])
+    cache = _auth.get('cache', None)
+
+    def decide(self):
+        auth_role = self.auth_data.get('role',None)
+        if roles and auth_role in roles:
+            return auth_role
+        LOGGER.info('roles: %r', roles)
+        LOGGER.info('token_role: %r', auth_role)
+        LOGGER.info('role mismatch')
+        return None
 
-            ret = method(self, *args, **kwargs)
-            if isawaitable(ret):
-                return await ret
-            else:
-                return ret
-        return wrapper
+    def authorize(self):
+        auth_role = _cached_decision(self, cache, ('role',), roles, decide)
+        if auth_role is None:
+            raise tornado.web.HTTPError(403, reason="authorization failed")
+        wtt.set_current_span_attribute('self.auth_data.roles', auth_role)
+
+    def make_wrapper(method):
+        return _auth_wrapper(method, authorize)
     return make_wrapper
 
 
@@ -143,41 +195,38 @@ def scope_role_auth(**_auth):
     Args:
         roles (list): The roles to match
         prefix (str): The scope prefix
+        cache (AuthDecisionCache): (optional) cache decisions per token
 
     Raises:
         :py:class:`tornado.web.HTTPError`
     """
-    def make_wrapper(method):
-        @authenticated
-        @catch_error
-        @wraps(method)
-        async def wrapper(self, *args, **kwargs):
-            roles = _auth.get('roles', [])
-            scope_prefix = _auth.get('prefix', None)
-
-            authorized = False
-
-            auth_roles = []
-            for scope in self.auth_data.get('scope', '').split():
-                if scope_prefix and scope.startswith(f'{scope_prefix}:'):
-                    auth_roles.append(scope.split(':', 1)[-1])
-
-            authorized = set(roles).intersection(auth_roles)
-
-            if not authorized:
-                LOGGER.info('roles: %r', roles)
-                LOGGER.info('token_roles: %r', auth_roles)
-                LOGGER.info('role mismatch')
-                raise tornado.web.HTTPError(403, reason="authorization failed")
-
-            wtt.set_current_span_attribute('self.auth_data.roles', ','.join(sorted(authorized)))
+    roles = _auth.get('roles', [])
+    scope_prefix = _auth.get('prefix', None)
+    cache = _auth.get('cache', None)
+
+    def decide(self):
+        auth_roles = []
+        for scope in self.auth_data.get('scope', '').split():
+            if scope_prefix and scope.startswith(f'{scope_prefix}:'):
+                auth_roles.append(scope.split(':', 1)[-1])
+
+        authorized = set(roles).intersection(auth_roles)
+
+        if not authorized:
+            LOGGER.info('roles: %r', roles)
+            LOGGER.info('token_roles: %r', auth_roles)
+            LOGGER.info('role mismatch')
+            return None
+        return ','.join(sorted(authorized))
+
+    def authorize(self):
+        authorized = _cached_decision(self, cache, ('scope', scope_prefix), roles, decide)
+        if authorized is None:
+            raise tornado.web.HTTPError(403, reason="authorization failed")
+        wtt.set_current_span_attribute('self.auth_data.roles', authorized)
 
-            ret = method(self, *args, **kwargs)
-            if isawaitable(ret):
-                return await ret
-            else:
-                return ret
-        return wrapper
+    def make_wrapper(method):
+        return _auth_wrapper(method, authorize)
     return make_wrapper
 
 
@@ -194,45 +243,45 @@ def keycloak_role_auth(**_auth):
     Args:
         roles (list): The roles to match
         prefix (str): The token prefix (default: realm_access.roles)
+        cache (AuthDecisionCache): (optional) cache decisions per token
     Raises:
         :py:class:`tornado.web.HTTPError`
     """
-    def make_wrapper(method):
-        @authenticated
-        @catch_error
-        @wraps(method)
-        async def wrapper(self, *args, **kwargs):
-            roles = _auth.get('roles', [])
-            prefix = _auth.get('prefix', 'realm_access.roles').split('.')
-
-            auth_roles = self.auth_data
-            while prefix:
-                auth_roles = auth_roles.get(prefix[0], {})
-                prefix = prefix[1:]
-
-            authorized = set(roles).intersection(auth_roles)
-
-            if not authorized:
-                LOGGER.info('roles: %r', roles)
-                LOGGER.info('token_roles: %r', auth_roles)
-                LOGGER.info('role mismatch')
-                raise tornado.web.HTTPError(403, reason="authorization failed")
-
-            wtt.set_current_span_attribute('self.auth_data.roles', ','.join(sorted(authorized)))
+    roles = _auth.get('roles', [])
+    token_prefix = _auth.get('prefix', 'realm_access.roles')
+    cache = _auth.get('cache', None)
+
+    def decide(self):
+        prefix = token_prefix.split('.')
+        auth_roles = self.auth_data
+        while prefix:
+            auth_roles = auth_roles.get(prefix[0], {})
+            prefix = prefix[1:]
+
+        authorized = set(roles).intersection(auth_roles)
+
+        if not authorized:
+            LOGGER.info('roles: %r', roles)
+            LOGGER.info('token_roles: %r', auth_roles)
+            LOGGER.info('role mismatch')
+            return None
+        return ','.join(sorted(authorized))
+
+    def authorize(self):
+        authorized = _cached_decision(self, cache, ('keycloak', token_prefix), roles, decide)
+        if authorized is None:
+            raise tornado.web.HTTPError(403, reason="authorization failed")
+        wtt.set_current_span_attribute('self.auth_data.roles', authorized)
 
-            ret = method(self, *args, **kwargs)
-            if isawaitable(ret):
-                return await ret
-            else:
-                return ret
-        return wrapper
+    def make_wrapper(method):
+        return _auth_wrapper(method, authorize)
     return make_wrapper
 
 
 ########################################################################################################################
 
 
-def token_attribute_role_mapping_auth(role_attrs, group_attrs=None):  # noqa: C901
+def token_attribute_role_mapping_auth(role_attrs, group_attrs=None, cache=None):
     """Handle RBAC authorization by creating a decorator that maps token
     attributes to roles, then using the decorator to allow access to functions
     by role.  Can also map groups and add that to auth data.
@@ -254,9 +303,14 @@ def token_attribute_role_mapping_auth(role_attrs, group_attrs=None):  # noqa: C9
       * For capturing part of a value: `my.attr=foo(.*)`
     Note that this uses `re.fullmatch`.
 
+    Expressions are compiled when the decorator is made (see
+    `rest_tools.server.policy`), so a malformed one raises a `ValueError`
+    right away.
+
     Args:
         role_attrs (dict): Map of role name to list of valid attr expressions
         group_attrs (dict): Map of group name to list of valid attr expressions
+        cache (AuthDecisionCache): (optional) cache decisions per token
     Returns:
         callable: Decorator function
 
@@ -269,7 +323,7 @@ def token_attribute_role_mapping_auth(role_attrs, group_attrs=None):  # noqa: C9
         my_auth = token_attribute_role_mapping_auth(
             role_attrs = {
                 'write': ['groups=my-service-write', 'groups=admins'],
-                'read': ['groups'],
+                'read': ['groups=.*'],
             },
             group_attrs = {
                 r'\1': [r'groups=my-service-(.*)']
@@ -284,94 +338,50 @@ def token_attribute_role_mapping_auth(role_attrs, group_attrs=None):  # noqa: C9
             async def post(self):
                 pass
     """
-    basic_role_attrs = set()
-    regex_role_attrs = set()
-    for name in role_attrs:
-        if re.fullmatch(r'\w+', name):
-            basic_role_attrs.add(name)
-        else:
-            regex_role_attrs.add(name)
-    if not group_attrs:
-        group_attrs = {}
-
-    def eval_expression(token, e):
-        name, val = e.split('=',1)
-        if name == 'scope':
-            # special handling to split into string
-            token_val = token.get('scope','').split()
-        else:
-            prefix = name.split('.')[:-1]
-            while prefix:
-                token = token.get(prefix[0], {})
-                prefix = prefix[1:]
-            token_val = token.get(name.split('.')[-1], None)
-
-        LOGGER.debug('token_val = %r', token_val)
-        if token_val is None:
-            return []
-
-        prog = re.compile(val)
-        if isinstance(token_val, list):
-            ret = (prog.fullmatch(v) for v in token_val)
-        else:
-            ret = [prog.fullmatch(token_val)]
-        return [r for r in ret if r]
+    policy = AttributeRolePolicy(role_attrs, group_attrs)
 
     def make_decorator(**_auth):
-        def make_wrapper(method):
-            @authenticated
-            @catch_error
-            @wraps(method)
-            async def wrapper(self, *args, **kwargs):
-                roles = _auth.get('roles', [])
-
-                try:
-                    authorized_roles = set()
-                    for role in basic_role_attrs.intersection(roles):
-                        for expression in role_attrs[role]:
-                            if eval_expression(self.auth_data, expression):
-                                authorized_roles.add(role)
-                    for name in regex_role_attrs:
-                        for expression in role_attrs[name]:
-                            ret = eval_expression(self.auth_data, expression)
-                            rolenames = [match.expand(name) for match in ret]
-                            authorized_roles.update(role for role in roles if role in rolenames)
-                except Exception as exc:
-                    LOGGER.warning('exception in role auth', exc_info=True)
-                    raise tornado.web.HTTPError(500, reason="internal server error") from exc
-
-                if not authorized_roles:
-                    LOGGER.debug('roles requested: %r', roles)
-                    LOGGER.debug('role mismatch')
-                    raise tornado.web.HTTPError(403, reason="authorization failed")
+        roles = _auth.get('roles', [])
+
+        def decide(self):
+            values = {}  # token attributes, extracted once
+
+            try:
+                authorized_roles = policy.match_roles(self.auth_data, roles, values)
+            except Exception as exc:
+                LOGGER.warning('exception in role auth', exc_info=True)
+                raise tornado.web.HTTPError(500, reason="internal server error") from exc
 
+            if not authorized_roles:
                 LOGGER.debug('roles requested: %r', roles)
-                authorized_roles = sorted(authorized_roles)
-                LOGGER.debug('roles authorized: %r', authorized_roles)
-                wtt.set_current_span_attribute('self.auth_data.roles', ','.join(authorized_roles))
-                self.auth_roles = authorized_roles
-
-                try:
-                    authorized_groups = set()
-                    for name in group_attrs:
-                        for expression in group_attrs[name]:
-                            ret = eval_expression(self.auth_data, expression)
-                            authorized_groups.update(match.expand(name) for match in ret)
-                except Exception as exc:
-                    LOGGER.warning('exception in group auth', exc_info=True)
-                    raise tornado.web.HTTPError(500, reason="internal server error") from exc
-
-                authorized_groups = sorted(authorized_groups)
-                LOGGER.debug('groups authorized: %r', authorized_groups)
-                wtt.set_current_span_attribute('self.auth_data.groups', ','.join(authorized_groups))
-                self.auth_groups = authorized_groups
-
-                ret = method(self, *args, **kwargs)
-                if isawaitable(ret):
-                    return await ret
-                else:
-                    return ret
-            return wrapper
+                LOGGER.debug('role mismatch')
+                return None
+
+            try:
+                authorized_groups = policy.match_groups(self.auth_data, values)
+            except Exception as exc:
+                LOGGER.warning('exception in group auth', exc_info=True)
+                raise tornado.web.HTTPError(500, reason="internal server error") from exc
+
+            return sorted(authorized_roles), sorted(authorized_groups)
+
+        def authorize(self):
+            decision = _cached_decision(self, cache, policy, roles, decide)
+            if decision is None:
+                raise tornado.web.HTTPError(403, reason="authorization failed")
+            authorized_roles, authorized_groups = decision
+
+            LOGGER.debug('roles requested: %r', roles)
+            LOGGER.debug('roles authorized: %r', authorized_roles)
+            wtt.set_current_span_attribute('self.auth_data.roles', ','.join(authorized_roles))
+            self.auth_roles = list(authorized_roles)
+
+            LOGGER.debug('groups authorized: %r', authorized_groups)
+            wtt.set_current_span_attribute('self.auth_data.groups', ','.join(authorized_groups))
+            self.auth_groups = list(authorized_groups)
+
+        def make_wrapper(method):
+            return _auth_wrapper(method, authorize)
         return make_wrapper
     return make_decorator
 
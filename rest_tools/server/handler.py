@@ -9,16 +9,19 @@ import json
 import logging
 import time
 import urllib.parse
-from collections import defaultdict
 from typing import Any, Optional, Union
 
+import jwt
 import tornado.escape
 import tornado.httputil
 import tornado.web
 from tornado.auth import OAuth2Mixin
 
+from .admission import ConcurrencyLimits
 from .decorators import catch_error
-from .stats import RouteStats
+from .metrics import Metrics
+from .ratelimit import RateLimitSetup, RateLimitStore
+from .stats import LOOP_LAG, POLICIES, RouteStatsMap
 from .. import telemetry as wtt
 from ..utils.auth import Auth, OpenIDAuth
 from ..utils.json_util import json_decode
@@ -36,6 +39,39 @@ def _log_auth_failed(e: Exception):
         LOGGER.exception(e)
 
 
+def _auth_setup(auth_config):
+    """Make the `Auth` and auth url from the `auth` config section."""
+    auth = None
+    auth_url = ''
+    kwargs = {k: auth_config[k] for k in ('leeway', 'cache_size', 'audience', 'issuers') if k in auth_config}
+    if 'secret' in auth_config:
+        kwargs['secret'] = auth_config['secret']
+        for k in ('issuer', 'algorithm', 'expiration', 'expiration_temp'):
+            if k in auth_config:
+                kwargs[k] = auth_config[k]
+        auth = Auth(**kwargs)
+    elif 'openid_url' in auth_config:
+        if 'algorithms' in auth_config:
+            kwargs['algorithms'] = auth_config['algorithms']
+        auth = OpenIDAuth(auth_config['openid_url'], **kwargs)
+        if auth.token_url:
+            auth_url = auth.token_url
+    if 'url' in auth_config:
+        auth_url = auth_config['url']
+    return auth, auth_url
+
+
+def _route_stats_setup(route_stats_config):
+    """Make the `RouteStatsMap` from the `route_stats` config section."""
+    route_stats_config = dict(route_stats_config)
+    max_routes = route_stats_config.pop('max_routes', None)
+    backend = route_stats_config.pop('backend', None)
+    policy = route_stats_config.pop('policy', 'median')
+    if policy not in POLICIES:
+        raise ValueError(f"route_stats policy must be one of {list(POLICIES)}: {policy}")
+    return RouteStatsMap(functools.partial(POLICIES[policy], **route_stats_config), max_routes=max_routes, backend=backend)
+
+
 def RestHandlerSetup(config={}):
     """Default RestHandler setup. Returns the default arguments for passing to
     the route setup.
@@ -47,43 +83,18 @@ def RestHandlerSetup(config={}):
         dict: handler config
     """
     debug = True if 'debug' in config and config['debug'] else False
-    auth = None
-    auth_url = ''
+    auth, auth_url = _auth_setup(config['auth']) if 'auth' in config else (None, '')
     module_auth_key = ''
-    if 'auth' in config:
-        kwargs = {}
-        if 'leeway' in config['auth']:
-            kwargs['leeway'] = config['auth']['leeway']
-        if 'audience' in config['auth']:
-            kwargs['audience'] = config['auth']['audience']
-        if 'issuers' in config['auth']:
-            kwargs['issuers'] = config['auth']['issuers']
-        if 'secret' in config['auth']:
-            kwargs['secret'] = config['auth']['secret']
-            if 'issuer' in config['auth']:
-                kwargs['issuer'] = config['auth']['issuer']
-            if 'algorithm' in config['auth']:
-                kwargs['algorithm'] = config['auth']['algorithm']
-            if 'expiration' in config['auth']:
-                kwargs['expiration'] = config['auth']['expiration']
-            if 'expiration_temp' in config['auth']:
-                kwargs['expiration_temp'] = config['auth']['expiration_temp']
-            auth = Auth(**kwargs)
-        elif 'openid_url' in config['auth']:
-            if 'algorithms' in config['auth']:
-                kwargs['algorithms'] = config['auth']['algorithms']
-            auth = OpenIDAuth(config['auth']['openid_url'], **kwargs)
-            if auth.token_url:
-                auth_url = auth.token_url
-        if 'url' in config['auth']:
-            auth_url = config['auth']['url']
     if 'rest_api' in config and 'auth_key' in config['rest_api']:
         module_auth_key = config['rest_api']['auth_key']
 
-    if 'route_stats' in config:
-        route_stats = defaultdict(functools.partial(RouteStats, **config['route_stats']))
-    else:
-        route_stats = defaultdict(RouteStats)
+    route_stats = _route_stats_setup(config['route_stats']) if 'route_stats' in config else RouteStatsMap()
+
+    metrics = Metrics(route_stats=route_stats) if config.get('metrics') else None
+
+    concurrency = ConcurrencyLimits(**config['concurrency']) if 'concurrency' in config else None
+
+    rate_limit_store = RateLimitSetup(config['rate_limit']) if 'rate_limit' in config else None
 
     return {
         'debug': debug,
@@ -91,7 +102,10 @@ def RestHandlerSetup(config={}):
         'auth_url': auth_url,
         'module_auth_key': module_auth_key,
         'server_header': config.get('server_header', 'REST'),
-        'route_stats': route_stats
+        'route_stats': route_stats,
+        'metrics': metrics,
+        'concurrency': concurrency,
+        'rate_limit_store': rate_limit_store,
     }
 
 
@@ -104,7 +118,7 @@ class RestHandler(tornado.web.RequestHandler):
         except Exception:
             LOGGER.error('error', exc_info=True)
 
-    def initialize(self, debug=False, auth: Union[Auth, None] = None, auth_url=None, module_auth_key='', server_header='', route_stats=None, **kwargs):
+    def initialize(self, debug=False, auth: Union[Auth, None] = None, auth_url=None, module_auth_key='', server_header='', route_stats=None, metrics: Optional[Metrics] = None, concurrency: Optional[ConcurrencyLimits] = None, rate_limit_store: Optional[RateLimitStore] = None, **kwargs):
         super().initialize(**kwargs)
         self.debug = debug
         self.auth = auth
@@ -114,6 +128,52 @@ class RestHandler(tornado.web.RequestHandler):
         self.module_auth_key = module_auth_key
         self.server_header = server_header
         self.route_stats = route_stats
+        self.metrics = metrics
+        self._metrics_started = False
+        self.concurrency = concurrency
+        self.queue_time = 0.  # seconds spent waiting for a `concurrency` slot
+        self.rate_limit_store = rate_limit_store  # for `rate_limit`
+        self._retry_after: Optional[int] = None  # for a 503/429, see `write_error()`
+
+    async def _execute(self, *args: Any, **kwargs: Any) -> None:
+        """Admit the request, then call implemented methods.
+
+        With `concurrency` limits, this holds the route's slot for the
+        whole request. A request that is not admitted gets its 503 here,
+        without running `prepare()` or the method. An admitted request
+        first gets any new OpenID keys for its token, off the event loop.
+        """
+        limiter = self.concurrency[self.get_route_stats_key()] if self.concurrency is not None else None
+        if limiter is None:
+            await self._refresh_auth_keys()
+            return await self._execute_spanned(*args, **kwargs)
+
+        queued = time.monotonic()
+        admitted = await limiter.acquire()
+        start = time.monotonic()
+        self.queue_time = start - queued
+        if not admitted:
+            self._reject_unadmitted(args[0], limiter.retry_after())
+            return
+        try:
+            await self._refresh_auth_keys()
+            return await self._execute_spanned(*args, **kwargs)
+        finally:
+            limiter.release(time.monotonic() - start)
+
+    def _reject_unadmitted(self, transforms: Any, retry_after: int) -> None:
+        """Send a 503 for a request over the `concurrency` limits."""
+        self._transforms = transforms  # like `RequestHandler._execute()`
+        if self._prepared_future is not None:
+            self._prepared_future.set_result(None)  # for `stream_request_body` handlers
+        key = self.get_route_stats_key()
+        LOGGER.warning('Route is at capacity, backoff %r', retry_after)
+        if self.metrics is not None:
+            self.metrics.start(key)
+            self._metrics_started = True
+            self.metrics.shed(key)
+        self._retry_after = retry_after
+        self.send_error(503, reason="server overloaded")
 
     @wtt.spanned(
         span_namer=wtt.SpanNamer(use_this_arg='self.request.method'),
@@ -121,7 +181,7 @@ class RestHandler(tornado.web.RequestHandler):
         these=["self.request.method", "self.request.path"],
         carrier="self.request.headers",
     )
-    async def _execute(self, *args: Any, **kwargs: Any) -> None:
+    async def _execute_spanned(self, *args: Any, **kwargs: Any) -> None:
         """Call implemented methods.
 
         NOTE: This is the closest common call-stack ancestor of
@@ -152,10 +212,35 @@ class RestHandler(tornado.web.RequestHandler):
         except Exception as e:
             if self.debug and 'Authorization' in self.request.headers:
                 LOGGER.info('Authorization: %r', self.request.headers['Authorization'])
+            if self.metrics is not None and 'Authorization' in self.request.headers:
+                self.metrics.auth_failure(self.get_route_stats_key())
             _log_auth_failed(e)
 
         return None
 
+    async def _refresh_auth_keys(self) -> None:
+        """Fetch new OpenID keys for the request's token, without blocking the event loop."""
+        if not isinstance(self.auth, OpenIDAuth):
+            return
+        try:
+            type, token = self.request.headers['Authorization'].split(' ', 1)
+            if self.auth.is_validated(token):
+                return  # its key is known, so skip decoding the header
+            kid = jwt.get_unverified_header(token)['kid']
+        except Exception:
+            return  # `get_current_user()` will reject it
+        await self.auth.refresh_keys_async(kid)
+
+    def get_route_stats_key(self) -> str:
+        """Get the `route_stats` key for this request.
+
+        Defaults to the handler class's full name (ex:
+        `myapp.handlers.DatasetHandler`), so all urls matched by a route
+        (ex: `/dataset/<uuid>`) share one `RouteStats`.
+        """
+        cls = type(self)
+        return f'{cls.__module__}.{cls.__qualname__}'
+
     @wtt.evented()
     def prepare(self):
         """Prepare before http-method request handlers."""
@@ -167,12 +252,20 @@ class RestHandler(tornado.web.RequestHandler):
         #       ">>>" makes logs line-up (end-of-request log line uses http code: 200, 400, etc.)
         LOGGER.debug(f"[{self.__class__.__name__}]")
 
+        if self.metrics is not None:
+            self.metrics.start(self.get_route_stats_key())
+            self._metrics_started = True
+
         if self.route_stats is not None:
-            stat = self.route_stats[self.request.path]
+            stat = self.route_stats[self.get_route_stats_key()]
+            if stat.observes_delay:
+                stat.observe_delay(self.queue_time + LOOP_LAG.get())
             if stat.is_overloaded():
                 backoff = stat.get_backoff_time()
                 LOGGER.warning('Server is overloaded, backoff %r', backoff)
-                self.set_header('Retry-After', backoff)
+                if self.metrics is not None:
+                    self.metrics.shed(self.get_route_stats_key())
+                self._retry_after = backoff
                 raise tornado.web.HTTPError(503, reason="server overloaded")
             self.start_time = time.time()
 
@@ -180,12 +273,21 @@ class RestHandler(tornado.web.RequestHandler):
     def on_finish(self):
         """Cleanup after http-method request handlers."""
         if self.route_stats is not None and self.get_status() < 500:
-            stat = self.route_stats[self.request.path]
+            stat = self.route_stats[self.get_route_stats_key()]
             stat.append(time.time() - self.start_time)
+        if self._metrics_started:
+            self.metrics.finish(  # type: ignore[union-attr]
+                self.get_route_stats_key(),
+                self.get_status(),
+                self.request.request_time(),
+                int(self._headers.get('Content-Length', 0)),
+            )
 
     @wtt.evented(all_args=True)
     def write_error(self, status_code=500, **kwargs):
         """Write out custom error json."""
+        if self._retry_after is not None:
+            self.set_header('Retry-After', self._retry_after)
         data = {
             'code': status_code,
             'error': self._reason,
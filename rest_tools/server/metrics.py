@@ -0,0 +1,151 @@
+"""
+Prometheus-format metrics.
+
+`RestHandler` records each request into a `Metrics` (when given one,
+see `RestHandlerSetup({'metrics': True})`), and `MetricsHandler`
+exposes them:
+
+    server.add_metrics_route(handler_config['metrics'])
+
+Everything is pre-aggregated per route (the `RouteStats` key) as plain
+counters and fixed histogram buckets, so recording a request allocates
+nothing. Metrics are per-process.
+"""
+
+# fmt:off
+
+import bisect
+import math
+
+import tornado.web
+
+LATENCY_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1., 2.5, 5., 10., 30., 60.)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+
+class _RouteMetrics:
+    __slots__ = ('statuses', 'latency_counts', 'latency_sum', 'size_counts', 'size_sum', 'in_flight', 'shed', 'auth_failures')
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last one is +Inf
+        self.latency_sum = 0.
+        self.size_counts = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.in_flight = 0
+        self.shed = 0
+        self.auth_failures = 0
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """
+    Per-route request metrics.
+
+    Args:
+        route_stats (RouteStatsMap): (optional) also export these `RouteStats`
+        prefix (str): metric name prefix
+    """
+    def __init__(self, route_stats=None, prefix='rest'):
+        self.route_stats = route_stats
+        self.prefix = prefix
+        self._routes = {}
+
+    def _route(self, route):
+        try:
+            return self._routes[route]
+        except KeyError:
+            ret = self._routes[route] = _RouteMetrics()
+            return ret
+
+    def start(self, route):
+        """Record the start of a request."""
+        self._route(route).in_flight += 1
+
+    def finish(self, route, status, latency, size):
+        """Record the end of a request."""
+        m = self._route(route)
+        m.in_flight -= 1
+        m.statuses[status] = m.statuses.get(status, 0) + 1
+        m.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        m.latency_sum += latency
+        m.size_counts[bisect.bisect_left(SIZE_BUCKETS, size)] += 1
+        m.size_sum += size
+
+    def shed(self, route):
+        """Record a request rejected because the server is overloaded."""
+        self._route(route).shed += 1
+
+    def auth_failure(self, route):
+        """Record a failed authentication."""
+        self._route(route).auth_failures += 1
+
+    def _histogram(self, lines, name, route, buckets, counts, total):
+        cumulative = 0
+        for le,c in zip(buckets + (math.inf,), counts):
+            cumulative += c
+            lines.append(f'{name}_bucket{{route="{route}",le="{_format(le)}"}} {cumulative}')
+        lines.append(f'{name}_sum{{route="{route}"}} {_format(total)}')
+        lines.append(f'{name}_count{{route="{route}"}} {cumulative}')
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        routes = sorted(self._routes.items())
+        lines = []
+
+        lines.append(f'# HELP {p}_requests_total Finished requests.')
+        lines.append(f'# TYPE {p}_requests_total counter')
+        for route,m in routes:
+            for status,c in sorted(m.statuses.items()):
+                lines.append(f'{p}_requests_total{{route="{_escape(route)}",code="{status}"}} {c}')
+
+        lines.append(f'# HELP {p}_request_duration_seconds Request latency.')
+        lines.append(f'# TYPE {p}_request_duration_seconds histogram')
+        for route,m in routes:
+            self._histogram(lines, f'{p}_request_duration_seconds', _escape(route), LATENCY_BUCKETS, m.latency_counts, m.latency_sum)
+
+        lines.append(f'# HELP {p}_response_size_bytes Response body size.')
+        lines.append(f'# TYPE {p}_response_size_bytes histogram')
+        for route,m in routes:
+            self._histogram(lines, f'{p}_response_size_bytes', _escape(route), SIZE_BUCKETS, m.size_counts, m.size_sum)
+
+        for name,attr,kind,help in (
+            ('requests_in_flight', 'in_flight', 'gauge', 'Requests being handled.'),
+            ('requests_shed_total', 'shed', 'counter', 'Requests rejected with a 503 because the route is overloaded.'),
+            ('auth_failures_total', 'auth_failures', 'counter', 'Failed authentications.'),
+        ):
+            lines.append(f'# HELP {p}_{name} {help}')
+            lines.append(f'# TYPE {p}_{name} {kind}')
+            for route,m in routes:
+                lines.append(f'{p}_{name}{{route="{_escape(route)}"}} {getattr(m, attr)}')
+
+        if self.route_stats is not None:
+            lines.append(f'# HELP {p}_route_stats_seconds Request latency quartiles, as seen by the overload check.')
+            lines.append(f'# TYPE {p}_route_stats_seconds summary')
+            for route,stat in sorted(self.route_stats.items()):
+                count, stats = stat.quantiles()
+                for q,value in zip(('0.25', '0.5', '0.75'), stats):
+                    lines.append(f'{p}_route_stats_seconds{{route="{_escape(route)}",quantile="{q}"}} {_format(float(value))}')
+                lines.append(f'{p}_route_stats_seconds_count{{route="{_escape(route)}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(tornado.web.RequestHandler):
+    """Expose a `Metrics` for Prometheus to scrape."""
+    def initialize(self, metrics):
+        self.metrics = metrics
+
+    def get(self):
+        self.set_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.write(self.metrics.render())
@@ -0,0 +1,220 @@
+"""
+Authorization policies.
+
+Attr expressions (`my.attr=regex`) for `token_attribute_role_mapping_auth`
+are parsed and their regexes compiled once, when the decorator is made.
+Roles with a fixed name are indexed by that name, so a request only
+evaluates the expressions for the roles it asks for, and each token
+attribute is extracted once per request.
+
+An `AuthDecisionCache` lets the authorization decorators skip the policy
+entirely for a token they have already seen.
+"""
+
+# fmt:off
+
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+
+
+class AttrExpression:
+    """
+    A compiled `attr=regex` expression.
+
+    Args:
+        expression (str): the attr expression
+
+    Raises:
+        ValueError: for a malformed expression or regex
+    """
+    __slots__ = ('expression', 'attr', 'path', 'key', 'prog')
+
+    def __init__(self, expression):
+        try:
+            attr, val = expression.split('=', 1)
+        except ValueError:
+            raise ValueError(f'attr expression must be "attr=value": {expression!r}') from None
+        try:
+            self.prog = re.compile(val)
+        except re.error as e:
+            raise ValueError(f'bad regex in attr expression {expression!r}: {e}') from e
+        self.expression = expression
+        self.attr = attr
+        *self.path, self.key = attr.split('.')
+
+    def __repr__(self):
+        return f'AttrExpression({self.expression!r})'
+
+    def extract(self, token):
+        """Get the attribute's value from the token, or None."""
+        if self.attr == 'scope':
+            # special handling to split into string
+            return token.get('scope', '').split()
+        for name in self.path:
+            token = token.get(name, {})
+        return token.get(self.key, None)
+
+    def matches(self, token, values):
+        """
+        Match against a token.
+
+        Args:
+            token (dict): token data
+            values (dict): per-token cache of extracted attributes
+
+        Returns:
+            list: `re.Match` objects, for each matching value
+        """
+        try:
+            token_val = values[self.attr]
+        except KeyError:
+            token_val = values[self.attr] = self.extract(token)
+        if token_val is None:
+            return []
+        if isinstance(token_val, list):
+            return [m for m in map(self.prog.fullmatch, token_val) if m]
+        m = self.prog.fullmatch(token_val)
+        return [m] if m else []
+
+
+class AttributeRolePolicy:
+    """
+    Map token attributes to roles and groups.
+
+    Role and group names may use backreferences (`\\1`) to the matched
+    value; other names are fixed.
+
+    Args:
+        role_attrs (dict): Map of role name to list of valid attr expressions
+        group_attrs (dict): Map of group name to list of valid attr expressions
+
+    Raises:
+        ValueError: for a malformed expression
+    """
+    def __init__(self, role_attrs, group_attrs=None):
+        self.roles = {}  # fixed role name: [expression]
+        self.role_templates = []  # (role name template, expression)
+        for name, expressions in role_attrs.items():
+            compiled = [AttrExpression(e) for e in expressions]
+            if '\\' in name:
+                self.role_templates.extend((name, e) for e in compiled)
+            else:
+                self.roles[name] = compiled
+        self.group_templates = []  # (group name template, expression)
+        for name, expressions in (group_attrs or {}).items():
+            self.group_templates.extend((name, AttrExpression(e)) for e in expressions)
+
+    def match_roles(self, token, roles, values=None):
+        """
+        Get the requested roles that the token has.
+
+        Args:
+            token (dict): token data
+            roles (list): the roles requested
+            values (dict): (optional) per-token cache of extracted attributes
+
+        Returns:
+            set: authorized roles
+        """
+        if values is None:
+            values = {}
+        authorized = set()
+        for role in roles:
+            if role in authorized:
+                continue
+            for expression in self.roles.get(role, ()):
+                if expression.matches(token, values):
+                    authorized.add(role)
+                    break
+        wanted = set(roles) - authorized
+        for name, expression in self.role_templates:
+            if not wanted:
+                break
+            for match in expression.matches(token, values):
+                role = match.expand(name)
+                if role in wanted:
+                    authorized.add(role)
+                    wanted.discard(role)
+        return authorized
+
+    def match_groups(self, token, values=None):
+        """
+        Get the groups that the token has.
+
+        Args:
+            token (dict): token data
+            values (dict): (optional) per-token cache of extracted attributes
+
+        Returns:
+            set: groups
+        """
+        if values is None:
+            values = {}
+        groups = set()
+        for name, expression in self.group_templates:
+            groups.update(match.expand(name) for match in expression.matches(token, values))
+        return groups
+
+
+class AuthDecisionCache:
+    """
+    Authorization decisions per token, kept until the token expires.
+
+    Pass one as `cache` to the authorization decorators (ex:
+    `role_authorization(roles=['read'], cache=cache)`); they can share
+    one. Both grants and denials are cached; tokens without an `exp`
+    are not cached unless there is a `ttl`.
+
+    Args:
+        max_size (int): max number of decisions; the least-recently-used are dropped
+        ttl (float): (optional) max seconds to keep a decision
+    """
+    def __init__(self, max_size=10000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache = OrderedDict()  # key: (expiration, decision)
+
+    def __len__(self):
+        return len(self._cache)
+
+    @staticmethod
+    def key(token, policy, roles):
+        """Make a cache key for a token, a policy id, and the roles requested."""
+        return (hashlib.sha256(token.encode('utf-8')).digest(), policy, tuple(roles))
+
+    def get(self, key, default=None):
+        """Get a decision, or `default` if missing or expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.time():
+            del self._cache[key]
+            return default
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, decision, exp=None):
+        """
+        Store a decision.
+
+        Args:
+            key (tuple): from `key()`
+            decision: the decision
+            exp (float): the token's expiration
+        """
+        now = time.time()
+        expiration = exp if isinstance(exp, (int, float)) else math.inf
+        if self.ttl is not None:
+            expiration = min(expiration, now + self.ttl)
+        if expiration == math.inf or expiration <= now:
+            return
+        self._cache[key] = (expiration, decision)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,259 @@
+"""
+Token-bucket rate limiting.
+
+Each client (by auth subject, token `azp`, or IP) gets a bucket of
+`burst` tokens, refilled at `rate` tokens per second; a request takes
+one token, or is rejected with a 429 and the `Retry-After` until the
+next token. Use with the `rate_limit` decorator:
+
+    class Jobs(RestHandler):
+        @authenticated
+        @rate_limit(rate=5, burst=20, key='user')
+        async def post(self):
+            ...
+
+Buckets are kept in a `RateLimitStore`, in memory (per process) by
+default, or in redis for all servers:
+
+    RestHandlerSetup({'rate_limit': {'storage_type': 'redis', 'host': 'redis'}})
+
+Redis is called from worker threads, with short timeouts, so it never
+blocks the event loop. If redis cannot be reached, requests are allowed
+(fail open), with a warning.
+"""
+
+# fmt:off
+
+import asyncio
+import concurrent.futures
+import logging
+import math
+import time
+from collections import OrderedDict
+from functools import wraps
+from inspect import isawaitable
+from typing import Callable, Optional, Union
+
+import tornado.web
+
+from .session import StorageTypes, redis_available
+
+if redis_available:
+    import redis.exceptions
+    from redis.backoff import NoBackoff
+    from redis.retry import Retry
+
+    from .session import redis_connection
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RateLimitStore:
+    """Base class for token bucket storage."""
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.) -> float:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key (str): bucket key
+            rate (float): tokens added per second
+            burst (float): bucket size
+            cost (float): tokens to take
+
+        Returns:
+            float: 0 if the tokens were taken, else the seconds until there are enough
+        """
+        raise NotImplementedError()
+
+    async def take_async(self, key: str, rate: float, burst: float, cost: float = 1.) -> float:
+        """Like `take`, for use on the event loop."""
+        return self.take(key, rate, burst, cost)
+
+    def close(self):
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Token buckets in process memory.
+
+    Args:
+        max_keys (int): max number of buckets; the least-recently-used are dropped
+    """
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # key: (tokens, timestamp)
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1., now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        state = self._buckets.get(key)
+        if state is None:
+            tokens = burst
+        else:
+            tokens = min(burst, state[0] + (now - state[1]) * rate)
+            self._buckets.move_to_end(key)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.
+        else:
+            wait = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# keys: bucket; args: rate, burst, cost
+# uses the redis server's clock, so servers with skewed clocks agree
+_TAKE_SCRIPT = """
+redis.replicate_commands()
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + math.max(0, now - tonumber(state[2])) * rate)
+end
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+if redis_available:
+    class RedisRateLimitStore(RateLimitStore):
+        """
+        Token buckets in redis, shared by all servers.
+
+        Each check is one atomic script call, run in a worker thread by
+        `take_async`. Redis errors (including timeouts) allow the
+        request.
+
+        Args:
+            prefix (str): redis key prefix
+            timeout (float): redis connect and socket timeout, in seconds
+            max_workers (int): max redis calls at once
+            **kwargs: connection args, see `redis_connection`
+        """
+        WARNING_INTERVAL = 60.  # seconds between "redis is down" warnings
+
+        def __init__(self, prefix: str = 'ratelimit', timeout: float = .5, max_workers: int = 16, **kwargs):
+            self.prefix = prefix
+            kwargs.setdefault('socket_timeout', timeout)
+            kwargs.setdefault('socket_connect_timeout', timeout)
+            kwargs.setdefault('retry', Retry(NoBackoff(), 0))  # a late answer is no use
+            self._conn = redis_connection(**kwargs)
+            self._take = self._conn.register_script(_TAKE_SCRIPT)
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='RateLimit-redis')
+            self._warned_at = -math.inf
+
+        def take(self, key: str, rate: float, burst: float, cost: float = 1.) -> float:
+            try:
+                return float(self._take(keys=[f'{self.prefix}:{key}'], args=[rate, burst, cost]))  # type: ignore[arg-type]
+            except redis.exceptions.RedisError:
+                now = time.monotonic()
+                if now - self._warned_at >= self.WARNING_INTERVAL:
+                    self._warned_at = now
+                    LOGGER.warning('rate limit: redis unavailable, allowing requests', exc_info=True)
+                return 0.
+
+        async def take_async(self, key: str, rate: float, burst: float, cost: float = 1.) -> float:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.take, key, rate, burst, cost)
+
+        def close(self):
+            self._executor.shutdown(wait=False)
+            self._conn.close()
+
+
+def RateLimitSetup(config: dict) -> RateLimitStore:
+    """
+    Make a `RateLimitStore` from a config dict.
+
+    Args:
+        config (dict): `storage_type` ('memory' or 'redis'), and the store's args
+    """
+    config = dict(config)
+    st = StorageTypes(config.pop('storage_type', 'memory'))
+    if st == StorageTypes.REDIS:
+        if not redis_available:
+            raise RuntimeError('redis package not installed')
+        return RedisRateLimitStore(**config)
+    return MemoryRateLimitStore(**config)
+
+
+DEFAULT_RATE_LIMIT_STORE = MemoryRateLimitStore()
+
+
+KEYS = ('user', 'azp', 'ip')
+
+
+def _client_key(handler, key: Union[str, Callable]) -> str:
+    if callable(key):
+        name, ret = 'custom', key(handler)
+    elif key == 'user':
+        name, ret = key, handler.current_user
+    elif key == 'azp':
+        name, ret = key, handler.auth_data.get('azp') if handler.current_user else None
+    else:
+        name, ret = key, None
+    if not ret:
+        # unauthenticated requests are limited by ip
+        return f'ip:{handler.request.remote_ip}'
+    return f'{name}:{ret}'
+
+
+def rate_limit(rate: float, burst: Optional[float] = None, key: Union[str, Callable] = 'user', scope: Optional[str] = None):
+    """
+    Rate limit a handler method, per client, with a token bucket.
+
+    Put it after `@authenticated`, so the user is known. Over the limit,
+    raises a 429 with a `Retry-After`.
+
+    Uses the handler's `rate_limit_store` (see `RestHandlerSetup`), or a
+    process-wide memory store.
+
+    Args:
+        rate (float): requests per second
+        burst (float): max burst of requests (default: `rate`, min 1)
+        key (str|callable): 'user' (auth subject), 'azp' (token client), 'ip',
+            or a function of the handler; clients with no user are limited by ip
+        scope (str): bucket namespace; methods with the same scope share limits (default: the method)
+
+    Raises:
+        :py:class:`tornado.web.HTTPError`
+    """
+    if rate <= 0:
+        raise ValueError(f'rate must be positive: {rate}')
+    if not callable(key) and key not in KEYS:
+        raise ValueError(f'rate limit key must be one of {KEYS}, or a function: {key}')
+    if burst is None:
+        burst = max(1., rate)
+
+    def make_wrapper(method):
+        prefix = scope if scope else f'{method.__module__}.{method.__qualname__}'
+
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            store = getattr(self, 'rate_limit_store', None) or DEFAULT_RATE_LIMIT_STORE
+            wait = await store.take_async(f'{prefix}:{_client_key(self, key)}', rate, burst)
+            if wait > 0:
+                self._retry_after = max(1, math.ceil(wait))
+                raise tornado.web.HTTPError(429, reason="rate limit exceeded")
+            ret = method(self, *args, **kwargs)
+            if isawaitable(ret):
+                return await ret
+            return ret
+        return wrapper
+    return make_wrapper
@@ -4,12 +4,21 @@ Helpers for setting up `Tornado <http://tornado.readthedocs.io>`_ servers.
 
 # fmt:off
 
+import asyncio
 import binascii
 import logging
+import os
+import signal
 import socket
+import sys
+import threading
 
+import tornado.httpserver
+import tornado.netutil
 import tornado.web
 
+from .metrics import MetricsHandler
+
 LOGGER = logging.getLogger()  # this stuff always needs to be logged -> use the 'root' logger
 
 
@@ -25,11 +34,112 @@ def tornado_logger(handler):
     log_method("%d %s %.2fms", handler.get_status(), handler._request_summary(), request_time)
 
 
+def _exit_reason(status):
+    if os.WIFSIGNALED(status):
+        return f'killed by signal {os.WTERMSIG(status)}'
+    return f'exited with status {os.WEXITSTATUS(status)}'
+
+
+class _Workers:
+    """Worker processes forked from, and supervised by, this process."""
+    def __init__(self, max_restarts):
+        self.max_restarts = max_restarts
+        self.num_restarts = 0
+        self.children = {}  # pid: task id
+        self.stopping = False
+
+    def stop(self, signum=None, frame=None):
+        """Pass a SIGTERM on to the workers (a signal handler)."""
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def start(self, task_id):
+        """Fork a worker. Returns the task id in the worker, None in the parent."""
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            return task_id
+        self.children[pid] = task_id
+        return None
+
+    def _should_restart(self, task_id, pid, status):
+        if self.stopping:
+            return False
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+            LOGGER.info('worker %d (pid %d) exited', task_id, pid)
+            return False
+        self.num_restarts += 1
+        if self.num_restarts > self.max_restarts:
+            LOGGER.error('worker %d (pid %d) %s, too many restarts, stopping', task_id, pid, _exit_reason(status))
+            self.stop()
+            return False
+        LOGGER.warning('worker %d (pid %d) %s, restarting', task_id, pid, _exit_reason(status))
+        return True
+
+    def supervise(self):
+        """
+        Reap workers, restarting crashed ones, until they have all exited.
+
+        Returns the task id in a restarted worker, None in the parent.
+        """
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.children:
+                continue
+            task_id = self.children.pop(pid)
+            if self._should_restart(task_id, pid, status):
+                if self.start(task_id) is not None:
+                    return task_id
+        return None
+
+
+def fork_workers(num_processes, max_restarts=100):
+    """
+    Fork worker processes, and supervise them from this process.
+
+    Returns the task id (0 to `num_processes`-1) in each worker; in the
+    parent it never returns. Workers that crash (exit on a signal or
+    with a non-zero status) are restarted with the same task id, up to
+    `max_restarts` times in total. A SIGTERM or SIGINT to the parent is
+    passed on to the workers, and the parent exits once they have all
+    exited.
+
+    Like `tornado.process.fork_processes`, this must be called before
+    any event loop is made.
+
+    Args:
+        num_processes (int): number of workers
+        max_restarts (int): max number of crashed workers to restart
+    """
+    workers = _Workers(max_restarts)
+    signal.signal(signal.SIGTERM, workers.stop)
+    signal.signal(signal.SIGINT, workers.stop)
+    for i in range(num_processes):
+        task_id = workers.start(i)
+        if task_id is not None:
+            return task_id
+
+    task_id = workers.supervise()
+    if task_id is not None:
+        return task_id
+    sys.exit(1 if workers.num_restarts > max_restarts else 0)
+
+
 class RestServer:
     def __init__(self, log_function=None, cookie_secret=None, max_body_size=None, **kwargs):
         self.routes = []
         self.http_server = None
+        self.task_id = None
         self.max_body_size = None
+        self._prev_sigterm = None
         self.app_args = dict(kwargs)
 
         if log_function:
@@ -44,30 +154,99 @@ class RestServer:
     def add_route(self, *args):
         self.routes.append(tuple(args))
 
-    def startup(self, address='localhost', port=8080):
+    def add_metrics_route(self, metrics, path='/metrics'):
+        """Expose a `Metrics` (see `RestHandlerSetup`) for Prometheus."""
+        self.add_route(path, MetricsHandler, {'metrics': metrics})
+
+    def startup(self, address='localhost', port=8080, processes=1, reuse_port=False, worker_init=None, max_restarts=100,
+                family=None, unix_socket=None, unix_socket_mode=0o600):
         """
         Start up a Tornado server.
 
         Note that after calling this method you still need to call
         :code:`IOLoop.current().start()` to start the server.
 
+        To listen on IPv6, use an IPv6 address (ex: '::1'), or for both
+        IPv4 and IPv6 on all interfaces, `address=None` with
+        `family=socket.AF_UNSPEC`. With `unix_socket`, the server also
+        listens on that Unix domain socket path (or only there, with
+        `port=None`); clients can use an `http+unix://` address (see
+        `rest_tools.client.unix_socket_url`).
+
+        With `processes`, this forks that many workers (see `fork_workers`)
+        and only returns in the workers, each with its `task_id` set. The
+        workers share the listening socket, or with `reuse_port`, each
+        binds its own using SO_REUSEPORT, so the kernel spreads the
+        connections evenly. On SIGTERM, a worker (or the single process,
+        when not forking) stops accepting, closes its connections, and
+        stops the event loop; `worker_init` is also called without forking,
+        with task id 0.
+
+        Anything shared between workers (like a `SharedMemoryStatsBackend`)
+        must be made before calling this; per-worker things (database
+        clients, thread pools) should be made in `worker_init`.
+
         Args:
-            app (:py:class:`tornado.web.Application`): Tornado application
             address (str): bind address
-            port (int): bind port
+            port (int): bind port (None to not listen on TCP)
+            processes (int): number of worker processes; 0 or None for one per CPU (default: 1, do not fork)
+            reuse_port (bool): bind a TCP socket per worker, with SO_REUSEPORT
+            worker_init (callable): called in each worker with its task id, before it starts serving
+            max_restarts (int): max number of crashed workers to restart
+            family (socket.AddressFamily): address family (default: AF_INET, or AF_INET6 for an IPv6 address)
+            unix_socket (str): (optional) Unix domain socket path to listen on
+            unix_socket_mode (int): permissions of the Unix domain socket
         """
-        LOGGER.warning('tornado bound to %s:%d', address, port)
+        if family is None:
+            family = socket.AF_INET6 if address and ':' in address else socket.AF_INET
+        if port is not None:
+            LOGGER.warning('tornado bound to %s:%d', address, port)
+        if unix_socket:
+            LOGGER.warning('tornado bound to unix socket %s', unix_socket)
+
+        if not processes:
+            processes = os.cpu_count() or 1
+
+        sockets = []
+        if unix_socket:
+            sockets.append(tornado.netutil.bind_unix_socket(unix_socket, mode=unix_socket_mode))
+        if port is not None and (processes == 1 or not reuse_port):
+            sockets.extend(tornado.netutil.bind_sockets(port, address=address, family=family))
+        if processes > 1:
+            self.task_id = fork_workers(processes, max_restarts=max_restarts)
+            if port is not None and reuse_port:
+                sockets.extend(tornado.netutil.bind_sockets(port, address=address, family=family, reuse_port=True))
+        if threading.current_thread() is threading.main_thread() and self._prev_sigterm is None:
+            self._prev_sigterm = signal.signal(signal.SIGTERM, self._on_sigterm)
+        if worker_init:
+            worker_init(self.task_id or 0)
 
         app = tornado.web.Application(self.routes, **self.app_args)
 
         if self.http_server:
             self.http_server.stop()
         self.http_server = tornado.httpserver.HTTPServer(app, xheaders=True, max_body_size=self.max_body_size)
-        self.http_server.bind(port, address=address, family=socket.AF_INET)
-        self.http_server.start()
+        self.http_server.add_sockets(sockets)
+
+    def _on_sigterm(self, signum, frame):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            sys.exit(0)  # not serving yet
+
+        async def shutdown():
+            await self.stop()
+            loop.stop()
+
+        def start_shutdown():
+            self._shutdown_task = loop.create_task(shutdown())
+        loop.call_soon_threadsafe(start_shutdown)
 
     async def stop(self):
         if self.http_server:
             self.http_server.stop()
             await self.http_server.close_all_connections()
         self.http_server = None
+        if self._prev_sigterm is not None and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self._prev_sigterm)
+            self._prev_sigterm = None
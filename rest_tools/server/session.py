@@ -55,6 +55,30 @@ try:
 except ImportError:
     redis_available = False
 else:
+    def redis_connection(host='localhost', username=None, password=None, ssl=False, **kwargs) -> redis.Redis:
+        """
+        Connect to redis, retrying errors with exponential backoff.
+
+        Args:
+            host (str): redis host
+            username (str): redis username
+            password (str): redis password
+            ssl (bool): use ssl
+            **kwargs: extra `redis.Redis` args (ex: a different `retry`)
+        """
+        retry = kwargs.pop('retry', Retry(ExponentialBackoff(), 5))
+        conn = redis.Redis(
+            host=host,
+            username=username,
+            password=password,
+            ssl=ssl,
+            decode_responses=True,
+            retry=retry,
+            **kwargs,
+        )
+        conn.ping()
+        return conn
+
     class RedisSessionStorage(SessionStorage):
         """
         Redis-backed session storage.
@@ -62,18 +86,14 @@ else:
         Ideal for production, where multiple servers could be running at the same time.
         """
         def __init__(self, host='localhost', username=None, password=None, ssl=False):
-            retry = Retry(ExponentialBackoff(), 5)
-            self._conn = redis.Redis(
+            self._conn = redis_connection(
                 host=host,
                 username=username,
                 password=password,
                 ssl=ssl,
                 cache_config=CacheConfig(),
-                decode_responses=True,
                 protocol=3,
-                retry=retry,
             )
-            self._conn.ping()
             try:
                 self._conn.ft('idx:key').info()
             except redis.exceptions.ResponseError as e:
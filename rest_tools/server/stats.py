@@ -3,11 +3,14 @@
 
 # fmt:off
 
+import asyncio
+import bisect
 import logging
+import math
 import random
-import statistics
 import time
-from collections import deque
+from array import array
+from collections import OrderedDict
 
 LOGGER = logging.getLogger(__name__)
 
@@ -19,60 +22,259 @@ class RouteStats:
     Keeps track of the last N calls to a route,
     and presents stats on their performance.
 
+    Calls are kept in a packed ring buffer of (timestamp, call time)
+    pairs, oldest first, so expiring old calls only touches those calls.
+    Call times are also kept in a sorted index, updated on every
+    `append`, so quantiles never need a full sort.
+
+    With a `backend`, call times are also shared with other processes
+    or servers, and the overload signal comes from the merged stats
+    (see `rest_tools.server.stats_backend`), or from the local stats
+    while the merged stats are unavailable.
+
     Args:
         window_size (int): number of past calls to track
         window_time (int): number of seconds to keep track of past calls
         timeout (int): seconds before a request is considered "over time"
+        backend (RouteStatsBackend): (optional) cluster-wide stats
+        route (str): route name in the backend
     """
-    def __init__(self, window_size=1000, window_time=3600, timeout=30):
-        self.data = deque(maxlen=window_size)
-        self.times = deque(maxlen=window_size)
+    def __init__(self, window_size=1000, window_time=3600, timeout=30, backend=None, route=''):
+        if window_size < 1:
+            raise ValueError(f"window_size must be at least 1: {window_size}")
+        self._buf = array('d', bytes(16*window_size))  # [time0, call0, time1, call1, ...]
+        self._head = 0  # index of the oldest pair
+        self._count = 0
+        self._sorted = []  # call times, in sorted order
         self.window_size = window_size
         self.window_time = window_time
         self.timeout = timeout
+        self.backend = backend
+        self.route = route
 
     def __len__(self):
-        return len(self.data)
+        return self._count
+
+    @property
+    def data(self):
+        """Call times, oldest first."""
+        return [self._buf[2*((self._head+i) % self.window_size)+1] for i in range(self._count)]
+
+    @property
+    def times(self):
+        """Timestamps of the calls, oldest first."""
+        return [self._buf[2*((self._head+i) % self.window_size)] for i in range(self._count)]
+
+    def _popleft(self):
+        self._remove_sorted(self._buf[2*self._head+1])
+        self._head = (self._head + 1) % self.window_size
+        self._count -= 1
 
     def append(self, call_time):
-        self.data.append(call_time)
-        self.times.append(time.time())
+        if self._count == self.window_size:
+            self._popleft()
+        i = 2 * ((self._head + self._count) % self.window_size)
+        self._buf[i] = time.time()
+        self._buf[i+1] = call_time
+        self._count += 1
+        bisect.insort(self._sorted, self._buf[i+1])
+        if self.backend:
+            self.backend.append(self.route, call_time)
 
     def clear(self):
-        self.data.clear()
-        self.times.clear()
+        self._head = 0
+        self._count = 0
+        self._sorted.clear()
+
+    def _remove_sorted(self, call_time):
+        del self._sorted[bisect.bisect_left(self._sorted, call_time)]
+
+    def _quantile(self, i, n):
+        """The i-th n-quantile, like `statistics.quantiles(method='exclusive')`."""
+        data = self._sorted
+        ld = len(data)
+        m = ld + 1
+        j = i * m // n
+        j = 1 if j < 1 else ld-1 if j > ld-1 else j
+        delta = i*m - j*n
+        return (data[j-1] * (n-delta) + data[j] * delta) / n
+
+    def _median(self):
+        data = self._sorted
+        mid = len(data) // 2
+        if len(data) % 2:
+            return data[mid]
+        return (data[mid-1] + data[mid]) / 2
+
+    observes_delay = False  # does this policy use `observe_delay()`
+
+    def observe_delay(self, delay):
+        """Record how long a request waited before being handled (unused by this policy)."""
 
     def is_overloaded(self):
         # check window time
         window_cutoff = time.time()-self.window_time
-        i = 0
-        for i,t in enumerate(self.times):
-            if t >= window_cutoff:
-                break
-        if i > 0:
-            LOGGER.debug('routestats: removing %d entries due to age', i)
-            self.data = deque((self.data[j] for j in range(i,len(self.data))), maxlen=self.window_size)
-            self.times = deque((self.times[j] for j in range(i,len(self.times))), maxlen=self.window_size)
+        expired = 0
+        while self._count and self._buf[2*self._head] < window_cutoff:
+            self._popleft()
+            expired += 1
+        if expired:
+            LOGGER.debug('routestats: removing %d entries due to age', expired)
 
         # check if we have enough data to form stats
-        if len(self.data) < 4:
+        count, stats = self.quantiles()
+        if count < 4:
             return False
 
         # now check stats
         median = 0
-        try:
-            stats = statistics.quantiles(self.data)
-            LOGGER.debug('routestats: %r',stats)
-            if stats[1] >= self.timeout or stats[2] >= 2*self.timeout:
-                median = stats[1]
-        except AttributeError:
-            med = statistics.median(self.data)
-            LOGGER.debug('routestats: %r',med)
-            if med >= self.timeout:
-                median = med
+        LOGGER.debug('routestats: %r',stats)
+        if stats[1] >= self.timeout or stats[2] >= 2*self.timeout:
+            median = stats[1]
         return median > 0 and random.random()*median >= self.timeout
 
+    def quantiles(self):
+        """Get `(count, [q1, median, q3])`; the quartiles need 4+ calls."""
+        if self.backend:
+            ret = self.backend.quantiles(self.route)
+            if ret is not None:
+                return ret
+        if self._count < 4:
+            return self._count, []
+        return self._count, [self._quantile(i, 4) for i in (1, 2, 3)]
+
     def get_backoff_time(self):
-        if len(self.data) < 4:
+        if self.backend:
+            ret = self.backend.quantiles(self.route)
+            if ret is not None:
+                count, stats = ret
+                return int(stats[1]*2) if count >= 4 else 1
+        if self._count < 4:
             return 1
-        return int(statistics.median(self.data)*2)
+        return int(self._median()*2)
+
+
+class CoDelRouteStats(RouteStats):
+    """
+    Queue-delay load shedding, like CoDel.
+
+    Instead of waiting for call times to pass `timeout`, this watches
+    how long requests wait before they are handled: event loop lag (see
+    `EventLoopLag`) and any `concurrency` queue, but not the time the
+    client took to send the request. When no
+    request in a whole `interval` waited less than `target`, there is a
+    standing queue, and requests that waited longer than `target` are
+    shed until the queue drains. Short bursts are never shed.
+
+    Call times are still tracked, for `get_backoff_time()` and metrics.
+
+    Args:
+        target (float): acceptable standing queue delay, in seconds
+        interval (float): seconds a queue must stand before shedding
+        **kwargs: see `RouteStats`
+    """
+    observes_delay = True
+
+    def __init__(self, target=.05, interval=1., **kwargs):
+        super().__init__(**kwargs)
+        self.target = target
+        self.interval = interval
+        self._delay = 0.
+        self._interval_end = 0.
+        self._interval_min = math.inf
+        self._standing = False
+
+    def observe_delay(self, delay, now=None):
+        now = time.monotonic() if now is None else now
+        self._delay = delay
+        if delay < self._interval_min:
+            self._interval_min = delay
+        if now >= self._interval_end:
+            standing = self._interval_min > self.target
+            if standing != self._standing:
+                LOGGER.info('routestats: %s queue, min delay %.3fs', 'standing' if standing else 'drained', self._interval_min)
+            self._standing = standing
+            self._interval_min = math.inf
+            self._interval_end = now + self.interval
+
+    def is_overloaded(self):
+        return self._standing and self._delay > self.target
+
+
+class EventLoopLag:
+    """
+    How late the event loop runs, sampled with a timer every `interval` seconds.
+
+    Sampling starts on the running loop with the first `get()`.
+
+    Args:
+        interval (float): seconds between samples
+    """
+    def __init__(self, interval=.1):
+        self.interval = interval
+        self.lag = 0.
+        self._loop = None
+        self._handle = None
+        self._expected = 0.
+
+    def get(self):
+        """Get the last sampled lag, in seconds."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._handle:
+                self._handle.cancel()
+            self._loop = loop
+            self.lag = 0.
+            self._schedule()
+        return self.lag
+
+    def _schedule(self):
+        self._expected = self._loop.time() + self.interval
+        self._handle = self._loop.call_at(self._expected, self._sample)
+
+    def _sample(self):
+        self.lag = max(0., self._loop.time() - self._expected)
+        self._schedule()
+
+
+LOOP_LAG = EventLoopLag()
+
+
+POLICIES = {
+    'median': RouteStats,
+    'codel': CoDelRouteStats,
+}
+
+
+class RouteStatsMap(OrderedDict):
+    """
+    A `RouteStats` per route, made on first use.
+
+    Like a `defaultdict(RouteStats)`, but with an optional cap on the
+    number of routes; the least-recently-used route is evicted.
+
+    Args:
+        factory (callable): makes a new `RouteStats`
+        max_routes (int): max number of routes to track (default: no limit)
+        backend (RouteStatsBackend): (optional) cluster-wide stats
+    """
+    def __init__(self, factory=RouteStats, max_routes=None, backend=None):
+        super().__init__()
+        self.factory = factory
+        self.max_routes = max_routes
+        self.backend = backend
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __missing__(self, key):
+        if self.backend:
+            value = self[key] = self.factory(backend=self.backend, route=key)
+        else:
+            value = self[key] = self.factory()
+        if self.max_routes and len(self) > self.max_routes:
+            evicted, _ = self.popitem(last=False)
+            LOGGER.debug('routestats: evicting route %r', evicted)
+        return value
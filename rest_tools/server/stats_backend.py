@@ -0,0 +1,315 @@
+"""
+Cluster-wide route stats.
+
+By default, each process decides on its own if a route is overloaded.
+A `RouteStatsBackend` lets every worker contribute call times to, and
+read the overload signal from, one shared view:
+
+- `SharedMemoryStatsBackend`: for worker processes on one host (make it
+  in the parent process, before forking the workers).
+- `RedisStatsBackend`: for servers on many hosts.
+
+Call times are kept as histograms (quarter-octave buckets, so within
+~10% of the real value) in time slices, which merge by simple addition.
+The merged quartiles are cached for `refresh_interval` seconds, so the
+per-request cost is a dict lookup.
+
+Use by passing a backend in the `route_stats` config:
+
+    RestHandlerSetup({'route_stats': {'backend': RedisStatsBackend(host='redis')}})
+"""
+
+# fmt:off
+
+import bisect
+import logging
+import math
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+LOGGER = logging.getLogger(__name__)
+
+# upper bounds of the histogram buckets: 1ms to ~70 minutes, quarter-octave steps
+BUCKETS = [0.001 * 2**(i/4) for i in range(88)]
+
+
+def _bucket(call_time):
+    return min(bisect.bisect_left(BUCKETS, call_time), len(BUCKETS)-1)
+
+
+def _bucket_value(i):
+    """A bucket's representative value: the geometric mid-point."""
+    if i == 0:
+        return BUCKETS[0]
+    return math.sqrt(BUCKETS[i-1] * BUCKETS[i])
+
+
+def histogram_quantiles(counts):
+    """Get `(count, [q1, median, q3])` from histogram bucket counts."""
+    total = sum(counts)
+    if not total:
+        return 0, []
+    ret = []
+    targets = iter((total/4, total/2, 3*total/4))
+    target = next(targets)
+    cumulative = 0
+    for i,c in enumerate(counts):
+        cumulative += c
+        while target is not None and cumulative >= target:
+            ret.append(_bucket_value(i))
+            target = next(targets, None)
+        if target is None:
+            break
+    return total, ret
+
+
+class RouteStatsBackend:
+    """
+    Base class for a shared, time-windowed store of route call times.
+
+    Args:
+        window_time (int): number of seconds to keep track of past calls
+        slices (int): number of time slices in the window
+        refresh_interval (float): seconds to cache the merged stats for
+    """
+    def __init__(self, window_time=3600, slices=60, refresh_interval=1.):
+        self.window_time = window_time
+        self.slices = slices
+        self.slice_time = window_time / slices
+        self.refresh_interval = refresh_interval
+        self._cache = {}  # route: (expiration, (count, quartiles) or None)
+
+    def _slice(self, now):
+        return int(now // self.slice_time)
+
+    def append(self, route, call_time, now=None):
+        """Add a call time for a route."""
+        raise NotImplementedError()
+
+    def _histogram(self, route, now):
+        """Get the merged histogram bucket counts for a route, over the window."""
+        raise NotImplementedError()
+
+    def quantiles(self, route):
+        """
+        Get `(count, [q1, median, q3])` for a route, over the whole cluster.
+
+        Returns None if the cluster stats are unavailable.
+        """
+        now = time.time()
+        cached = self._cache.get(route)
+        if cached and cached[0] > now:
+            return cached[1]
+        try:
+            ret = histogram_quantiles(self._histogram(route, now))
+        except Exception:
+            LOGGER.warning('routestats: cannot read cluster stats', exc_info=True)
+            ret = None
+        self._cache[route] = (now + self.refresh_interval, ret)
+        return ret
+
+    def close(self):
+        pass
+
+
+class SharedMemoryStatsBackend(RouteStatsBackend):
+    """
+    Route stats shared by the processes forked from the one that made this.
+
+    Routes are hashed to one of `max_routes` slots; routes that collide
+    share stats.
+
+    Args:
+        max_routes (int): number of route slots
+        window_time (int): number of seconds to keep track of past calls
+        slices (int): number of time slices in the window
+        refresh_interval (float): seconds to cache the merged stats for
+    """
+    def __init__(self, max_routes=256, window_time=3600, slices=60, refresh_interval=1.):
+        super().__init__(window_time=window_time, slices=slices, refresh_interval=refresh_interval)
+        self.max_routes = max_routes
+        # per route slot and time slice: [slice number, bucket counts...]
+        self._row = 1 + len(BUCKETS)
+        self._mmap = mmap.mmap(-1, 8 * max_routes * slices * self._row)  # anonymous, so shared on fork
+        self._data = memoryview(self._mmap).cast('q')
+        self._lock = multiprocessing.Lock()
+
+    def _offset(self, route, slice_num):
+        slot = zlib.crc32(route.encode('utf-8')) % self.max_routes
+        return (slot * self.slices + slice_num % self.slices) * self._row
+
+    def append(self, route, call_time, now=None):
+        slice_num = self._slice(time.time() if now is None else now)
+        offset = self._offset(route, slice_num)
+        data = self._data
+        with self._lock:
+            if data[offset] > slice_num:
+                return  # too old, its slice was already reused
+            if data[offset] < slice_num:
+                # an old slice, so reuse it
+                data[offset:offset+self._row] = memoryview(bytes(8*self._row)).cast('q')
+                data[offset] = slice_num
+            data[offset+1+_bucket(call_time)] += 1
+
+    def _histogram(self, route, now):
+        current = self._slice(now)
+        counts = [0] * len(BUCKETS)
+        data = self._data
+        with self._lock:
+            for slice_num in range(current-self.slices+1, current+1):
+                offset = self._offset(route, slice_num)
+                if data[offset] == slice_num:
+                    for i,c in enumerate(data[offset+1:offset+self._row]):
+                        counts[i] += c
+        return counts
+
+    def close(self):
+        self._data.release()
+        self._mmap.close()
+
+
+try:
+    import redis
+except ImportError:
+    redis_available = False
+else:
+    redis_available = True
+
+
+class RedisStatsBackend(RouteStatsBackend):
+    """
+    Route stats shared by all servers using the same Redis.
+
+    Redis is only used from a background thread, never from the request
+    path: call times are buffered locally and sent every
+    `refresh_interval` seconds, and the merged stats of the routes that
+    were asked for are fetched then. Until the first fetch, and whenever
+    Redis cannot be reached, `quantiles()` returns None, so each
+    `RouteStats` uses its local stats.
+
+    The thread starts on first use, so the backend can be made before
+    forking workers; each worker then gets its own thread, and starts
+    with no buffered or fetched stats.
+
+    Args:
+        host (str): redis host
+        username (str): redis username
+        password (str): redis password
+        ssl (bool): use ssl
+        prefix (str): redis key prefix
+        window_time (int): number of seconds to keep track of past calls
+        slices (int): number of time slices in the window
+        refresh_interval (float): seconds between syncs with redis
+        timeout (float): redis connect and socket timeout, in seconds
+    """
+    def __init__(self, host='localhost', username=None, password=None, ssl=False, prefix='routestats',
+                 window_time=3600, slices=60, refresh_interval=1., timeout=1.):
+        if not redis_available:
+            raise RuntimeError('redis is not installed')
+        super().__init__(window_time=window_time, slices=slices, refresh_interval=refresh_interval)
+        self.prefix = prefix
+        self._conn = redis.Redis(host=host, username=username, password=password, ssl=ssl, decode_responses=True,
+                                 socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._conn.ping()
+        self._pending = defaultdict(lambda: defaultdict(int))  # (route, slice): {bucket: count}
+        self._pending_lock = threading.Lock()
+        self._routes = set()  # routes to fetch stats for
+        self._merged = {}  # route: (count, quartiles)
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        """Start the sync thread in this process, if not started yet."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        if self._pid is not None:
+            # forked: the parent's thread and locks are not ours, and its stats were already counted
+            self._thread_lock = threading.Lock()
+            self._pending_lock = threading.Lock()
+            self._pending = defaultdict(lambda: defaultdict(int))
+            self._merged = {}
+            self._stop = threading.Event()
+        with self._thread_lock:
+            if self._pid == pid:
+                return
+            self._thread = threading.Thread(target=self._run, name='routestats-redis', daemon=True)
+            self._thread.start()
+            self._pid = pid
+
+    def _key(self, route, slice_num):
+        return f'{self.prefix}:{route}:{slice_num}'
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval or .1):
+            self.refresh()
+
+    def append(self, route, call_time, now=None):
+        self._start()
+        now = time.time() if now is None else now
+        with self._pending_lock:
+            self._pending[(route, self._slice(now))][_bucket(call_time)] += 1
+
+    def quantiles(self, route):
+        """Get the last fetched `(count, [q1, median, q3])` for a route, or None if unavailable."""
+        self._start()
+        merged = self._merged.get(route)
+        if merged is None:
+            self._routes.add(route)
+            return None
+        return merged
+
+    def refresh(self):
+        """Send the buffered call times to redis, and fetch the merged stats."""
+        self.flush()
+        now = time.time()
+        for route in list(self._routes):
+            try:
+                count, stats = histogram_quantiles(self._histogram(route, now))
+            except Exception:
+                LOGGER.warning('routestats: cannot read cluster stats', exc_info=True)
+                self._merged.clear()
+                return
+            self._merged[route] = (count, stats)
+
+    def flush(self):
+        """Send the buffered call times to redis."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        if not pending:
+            return
+        try:
+            pipe = self._conn.pipeline(transaction=False)
+            for (route, slice_num), buckets in pending.items():
+                key = self._key(route, slice_num)
+                for b,c in buckets.items():
+                    pipe.hincrby(key, str(b), c)
+                pipe.expire(key, int(self.window_time + 2*self.slice_time))
+            pipe.execute()
+        except Exception:
+            LOGGER.warning('routestats: cannot send stats to redis', exc_info=True)
+
+    def _histogram(self, route, now):
+        current = self._slice(now)
+        pipe = self._conn.pipeline(transaction=False)
+        for slice_num in range(current-self.slices+1, current+1):
+            pipe.hgetall(self._key(route, slice_num))
+        counts = [0] * len(BUCKETS)
+        for buckets in pipe.execute():
+            for b,c in buckets.items():
+                counts[int(b)] += int(c)
+        return counts
+
+    def close(self):
+        self._stop.set()
+        if self._thread and self._pid == os.getpid():
+            self._thread.join()
+        self.flush()
+        self._conn.close()
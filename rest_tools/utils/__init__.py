@@ -1,7 +1,7 @@
 """Sub-package __init__."""
 
 from . import json_util
-from .auth import Auth, OpenIDAuth
+from .auth import Auth, DiscoveryCache, OpenIDAuth
 from .config import from_environment
 from .daemon import Daemon
 
@@ -9,6 +9,7 @@ __all__ = [
     "json_util",
     "Auth",
     "OpenIDAuth",
+    "DiscoveryCache",
     "Daemon",
     "from_environment",
 ]
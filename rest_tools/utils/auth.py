@@ -2,9 +2,19 @@
 
 # fmt:off
 
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import json
 import logging
+import os
+import tempfile
+import threading
 import time
-from typing import Any, Optional, Union
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
 
 import jwt
 import requests
@@ -12,13 +22,180 @@ import requests
 LOGGER = logging.getLogger(__name__)
 
 
+def _get_json(url: str) -> dict[str, Any]:
+    r = requests.get(url)
+    r.raise_for_status()
+    return r.json()
+
+
+class DiscoveryCache:
+    """A TTL cache of OpenID discovery & JWKS documents, with an optional file tier.
+
+    Shared by all `OpenIDAuth` instances (by default), so building many
+    clients or handlers for the same provider only fetches each document
+    once per `ttl`. With a `path`, documents are also saved to files, so
+    prefork workers and short-lived CLI tools can skip discovery entirely.
+
+    Args:
+        ttl (float): seconds a document is reused for
+        path (str): (optional) directory for the file tier
+    """
+
+    def __init__(self, ttl: float = 600., path: Optional[Union[str, Path]] = None):
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self._docs: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._url_locks: dict[str, threading.Lock] = {}
+
+    def _file(self, url: str) -> Path:
+        assert self.path
+        return self.path / (hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _fresh(self, fetched: float) -> bool:
+        return time.time() - fetched < self.ttl
+
+    @staticmethod
+    def _trusted(fd: int) -> bool:
+        """Only trust files that we own and that nobody else can write."""
+        st = os.fstat(fd)
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & 0o022
+
+    def _read_file(self, url: str) -> Optional[tuple[float, dict[str, Any]]]:
+        try:
+            with open(self._file(url)) as f:
+                if not self._trusted(f.fileno()):
+                    LOGGER.warning('ignoring untrusted cached OpenID document: %s', f.name)
+                    return None
+                data = json.load(f)
+            # a timestamp from the future must not keep a document fresh forever
+            return min(float(data['fetched']), time.time()), data['doc']
+        except FileNotFoundError:
+            return None
+        except Exception:
+            LOGGER.debug('cannot read cached OpenID document', exc_info=True)
+            return None
+
+    def _write_file(self, url: str, fetched: float, doc: dict[str, Any]) -> None:
+        assert self.path
+        try:
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # write then rename, so readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({'url': url, 'fetched': fetched, 'doc': doc}, f)
+                os.replace(tmp, self._file(url))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except Exception:
+            LOGGER.warning('cannot write cached OpenID document', exc_info=True)
+
+    def get(self, url: str, fetch: Callable[[str], dict[str, Any]] = _get_json, force: bool = False) -> dict[str, Any]:
+        """Get the json document at `url`, from the cache if fresh.
+
+        Concurrent misses for the same url share one fetch.
+
+        Args:
+            url (str): document url
+            fetch (callable): fetch the document
+            force (bool): skip the cache, and re-fetch (ex: for an unknown key id)
+        """
+        with self._lock:
+            cached = self._docs.get(url)
+            if not force and cached and self._fresh(cached[0]):
+                return cached[1]
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        with url_lock:
+            with self._lock:
+                now_cached = self._docs.get(url)
+            if now_cached and now_cached is not cached and self._fresh(now_cached[0]):
+                return now_cached[1]  # fetched by another caller while we waited
+            if not force and self.path:
+                from_file = self._read_file(url)
+                if from_file and self._fresh(from_file[0]):
+                    with self._lock:
+                        self._docs[url] = from_file
+                    return from_file[1]
+
+            doc = fetch(url)
+            fetched = time.time()
+            with self._lock:
+                self._docs[url] = (fetched, doc)
+            if self.path:
+                self._write_file(url, fetched, doc)
+            return doc
+
+    def clear(self) -> None:
+        """Drop all in-memory documents."""
+        with self._lock:
+            self._docs.clear()
+
+
+# set `REST_TOOLS_OPENID_CACHE_DIR` to share documents between processes
+DEFAULT_DISCOVERY_CACHE = DiscoveryCache(path=os.environ.get('REST_TOOLS_OPENID_CACHE_DIR') or None)
+
+
 class _AuthValidate:
-    def __init__(self, audience=None, issuers=None, algorithms=None, leeway=60):
+    def __init__(self, audience=None, issuers=None, algorithms=None, leeway=60, cache_size=1024):
         self.audience = audience
         self.issuers = issuers
         self.algorithms = algorithms if algorithms else ['RS256','RS512']
         self.leeway = leeway
 
+        # LRU of validated tokens: sha256(token) -> (cached until, claims)
+        self.cache_size = cache_size
+        self._validated: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._validated_lock = threading.Lock()
+
+    def clear_validated_cache(self):
+        """Forget all validated tokens (ex: on key rotation)."""
+        with self._validated_lock:
+            self._validated.clear()
+
+    @staticmethod
+    def _cache_key(token) -> bytes:
+        return hashlib.sha256(token if isinstance(token, bytes) else token.encode('utf-8')).digest()
+
+    def is_validated(self, token) -> bool:
+        """Check if a token's claims are cached, so it would validate without decoding."""
+        if not self.cache_size:
+            return False
+        with self._validated_lock:
+            cached = self._validated.get(self._cache_key(token))
+        return cached is not None and cached[0] > time.time()
+
+    def _validate_cached(self, token, validate: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Validate a token with `validate()`, or return its cached claims.
+
+        Claims are cached until the token's `exp` minus the leeway.
+        """
+        if not self.cache_size:
+            return validate()
+        key = self._cache_key(token)
+        now = time.time()
+        with self._validated_lock:
+            cached = self._validated.get(key)
+            if cached:
+                if cached[0] > now:
+                    self._validated.move_to_end(key)
+                    return dict(cached[1])
+                del self._validated[key]
+
+        data = validate()
+        until = float(data['exp']) - float(self.leeway)
+        if until > now:
+            with self._validated_lock:
+                self._validated[key] = (until, data)
+                self._validated.move_to_end(key)
+                while len(self._validated) > self.cache_size:
+                    self._validated.popitem(last=False)
+        return dict(data)
+
     def _validate(self, token, key, **kwargs):
         options = {}
 
@@ -111,6 +288,9 @@ class Auth(_AuthValidate):
         """
         Validate a token.
 
+        Without extra args, the claims of valid tokens are cached
+        (see `cache_size`).
+
         Args:
             token (str): a JWT token
             **kwargs: additional args passed directly to jwt.decode
@@ -121,20 +301,44 @@ class Auth(_AuthValidate):
         Raises:
             Exception on failure to validate.
         """
-        return self._validate(token, self.pub_secret, issuer=self.issuer, **kwargs)
+        if kwargs:
+            return self._validate(token, self.pub_secret, issuer=self.issuer, **kwargs)
+        return self._validate_cached(token, lambda: self._validate(token, self.pub_secret, issuer=self.issuer))
 
 
 class OpenIDAuth(_AuthValidate):
-    """Handle validation of JWT tokens using OpenID .well-known auto-discovery."""
+    """Handle validation of JWT tokens using OpenID .well-known auto-discovery.
+
+    Discovery & JWKS documents come from `discovery_cache` (default: a
+    process-wide `DiscoveryCache`; None to always fetch).
+
+    A token with an unknown key id triggers a JWKS refresh, in a background
+    thread. Refreshes are single-flight, and at most one starts every
+    `min_refresh_interval` seconds. A key id still missing after a refresh
+    is remembered for `missing_kid_ttl` seconds, so it never triggers I/O.
+    On an event loop, use `refresh_keys_async()` to wait for a refresh
+    without blocking; `validate()` there will not wait for it.
+    """
 
     def __init__(
         self,
         url: str,
         provider_info: Optional[dict[str, Union[str, list[str]]]] = None,
         public_keys: Optional[dict[str, Any]] = None,
+        discovery_cache: Optional[DiscoveryCache] = DEFAULT_DISCOVERY_CACHE,
+        min_refresh_interval: float = 30.,
+        missing_kid_ttl: float = 300.,
         **kwargs,
     ):
         super().__init__(**kwargs)
+        self.discovery_cache = discovery_cache
+        self.min_refresh_interval = min_refresh_interval
+        self.missing_kid_ttl = missing_kid_ttl
+        self._missing_kids: dict[str, float] = {}
+        self._last_refresh = float('-inf')
+        self._refresh_lock = threading.Lock()
+        self._refresh_future: Optional[concurrent.futures.Future] = None
+        self._refresh_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
         self.url = url if url.endswith('/') else url+'/'
         self.public_keys = public_keys if public_keys else {}
         self.provider_info: dict[str, Any] = provider_info if provider_info else {}
@@ -146,16 +350,27 @@ class OpenIDAuth(_AuthValidate):
             self._allow_refresh = True
             self._refresh_keys()
 
-    def _refresh_keys(self):
+    def _get_document(self, url: str, force: bool = False) -> dict[str, Any]:
+        if self.discovery_cache:
+            return self.discovery_cache.get(url, force=force)
+        return _get_json(url)
+
+    def _refresh_keys(self, force=False):
+        """Load the provider info & keys.
+
+        Args:
+            force (bool): re-fetch the keys, instead of using cached ones
+
+        Returns:
+            bool: True if the keys were fetched
+        """
         if not self._allow_refresh:
             LOGGER.warning('no refresh of keys is allowed')
-            return
+            return False
         try:
             if not self.provider_info:
                 # discovery
-                r = requests.get(self.url+'.well-known/openid-configuration')
-                r.raise_for_status()
-                self.provider_info = r.json()
+                self.provider_info = self._get_document(self.url+'.well-known/openid-configuration')
 
                 # get token url
                 self.token_url = self.provider_info['token_endpoint']
@@ -163,22 +378,69 @@ class OpenIDAuth(_AuthValidate):
             # get keys
             if self.provider_info['jwks_uri']:
                 LOGGER.debug('refreshing keys')
-                r = requests.get(self.provider_info['jwks_uri'])
-                r.raise_for_status()
-                LOGGER.debug('certs: %r', r.json())
+                certs = self._get_document(self.provider_info['jwks_uri'], force=force)
+                LOGGER.debug('certs: %r', certs)
                 self.public_keys = {
-                    k.key_id: k.key for k in jwt.PyJWKSet.from_dict(r.json()).keys
+                    k.key_id: k.key for k in jwt.PyJWKSet.from_dict(certs).keys
                 }
                 LOGGER.debug('keys: %r', self.public_keys)
+                self.clear_validated_cache()  # keys may have been revoked
+                return True
             else:
                 LOGGER.debug('not refreshing keys because provider_info incomplete')
         except Exception:
             LOGGER.warning('failed to refresh OpenID keys', exc_info=True)
+        return False
+
+    def _refresh_for(self, kid: str) -> Optional[concurrent.futures.Future]:
+        """Start a background refresh for an unknown key id, or join the one in flight.
+
+        Returns None if a refresh is not allowed now.
+        """
+        with self._refresh_lock:
+            if self._refresh_future and not self._refresh_future.done():
+                return self._refresh_future
+            now = time.time()
+            if not self._allow_refresh or self._missing_kids.get(kid, 0.) > now:
+                return None
+            if now - self._last_refresh < self.min_refresh_interval:
+                LOGGER.debug('not refreshing keys for %r, refreshed recently', kid)
+                return None
+            self._last_refresh = now
+            if not self._refresh_executor:
+                self._refresh_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix='OpenIDAuth-keys',
+                )
+            self._refresh_future = self._refresh_executor.submit(self._refresh_keys, True)
+            return self._refresh_future
+
+    def _check_missing(self, kid: str, future: concurrent.futures.Future) -> None:
+        """Remember a key id that is not in the freshly fetched keys."""
+        if future.result() and kid not in self.public_keys:
+            with self._refresh_lock:
+                self._missing_kids[kid] = time.time() + self.missing_kid_ttl
+                # drop expired entries, so garbage key ids cannot grow this forever
+                if len(self._missing_kids) > 1000:
+                    now = time.time()
+                    self._missing_kids = {k: v for k, v in self._missing_kids.items() if v > now}
+
+    async def refresh_keys_async(self, kid: str) -> None:
+        """Make sure the keys are fresh for `kid`, without blocking the event loop."""
+        if kid in self.public_keys:
+            return
+        future = self._refresh_for(kid)
+        if future:
+            await asyncio.wrap_future(future)
+            self._check_missing(kid, future)
 
     def validate(self, token, **kwargs):
         """
         Validate a token.
 
+        Without extra args, the claims of valid tokens are cached
+        (see `cache_size`), until the keys are refreshed.
+
         Args:
             token (str): a JWT token
             audience (str): audience, or None to disable audience verification
@@ -189,11 +451,26 @@ class OpenIDAuth(_AuthValidate):
         Raises:
             Exception on failure to validate.
         """
+        if kwargs:
+            return self._validate_token(token, **kwargs)
+        return self._validate_cached(token, lambda: self._validate_token(token))
+
+    def _validate_token(self, token, **kwargs):
         header = jwt.get_unverified_header(token)
-        if header['kid'] not in self.public_keys:
-            self._refresh_keys()
-        if header['kid'] in self.public_keys:
-            key = self.public_keys[header['kid']]
+        kid = header['kid']
+        if kid not in self.public_keys:
+            future = self._refresh_for(kid)
+            if future:
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    future.result()  # not on an event loop, so ok to block
+                    self._check_missing(kid, future)
+                else:
+                    LOGGER.debug('refreshing keys in the background for %r', kid)
+                    future.add_done_callback(functools.partial(self._check_missing, kid))
+        if kid in self.public_keys:
+            key = self.public_keys[kid]
             return self._validate(token, key, **kwargs)
         else:
-            raise Exception(f'JWT key {header["kid"]} not found')
+            raise Exception(f'JWT key {kid} not found')
@@ -0,0 +1,17 @@
+"""Common test fixtures."""
+
+from typing import Iterator
+
+import pytest
+from rest_tools.client.pool import close_shared_pools
+from rest_tools.client.token_cache import DEFAULT_TOKEN_CACHE
+from rest_tools.utils.auth import DEFAULT_DISCOVERY_CACHE
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches() -> Iterator[None]:
+    """Keep the process-wide caches from leaking between tests' mocks."""
+    yield
+    DEFAULT_DISCOVERY_CACHE.clear()
+    DEFAULT_TOKEN_CACHE.clear()
+    close_shared_pools()
@@ -2,13 +2,17 @@
 
 import re
 from typing import AsyncIterator, Callable
+from unittest.mock import Mock, patch
 
 import openapi_core
 import pytest
 import pytest_asyncio
 import requests
+import tornado.web
 from jsonschema_path import SchemaPath
+from tornado import httputil
 
+from rest_tools import openapi_tools
 from rest_tools.client import RestClient
 from rest_tools.server import RestHandler, RestServer, validate_request
 
@@ -357,3 +361,167 @@ async def test_010__invalid(server: Callable[[], RestClient]) -> None:
     # NOTE: not testing the compound cases, since that's exponentially more tests for
     #    little work. By now, we can safely assume that those cases are good since their
     #    components are *independent* (url params and args handling logics are independent)
+
+
+async def test_020__compiled(server: Callable[[], RestClient]) -> None:
+    """Test that valid requests skip openapi-core's request validation."""
+    rc = server()
+
+    with patch.object(
+        OPENAPI_SPEC, "validate_request", wraps=OPENAPI_SPEC.validate_request
+    ) as spy:
+        await rc.request("POST", "/foo/no-args")
+        await rc.request("GET", "/foo/params/123/hank")
+        await rc.request("GET", "/foo/params/456/tilly")
+        await rc.request("GET", "/foo/args", {"rank": 123})
+        await rc.request("POST", "/foo/args", {"rank": 456})
+        assert spy.call_count == 0
+
+        # invalid requests get openapi-core's errors
+        with pytest.raises(requests.HTTPError, match=re.escape("Query parameter error: rank")):
+            await rc.request("GET", "/foo/args", {"rank": "abc"})
+        assert spy.call_count == 1
+
+
+COMPILED_SPEC = openapi_core.OpenAPI(
+    SchemaPath.from_dict(
+        {
+            "openapi": "3.1.0",
+            "info": {"title": "Compiled API", "version": "1.0.0"},
+            "servers": [{"url": "/api"}],
+            "paths": {
+                "/items/{id}": {
+                    "parameters": [
+                        {
+                            "name": "id",
+                            "in": "path",
+                            "required": True,
+                            "schema": {"type": "integer", "minimum": 1},
+                        },
+                    ],
+                    "get": {
+                        "parameters": [
+                            {
+                                "name": "q",
+                                "in": "query",
+                                "required": True,
+                                "schema": {"type": "string", "minLength": 2},
+                            },
+                            {
+                                "name": "limit",
+                                "in": "query",
+                                "schema": {"type": "integer", "default": 10},
+                            },
+                        ],
+                    },
+                },
+                "/items/special": {"get": {}},
+                "/things": {
+                    "post": {
+                        "requestBody": {
+                            "required": True,
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {"n": {"type": "integer"}},
+                                        "required": ["n"],
+                                    }
+                                }
+                            },
+                        },
+                    },
+                },
+                "/things/{id}": {
+                    "put": {
+                        "parameters": [
+                            {
+                                "name": "id",
+                                "in": "path",
+                                "required": True,
+                                "schema": {"type": "integer"},
+                            },
+                        ],
+                        "requestBody": {
+                            "content": {
+                                "application/json": {"schema": {"type": "object"}},
+                                "text/plain": {"schema": {"type": "string"}},
+                            },
+                        },
+                    },
+                },
+                "/secret": {
+                    "get": {"security": [{"token": []}]},
+                },
+            },
+            "components": {
+                "securitySchemes": {
+                    "token": {"type": "http", "scheme": "bearer"},
+                },
+            },
+        }
+    )
+)
+
+JSON = {"Content-Type": "application/json"}
+
+
+@pytest.mark.parametrize(
+    "method,uri,headers,body,compiled",
+    [
+        # path & query params
+        ("GET", "/api/items/5?q=ab", {}, b"", True),
+        ("GET", "/api/items/6?q=ab&limit=3", {}, b"", True),
+        ("GET", "/api/items/0?q=ab", {}, b"", False),
+        ("GET", "/api/items/x?q=ab", {}, b"", False),
+        ("GET", "/api/items/5", {}, b"", False),
+        ("GET", "/api/items/5?q=", {}, b"", False),
+        ("GET", "/api/items/5?q=a", {}, b"", False),
+        ("GET", "/api/items/5?q=ab&limit=x", {}, b"", False),
+        ("GET", "/api/items/5%31?q=ab", {}, b"", False),
+        # literal path, overlapping the template
+        ("GET", "/api/items/special", {}, b"", True),
+        # wrong server
+        ("GET", "/items/5?q=ab", {}, b"", False),
+        ("GET", "/api/nope", {}, b"", False),
+        # security is left to openapi-core
+        ("GET", "/api/secret", {"Authorization": "Bearer abc"}, b"", False),
+        # json bodies
+        ("POST", "/api/things", JSON, b'{"n": 1}', True),
+        ("POST", "/api/things", {"Content-Type": "application/json; charset=utf-8"}, b'{"n": 1}', True),
+        ("POST", "/api/things", {"Content-Type": "application/json; charset"}, b'{"n": 1}', False),
+        ("POST", "/api/things", JSON, b'{"n": "x"}', False),
+        ("POST", "/api/things", JSON, b"[1]", False),
+        ("POST", "/api/things", JSON, b"{", False),
+        ("POST", "/api/things", JSON, b"", False),
+        ("POST", "/api/things", {}, b'{"n": 1}', False),
+        ("PUT", "/api/things/3", {}, b"", True),
+        ("PUT", "/api/things/3", JSON, b"{}", True),
+        ("PUT", "/api/things/3", {"Content-Type": "text/plain"}, b"hello", False),
+    ],
+)
+def test_030__compiled_matches_openapi_core(
+    method: str, uri: str, headers: dict[str, str], body: bytes, compiled: bool
+) -> None:
+    """Test that compiled validation only passes requests that openapi-core passes."""
+    for _ in range(2):  # second time, from the compiled routes
+        request = httputil.HTTPServerRequest(
+            method=method,
+            uri=uri,
+            headers=httputil.HTTPHeaders({"Host": "localhost", **headers}),
+            body=body,
+            connection=Mock(context=Mock(protocol="http", remote_ip="127.0.0.1")),
+        )
+        handler = RestHandler(tornado.web.Application(), request)
+
+        try:
+            COMPILED_SPEC.validate_request(
+                openapi_tools._http_server_request_to_openapi_request(request)
+            )
+        except Exception:
+            valid = False
+        else:
+            valid = True
+
+        assert openapi_tools._is_valid_request(COMPILED_SPEC, handler) == compiled
+        assert valid or not compiled
@@ -6,20 +6,24 @@ import json
 import logging
 import re
 import signal
+import threading
+import time
 from contextlib import contextmanager
 from typing import Any, Iterable, Iterator
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
+import jwt
 import pytest
 import urllib3
 from httpretty import HTTPretty, httprettified  # type: ignore[import]
 from requests import PreparedRequest
-from requests.exceptions import SSLError, Timeout
+from requests.exceptions import HTTPError, SSLError, Timeout
 from rest_tools.client import (
     MAX_RETRIES,
     CalcRetryFromBackoffMax,
     CalcRetryFromWaittimeMax,
     RestClient,
+    get_shared_pool,
 )
 from rest_tools.utils.json_util import json_decode, json_encode
 
@@ -242,6 +246,30 @@ async def test_102_request_seq(requests_mock: Mock) -> None:
         rpc.request_seq("POST", "test", {})
 
 
+def test_103_request_seq_session_reuse(requests_mock: Mock) -> None:
+    """Test `request_seq()` reuses one sync session per thread."""
+    rpc = RestClient("http://test", "passkey", timeout=0.1)
+    async_session = rpc.session
+    requests_mock.get("/test", content=b'{"a": 1}')
+
+    assert rpc.request_seq("GET", "test") == {"a": 1}
+    session = rpc._sync_session()
+    assert rpc.request_seq("GET", "test") == {"a": 1}
+    assert rpc._sync_session() is session
+    assert rpc.session is async_session  # never swapped
+
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(rpc._sync_session())) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(s) for s in sessions + [session]}) == 4
+
+    rpc.close()
+    assert rpc._sync_session() is not session
+
+
 @contextmanager
 def _in_time(time, message):  # type: ignore[no-untyped-def]
     # Based on https://github.com/gabrielfalcao/HTTPretty/blob/master/tests/functional/test_requests.py#L290."""
@@ -423,3 +451,170 @@ def test_202_request_stream() -> None:
                 for i, resp in enumerate(response_stream):
                     print(f"resp={resp}")
                     assert resp == json_stream[i]
+
+
+@pytest.mark.asyncio
+async def test_300_request_many(requests_mock: Mock) -> None:
+    """Test `request_many()` streams results & collects errors."""
+    rpc = RestClient("http://test", "passkey", timeout=0.1, retries=0)
+    for i in range(10):
+        requests_mock.get(f"/item/{i}", content=json_encode({"i": i}).encode("utf-8"))
+    requests_mock.get("/item/bad", status_code=404)
+
+    reqs = [("GET", f"/item/{i}") for i in range(10)]
+    reqs.insert(5, ("GET", "/item/bad", {}))
+    results = [r async for r in rpc.request_many(reqs, concurrency=3)]
+
+    assert sorted(r.index for r in results) == list(range(11))
+    bad = [r for r in results if not r.ok]
+    assert len(bad) == 1
+    assert bad[0].index == 5 and bad[0].path == "/item/bad"
+    assert isinstance(bad[0].error, HTTPError)
+    assert {r.result["i"] for r in results if r.ok} == set(range(10))
+
+    with pytest.raises(ValueError):
+        _ = [r async for r in rpc.request_many(reqs, concurrency=0)]
+
+
+def test_301_request_many_seq(requests_mock: Mock) -> None:
+    """Test `request_many_seq()` streams results & collects errors."""
+    rpc = RestClient("http://test", "passkey", timeout=0.1, retries=0)
+    for i in range(10):
+        requests_mock.get(f"/item/{i}", content=json_encode({"i": i}).encode("utf-8"))
+
+    reqs = iter([("GET", f"/item/{i}") for i in range(10)])
+    results = list(rpc.request_many_seq(reqs, concurrency=4))
+
+    assert sorted(r.index for r in results) == list(range(10))
+    assert {r.result["i"] for r in results if r.ok} == set(range(10))
+
+    with pytest.raises(ValueError):
+        list(rpc.request_many_seq([("GET",)]))  # type: ignore[list-item]
+
+
+def test_302_request_many_seq_nested() -> None:
+    """Test that `request_many_seq()` without a pool is not capped by, nor deadlocks on, a shared executor."""
+    rpc = RestClient("http://test", "passkey", timeout=1, retries=0)
+    barrier = threading.Barrier(20, timeout=5)
+
+    def request_seq(method: str, path: str, *args: Any) -> Any:
+        _, kind, i = path.split("/")
+        if kind == "item":
+            return {"i": int(i)}
+        barrier.wait()  # all 20 run at once, each making a nested call
+        return [r.result for r in rpc.request_many_seq([("GET", f"/item/{i}")] * 2, concurrency=2)]
+
+    with patch.object(rpc, "request_seq", side_effect=request_seq):
+        results = list(rpc.request_many_seq([("GET", f"/outer/{i}") for i in range(20)], concurrency=20))
+    assert all(r.ok for r in results), [r.error for r in results]
+    assert sorted(r.result[0]["i"] for r in results) == list(range(20))
+
+
+def test_303_request_many_seq_pool(requests_mock: Mock, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that `request_many_seq()` reuses a client's pool, and its threads' sessions."""
+    pool = get_shared_pool("http://test", pool_maxsize=4)
+    rpc = RestClient("http://test", "passkey", timeout=0.1, retries=0, pool=pool)
+    for i in range(10):
+        requests_mock.get(f"/item/{i}", content=json_encode({"i": i}).encode("utf-8"))
+
+    for _ in range(5):
+        results = list(rpc.request_many_seq([("GET", f"/item/{i}") for i in range(10)], concurrency=4))
+        assert {r.result["i"] for r in results} == set(range(10))
+    assert pool.stats().completed == 50
+    assert len(rpc._sync_sessions) <= pool.max_workers
+    assert "capped" not in caplog.text
+
+    # the pool's max_workers caps the concurrency
+    list(rpc.request_many_seq([("GET", "/item/0")], concurrency=8))
+    assert "capped by the pool's max_workers=4" in caplog.text
+
+
+def test_400_token_exp_cached(requests_mock: Mock) -> None:
+    """Test that the token's expiration is decoded once per token."""
+    tokens = []
+
+    def token_func() -> str:
+        tokens.append(jwt.encode({"exp": time.time() + 60}, "secret" * 8, algorithm="HS256"))
+        return tokens[-1]
+
+    requests_mock.get("/test", content=b"{}")
+    rpc = RestClient("http://test", token_func, timeout=0.1, retries=0)
+    with patch("rest_tools.client.token_cache.jwt.decode", wraps=jwt.decode) as decode:
+        for _ in range(5):
+            rpc.request_seq("GET", "/test")
+        assert len(tokens) == 1
+        assert decode.call_count == 1
+        assert requests_mock.last_request.headers["Authorization"] == f"Bearer {tokens[0]}"
+
+        # within the delay offset, so it is refreshed
+        rpc._token_expire_delay_offset = 120
+        rpc.request_seq("GET", "/test")
+        assert len(tokens) == 2
+        assert decode.call_count == 2
+        assert requests_mock.last_request.headers["Authorization"] == f"Bearer {tokens[1]}"
+
+
+def test_401_token_opaque(requests_mock: Mock) -> None:
+    """Test that an undecodable token is re-acquired for every request."""
+    token_func = Mock(return_value="opaque")
+    requests_mock.get("/test", content=b"{}")
+    rpc = RestClient("http://test", token_func, timeout=0.1, retries=0)
+    rpc.request_seq("GET", "/test")
+    rpc.request_seq("GET", "/test")
+    assert token_func.call_count == 2
+    assert requests_mock.last_request.headers["Authorization"] == "Bearer opaque"
+
+
+def test_402_token_single_flight(requests_mock: Mock) -> None:
+    """Test that concurrent callers share one token request."""
+    calls = []
+
+    def token_func() -> str:
+        calls.append(1)
+        time.sleep(.1)
+        return jwt.encode({"exp": time.time() + 60}, "secret" * 8, algorithm="HS256")
+
+    requests_mock.get("/test", content=b"{}")
+    rpc = RestClient("http://test", token_func, timeout=0.1, retries=0)
+    threads = [threading.Thread(target=rpc.request_seq, args=("GET", "/test")) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert requests_mock.call_count == 8
+
+
+@pytest.mark.asyncio
+async def test_403_token_background_refresh(requests_mock: Mock) -> None:
+    """Test that a token is renewed in the background, before it expires."""
+    tokens = []
+    refreshing = threading.Event()
+
+    def token_func() -> str:
+        if tokens:
+            refreshing.wait()
+        tokens.append(jwt.encode({"exp": time.time() + 60}, "secret" * 8, algorithm="HS256"))
+        return tokens[-1]
+
+    requests_mock.get("/test", content=b"{}")
+    rpc = RestClient("http://test", token_func, timeout=0.1, retries=0, token_refresh_fraction=0.5)
+    await rpc.request("GET", "/test")
+    assert len(tokens) == 1
+
+    # refresh is due: the request does not wait for it
+    rpc._token_refresh_at = time.time()
+    await rpc.request("GET", "/test")
+    assert requests_mock.last_request.headers["Authorization"] == f"Bearer {tokens[0]}"
+    assert rpc._token_future and not rpc._token_future.done()
+
+    refreshing.set()
+    rpc._token_future.result()
+    await rpc.request("GET", "/test")
+    assert len(tokens) == 2
+    assert requests_mock.last_request.headers["Authorization"] == f"Bearer {tokens[1]}"
+    assert rpc._token_refresh_at == pytest.approx(time.time() + 30, abs=1)
+    rpc.close()
+
+    with pytest.raises(ValueError):
+        RestClient("http://test", token_func, token_refresh_fraction=1.5)
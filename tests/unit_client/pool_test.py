@@ -0,0 +1,82 @@
+"""Test the shared connection pool registry."""
+
+# fmt:quotes-ok
+
+import asyncio
+import time
+from typing import Iterator
+from unittest.mock import Mock
+
+import pytest
+from requests import PreparedRequest
+from rest_tools.client import RestClient, get_shared_pool, shared_pool_stats
+from rest_tools.client.pool import _SharedPoolAdapter, close_shared_pools
+
+
+@pytest.fixture(autouse=True)
+def clean_pools() -> Iterator[None]:
+    yield
+    close_shared_pools()
+
+
+def test_000_registry() -> None:
+    """Test that pools are shared by host."""
+    pool = get_shared_pool('http://test/api', pool_maxsize=4)
+    assert pool.key == 'http://test'
+    assert pool.max_workers == 4
+    assert get_shared_pool('http://test/other', pool_maxsize=20) is pool
+    assert get_shared_pool('https://test') is not pool
+    assert set(shared_pool_stats()) == {'http://test', 'https://test'}
+
+
+def test_001_clients_share() -> None:
+    """Test that clients share the executor & connections."""
+    pool = get_shared_pool('http://test')
+    rc1 = RestClient('http://test/api', pool=pool)
+    rc2 = RestClient('http://test/api', 'passkey', retries=1, pool=pool)
+
+    assert rc1.session.executor is rc2.session.executor is pool.executor  # type: ignore[attr-defined]
+    a1 = rc1.session.get_adapter('http://test')
+    a2 = rc2.session.get_adapter('http://test')
+    assert isinstance(a1, _SharedPoolAdapter) and isinstance(a2, _SharedPoolAdapter)
+    assert a1.poolmanager is a2.poolmanager is pool.poolmanager
+    assert a1.max_retries.total != a2.max_retries.total  # retries are per-client
+    assert rc2._sync_session().get_adapter('http://test').poolmanager is pool.poolmanager  # type: ignore[attr-defined]
+
+    rc1.close()  # closing a client does not close the pool
+    assert not pool.executor._shutdown
+    assert rc2.session.get_adapter('http://test').poolmanager is pool.poolmanager  # type: ignore[attr-defined]
+
+
+def test_002_bad_transport() -> None:
+    """Test that the tornado transport does not take a pool."""
+    with pytest.raises(ValueError):
+        RestClient('http://test', transport='tornado', pool=get_shared_pool('http://test'))
+
+
+async def test_010_stats(requests_mock: Mock) -> None:
+    """Test queueing stats when the executor is saturated."""
+    def response(req: PreparedRequest, ctx: object) -> bytes:  # pylint: disable=W0613
+        time.sleep(.1)
+        return b'{}'
+
+    requests_mock.get('/test', content=response)
+    pool = get_shared_pool('http://test', pool_maxsize=2)
+    rc1 = RestClient('http://test', pool=pool)
+    rc2 = RestClient('http://test', pool=pool)
+
+    reqs = [rc.request('GET', '/test') for rc in (rc1, rc2) for _ in range(3)]
+    tasks = [asyncio.create_task(r) for r in reqs]
+    await asyncio.sleep(.05)
+    stats = pool.stats()
+    assert stats.in_flight == 2
+    assert stats.queued == 4
+    assert stats.saturation == 1.0
+
+    await asyncio.gather(*tasks)
+    stats = pool.stats()
+    assert stats.in_flight == 0
+    assert stats.queued == 0
+    assert stats.max_queued == 4
+    assert stats.completed == 6
+    assert stats.total_queue_time > 0
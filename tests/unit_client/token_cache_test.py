@@ -0,0 +1,168 @@
+"""Test the shared token cache."""
+
+# fmt:quotes-ok
+
+import os
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Any
+from unittest.mock import Mock, patch
+
+import jwt
+import pytest
+import requests
+from requests import PreparedRequest
+from rest_tools.client import ClientCredentialsAuth, TokenCache
+from rest_tools.utils.json_util import json_encode
+
+
+def _token(ttl: float = 300) -> str:
+    return jwt.encode({'exp': time.time() + ttl}, 'secret' * 8, algorithm='HS256')
+
+
+def test_000_get() -> None:
+    """Test that a token is minted once, then reused."""
+    cache = TokenCache()
+    key = cache.make_key('http://test', 'client', 'scope', 'secret')
+    assert 'secret' not in key
+    mint = Mock(side_effect=lambda: _token())
+    t1 = cache.get(key, mint)
+    assert cache.get(key, mint) == t1
+    assert mint.call_count == 1
+
+    other = cache.make_key('http://test', 'client', 'scope', 'other-secret')
+    assert cache.get(other, mint) != t1
+    assert mint.call_count == 2
+
+
+def test_001_expiring() -> None:
+    """Test that a nearly-expired or opaque token is not reused."""
+    cache = TokenCache(min_ttl=30)
+    key = cache.make_key('http://test', 'client', 'scope')
+    mint = Mock(side_effect=lambda: _token(10))
+    cache.get(key, mint)
+    cache.get(key, mint)
+    assert mint.call_count == 2
+
+    mint = Mock(return_value='opaque')
+    assert cache.get(key, mint) == 'opaque'
+    cache.get(key, mint)
+    assert mint.call_count == 2
+
+
+def test_002_single_flight() -> None:
+    """Test that concurrent misses share one mint."""
+    cache = TokenCache()
+    key = cache.make_key('http://test', 'client', 'scope')
+
+    def mint() -> str:
+        time.sleep(.1)
+        return _token()
+
+    mock = Mock(side_effect=mint)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(key, mock))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert mock.call_count == 1
+    assert len(set(results)) == 1
+
+
+def test_010_file(tmp_path: Path) -> None:
+    """Test that the file tier shares tokens between caches (processes)."""
+    key = TokenCache.make_key('http://test', 'client', 'scope', 'secret')
+    mint = Mock(side_effect=lambda: _token())
+    t1 = TokenCache(path=tmp_path / 'tokens').get(key, mint)
+    assert len(list((tmp_path / 'tokens').iterdir())) == 1
+    assert TokenCache(path=tmp_path / 'tokens').get(key, mint) == t1
+    assert mint.call_count == 1
+
+    cache = TokenCache(path=tmp_path / 'tokens')
+    cache.invalidate(key)
+    assert cache.get(key, mint) != t1
+    assert mint.call_count == 2
+
+
+def test_011_file_trust(tmp_path: Path) -> None:
+    """Test that token files and directories others could write are not used."""
+    key = TokenCache.make_key('http://test', 'client', 'scope', 'secret')
+    mint = Mock(side_effect=lambda: _token())
+    path = tmp_path / 'tokens'
+    t1 = TokenCache(path=path).get(key, mint)
+    assert path.stat().st_mode & 0o777 == 0o700
+    filename = TokenCache(path=path)._file(key)
+
+    # files that others can write are ignored
+    filename.chmod(0o666)
+    t2 = TokenCache(path=path).get(key, mint)
+    assert t2 != t1
+    assert TokenCache(path=path).get(key, mint) == t2  # rewritten privately
+    assert mint.call_count == 2
+
+    # a directory that others can access is not read or written
+    path.chmod(0o755)
+    assert TokenCache(path=path).get(key, mint) != t2
+    assert mint.call_count == 3
+    path.chmod(0o700)
+    assert TokenCache(path=path).get(key, mint) == t2  # not overwritten
+
+    # so is a directory owned by someone else
+    with patch('rest_tools.client.token_cache.os.getuid', return_value=os.getuid() + 1):
+        assert TokenCache(path=path).get(key, mint) != t2
+    assert mint.call_count == 4
+
+
+def test_100_client_credentials(requests_mock: Mock) -> None:
+    """Test that clients with the same credentials share a token."""
+    requests_mock.get('http://test/.well-known/openid-configuration', content=json_encode({
+        'token_endpoint': 'http://test/token',
+        'jwks_uri': '',
+    }).encode('utf-8'))
+
+    def token_response(req: PreparedRequest, ctx: Any) -> bytes:  # pylint: disable=W0613
+        body = urllib.parse.parse_qs(str(req.body))
+        assert body['grant_type'][0] == 'client_credentials'
+        return json_encode({'access_token': _token()}).encode('utf-8')
+    token_mock = requests_mock.post('http://test/token', content=token_response)
+    api_mock = requests_mock.get('http://test-api/foo', content=b'{}')
+
+    cache = TokenCache()
+    rcs = [ClientCredentialsAuth('http://test-api', 'http://test', 'client', 'secret', token_cache=cache) for _ in range(3)]
+    for rc in rcs:
+        rc.request_seq('GET', '/foo')
+    assert token_mock.call_count == 1
+    assert len({r.headers['Authorization'] for r in api_mock.request_history}) == 1
+
+    rc = ClientCredentialsAuth('http://test-api', 'http://test', 'client', 'secret')
+    assert rc.token_cache is None  # opt-in
+    rc.request_seq('GET', '/foo')
+    assert token_mock.call_count == 2
+
+
+def test_110_client_credentials_rejected(requests_mock: Mock) -> None:
+    """Test that a token rejected by the server is dropped from the cache."""
+    requests_mock.get('http://test/.well-known/openid-configuration', content=json_encode({
+        'token_endpoint': 'http://test/token',
+        'jwks_uri': '',
+    }).encode('utf-8'))
+    token_mock = requests_mock.post('http://test/token', content=lambda req, ctx: json_encode({'access_token': _token()}).encode('utf-8'))
+    api_mock = requests_mock.get('http://test-api/foo', [{'status_code': 401}, {'content': b'{}'}])
+
+    cache = TokenCache()
+    rc = ClientCredentialsAuth('http://test-api', 'http://test', 'client', 'secret', token_cache=cache)
+    with pytest.raises(requests.exceptions.HTTPError):
+        rc.request_seq('GET', '/foo')
+    assert token_mock.call_count == 1
+
+    # the next request, and other clients, get a new token
+    rc.request_seq('GET', '/foo')
+    assert token_mock.call_count == 2
+    auths = [r.headers['Authorization'] for r in api_mock.request_history]
+    assert auths[0] != auths[1]
+    other = ClientCredentialsAuth('http://test-api', 'http://test', 'client', 'secret', token_cache=cache)
+    other.request_seq('GET', '/foo')
+    assert token_mock.call_count == 2
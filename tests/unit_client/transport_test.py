@@ -0,0 +1,144 @@
+"""Test the RestClient transports."""
+
+# fmt:quotes-ok
+
+import asyncio
+import io
+import socket
+from typing import Any, AsyncIterator
+
+import pytest
+import requests
+import tornado.httpserver
+import tornado.testing
+import tornado.web
+from rest_tools.client import RestClient
+from rest_tools.client.transport import TornadoTransport
+from rest_tools.utils.json_util import json_decode, json_encode
+
+
+class _Handler(tornado.web.RequestHandler):
+    calls: dict[str, int] = {}
+
+    def _count(self) -> int:
+        key = self.request.method + self.request.path  # type: ignore[operator]
+        self.calls[key] = self.calls.get(key, 0) + 1
+        return self.calls[key]
+
+    async def get(self, what: str) -> None:
+        n = self._count()
+        if what == 'flaky' and n < 3:
+            self.set_status(503)
+            return
+        if what == 'missing':
+            self.set_status(404)
+            return
+        if what == 'down':
+            self.set_status(502)
+            return
+        if what == 'slow':
+            await asyncio.sleep(.5)
+        self.write(json_encode({
+            'args': {k: self.get_argument(k) for k in self.request.arguments},
+            'auth': self.request.headers.get('Authorization', ''),
+            'calls': n,
+        }))
+
+    async def post(self, what: str) -> None:
+        self._count()
+        self.write(json_decode(self.request.body))
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[str]:
+    _Handler.calls = {}
+    sock, port = tornado.testing.bind_unused_port()
+    http_server = tornado.httpserver.HTTPServer(tornado.web.Application([(r'/(\w+)', _Handler)]))
+    http_server.add_sockets([sock])
+    yield f'http://localhost:{port}'
+    http_server.stop()
+    await http_server.close_all_connections()
+
+
+def _client(address: str, **kwargs: Any) -> RestClient:
+    kwargs.setdefault('timeout', 1)
+    kwargs.setdefault('backoff_factor', 0.01)
+    return RestClient(address, 'passkey', transport='tornado', **kwargs)
+
+
+def test_000_bad_transport() -> None:
+    """Test an unknown transport name."""
+    with pytest.raises(ValueError):
+        RestClient('http://test', transport='foo')
+
+
+async def test_010_request(server: str) -> None:
+    """Test GET & POST with the tornado transport."""
+    rc = _client(server)
+    ret = await rc.request('GET', '/ok', {'foo': 'bar'})
+    assert ret['args'] == {'foo': 'bar'}
+    assert ret['auth'] == 'Bearer passkey'
+
+    ret = await rc.request('POST', 'ok', {'a': [1, 2, 3]})
+    assert ret == {'a': [1, 2, 3]}
+    rc.close()
+
+
+async def test_011_request_concurrent(server: str) -> None:
+    """Test many concurrent requests, more than the thread-pool size."""
+    rc = _client(server)
+    rets = await asyncio.gather(*[rc.request('POST', '/ok', {'i': i}) for i in range(50)])
+    assert [r['i'] for r in rets] == list(range(50))
+    rc.close()
+
+
+async def test_020_retry_status(server: str) -> None:
+    """Test that retry-able status codes are retried."""
+    rc = _client(server, retries=3)
+    ret = await rc.request('GET', '/flaky')
+    assert ret['calls'] == 3
+
+    rc = _client(server, retries=2)
+    with pytest.raises(requests.exceptions.RetryError):
+        await rc.request('GET', '/down')
+    assert _Handler.calls['GET/down'] == 3
+
+
+async def test_021_http_error(server: str) -> None:
+    """Test that a non-retry-able status raises `requests.HTTPError`."""
+    rc = _client(server, retries=3)
+    with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+        await rc.request('GET', '/missing')
+    assert exc_info.value.response.status_code == 404
+    assert _Handler.calls['GET/missing'] == 1
+
+
+async def test_022_timeout(server: str) -> None:
+    """Test that a timeout is retried, then raised."""
+    rc = _client(server, retries=1, timeout=0.1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        await rc.request('GET', '/slow')
+    assert _Handler.calls['GET/slow'] == 2
+
+
+async def test_023_connection_error() -> None:
+    """Test that a refused connection raises `requests.ConnectionError`."""
+    sock = socket.socket()
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    rc = _client(f'http://localhost:{port}', retries=1)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        await rc.request('GET', '/ok')
+
+
+async def test_030_streaming_body(server: str) -> None:
+    """Test that file and iterable bodies are read for the tornado transport."""
+    transport = TornadoTransport(requests.Session(), retries=0, backoff_factor=0)
+    resp = await transport.request('POST', f'{server}/ok', data=iter([b'{"a": ', '[1, 2]}']))
+    assert resp.json() == {'a': [1, 2]}
+
+    resp = await transport.request('POST', f'{server}/ok', data=io.BytesIO(b'{"b": 3}'))
+    assert resp.json() == {'b': 3}
+    transport.close()
@@ -0,0 +1,178 @@
+"""Test server.admission."""
+
+# fmt:off
+# pylint: skip-file
+
+import asyncio
+import json
+
+import pytest
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
+
+# local imports
+from rest_tools.server import RestHandler, RestHandlerSetup, RestServer
+from rest_tools.server.admission import ConcurrencyLimiter, ConcurrencyLimits
+
+
+async def test_limiter_fifo():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=2)
+    assert await limiter.acquire()
+    order = []
+
+    async def waiter(i):
+        assert await limiter.acquire()
+        order.append(i)
+
+    tasks = [asyncio.create_task(waiter(i)) for i in range(2)]
+    await asyncio.sleep(0)
+    assert limiter.queued == 2
+
+    # queue is full
+    assert not await limiter.acquire()
+
+    limiter.release()
+    await asyncio.sleep(0)
+    assert order == [0]
+    assert limiter.in_flight == 1
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == [0, 1]
+    limiter.release()
+    assert limiter.in_flight == 0 and limiter.queued == 0
+
+
+async def test_limiter_queue_timeout():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=.05)
+    assert await limiter.acquire()
+    assert not await limiter.acquire()
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_limiter_cancel():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5)
+    assert await limiter.acquire()
+    task = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_limiter_retry_after():
+    limiter = ConcurrencyLimiter(max_in_flight=2, max_queue=10)
+    assert limiter.retry_after() == 1
+    for _ in range(100):
+        limiter.in_flight += 1
+        limiter.release(4.)
+    assert limiter.service_time == pytest.approx(4., rel=1e-3)
+    assert limiter.retry_after() == 2
+    limiter._waiters.extend([None] * 4)
+    assert limiter.retry_after() == 10
+
+
+def test_limits():
+    limits = ConcurrencyLimits(routes={'Slow': {'max_in_flight': 2}})
+    assert limits['Fast'] is None
+    assert limits['Slow'].max_in_flight == 2
+    assert limits['Slow'] is limits['Slow']
+
+    limits = ConcurrencyLimits(max_in_flight=10, max_queue=5, queue_timeout=1, routes={'Slow': {'max_in_flight': 1}})
+    assert limits['Fast'].max_in_flight == 10
+    assert limits['Slow'].max_in_flight == 1
+    assert limits['Slow'].max_queue == 5
+
+    with pytest.raises(ValueError):
+        ConcurrencyLimiter(max_in_flight=0)
+
+    ret = RestHandlerSetup({'concurrency': {'max_in_flight': 3}})
+    assert ret['concurrency']['Foo'].max_in_flight == 3
+    assert RestHandlerSetup({})['concurrency'] is None
+
+
+async def test_handler_admission():
+    sock, port = bind_unused_port()
+    sock.close()
+    release = asyncio.Event()
+
+    prepared = []
+
+    class Slow(RestHandler):
+        def prepare(self):
+            prepared.append(self.request.path)
+            super().prepare()
+
+        async def get(self):
+            await release.wait()
+            self.write({'queue_time': self.queue_time})
+
+    class Fast(RestHandler):
+        def get(self):
+            self.write({})
+
+    slow = Slow().get_route_stats_key()
+    config = RestHandlerSetup({'concurrency': {'routes': {slow: {'max_in_flight': 1, 'max_queue': 1}}}})
+    rs = RestServer()
+    rs.add_route('/slow', Slow, config)
+    rs.add_route('/fast', Fast, config)
+    rs.startup(address='localhost', port=port)
+    client = AsyncHTTPClient(force_instance=True)
+
+    async def get(path):
+        return await client.fetch(f'http://localhost:{port}{path}', raise_error=False)
+
+    try:
+        first = asyncio.create_task(get('/slow'))
+        second = asyncio.create_task(get('/slow'))
+        await asyncio.sleep(.2)
+
+        # queue is full: fast rejection
+        ret = await get('/slow')
+        assert ret.code == 503
+        assert ret.headers['Retry-After'] == '1'
+        assert json.loads(ret.body) == {'code': 503, 'error': 'server overloaded'}
+        assert len(prepared) == 1  # rejected before `prepare()`
+
+        # other routes are not limited
+        assert (await get('/fast')).code == 200
+
+        release.set()
+        assert json.loads((await first).body)['queue_time'] < .1
+        assert json.loads((await second).body)['queue_time'] > .1
+        assert config['concurrency'][slow].in_flight == 0
+    finally:
+        client.close()
+        await rs.stop()
+
+
+async def test_handler_codel_slow_upload():
+    sock, port = bind_unused_port()
+    sock.close()
+
+    class Upload(RestHandler):
+        def post(self):
+            self.write({'size': len(self.request.body)})
+
+    config = RestHandlerSetup({'route_stats': {'policy': 'codel', 'target': .05, 'interval': .1}})
+    rs = RestServer()
+    rs.add_route('/upload', Upload, config)
+    rs.startup(address='localhost', port=port)
+    try:
+        # a slow client is not a queue in the server
+        reader, writer = await asyncio.open_connection('localhost', port)
+        writer.write(b'POST /upload HTTP/1.1\r\nHost: localhost\r\nContent-Length: 4\r\n\r\nab')
+        await writer.drain()
+        await asyncio.sleep(.3)
+        writer.write(b'cd')
+        await writer.drain()
+        status = await reader.readline()
+        assert status.split()[1] == b'200'
+        writer.close()
+        await writer.wait_closed()
+    finally:
+        await rs.stop()
@@ -731,3 +731,98 @@ def test_236__argparse_custom_validation__validator_no_param__error(
         arghand.parse_args()
 
     assert str(e.value) == "HTTP 400: argument foo: invalid type"
+
+
+@pytest.mark.parametrize(
+    "argument_source",
+    [QUERY_ARGUMENTS, JSON_BODY_ARGUMENTS],
+)
+def test_300__per_class_handler(argument_source: str) -> None:
+    """Test one `ArgumentHandler` reused for many requests."""
+    source = (
+        ArgumentSource.QUERY_ARGUMENTS
+        if argument_source == QUERY_ARGUMENTS
+        else ArgumentSource.JSON_BODY_ARGUMENTS
+    )
+    arghand = ArgumentHandler(source)
+    arghand.add_argument("foo", type=int)
+    arghand.add_argument("bar", default="abc")
+
+    for i in range(3):
+        rest_handler = setup_argument_handler(argument_source, {"foo": str(i)}).rest_handler
+        outargs = arghand.parse_args(rest_handler)
+        assert outargs.foo == i
+        assert outargs.bar == "abc"
+
+    rest_handler = setup_argument_handler(argument_source, {"foo": "x"}).rest_handler
+    with pytest.raises(tornado.web.HTTPError) as e:
+        arghand.parse_args(rest_handler)
+    assert str(e.value) == "HTTP 400: argument foo: invalid type"
+
+    with pytest.raises(ValueError):
+        arghand.parse_args()
+
+
+@pytest.mark.parametrize(
+    "argument_source",
+    [QUERY_ARGUMENTS, JSON_BODY_ARGUMENTS],
+)
+def test_310__argparse_fallback(argument_source: str) -> None:
+    """Test argument options that are left to argparse."""
+    arghand = setup_argument_handler(argument_source, {"foo": "1", "bar": "2"})
+    arghand.add_argument("bar", type=int)
+    arghand.add_argument("foo", action="append")
+    assert arghand._argparser is not None
+    outargs = arghand.parse_args()
+    assert outargs.foo == ["1"]
+    assert outargs.bar == 2
+
+
+@pytest.mark.parametrize(
+    "specs,args",
+    [
+        # nargs
+        ([("foo", {"nargs": 2})], [("foo", "1")]),
+        ([("foo", {"nargs": 2, "type": int})], [("foo", "1"), ("foo", "2")]),
+        ([("foo", {"nargs": 2})], [("foo", "1"), ("foo", "2"), ("foo", "3")]),
+        ([("foo", {"nargs": "+"})], [("foo", "1"), ("foo", "2")]),
+        ([("foo", {"nargs": "?"})], [("foo", "1")]),
+        ([("foo", {"nargs": 1})], [("foo", "1")]),
+        # extra values
+        ([("foo", {})], [("foo", "1"), ("foo", "2")]),
+        ([("foo", {})], [("foo", "1"), ("foo", "2"), ("bar", "3")]),
+        # abbreviations
+        ([("foobar", {})], [("foo", "1")]),
+        ([("foobar", {}), ("foo", {})], [("foo", "1"), ("foob", "2")]),
+        # defaults
+        ([("foo", {"default": "5", "type": int})], []),
+        ([("foo", {"default": "x", "type": int})], []),
+        ([("foo", {"default": 5, "type": str})], []),
+        ([("foo", {"default": "5", "type": int, "dest": "bar"})], [("bar", "1")]),
+        ([("my-arg", {"default": "a"})], [("my-arg", "b")]),
+        ([("foo", {"required": True, "default": "a"})], []),
+        # choices
+        ([("foo", {"choices": [1, 2], "type": int})], [("foo", "2")]),
+        ([("foo", {"choices": [1, 2], "type": int, "nargs": "*"})], [("foo", "2"), ("foo", "3")]),
+        # error order
+        ([("foo", {"type": int}), ("bar", {})], [("foo", "x"), ("baz", "1")]),
+        ([("foo", {}), ("bar", {})], [("foo", "1"), ("baz", "1")]),
+        ([("foo", {"default": "x", "type": int}), ("bar", {})], []),
+    ],
+)
+def test_320__compiled_matches_argparse(specs: list, args: list) -> None:
+    """Test that compiled arguments act like argparse."""
+
+    def parse(use_argparse: bool) -> Any:
+        arghand = setup_argument_handler(QUERY_ARGUMENTS, args)
+        if use_argparse:
+            arghand._argparser = argparse.ArgumentParser(exit_on_error=False)
+        for name, kwargs in specs:
+            arghand.add_argument(name, **kwargs)
+        assert (arghand._argparser is not None) == use_argparse
+        try:
+            return arghand.parse_args()
+        except tornado.web.HTTPError as e:
+            return str(e)
+
+    assert parse(False) == parse(True)
@@ -1,9 +1,12 @@
+import time
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+import requests.exceptions
 from tornado.web import HTTPError
 
 from rest_tools.server import decorators
+from rest_tools.server.policy import AuthDecisionCache
 
 
 async def test_authenticated():
@@ -75,6 +78,33 @@ async def test_role_authorization():
     mock.assert_called_with(self, 1, a='b')
 
 
+async def test_role_authorization_errors():
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_data = {'sub': 'sub', 'role': 'write'}
+
+    async def error(self):
+        raise Exception('blah')
+    f = decorators.role_authorization(roles=['write'])(error)
+    assert f.__wrapped__ is error  #: one wrapper layer
+    await f(self)
+    self.send_error.assert_called_with(500, reason='Error in MagicMock')
+
+    async def backend_error(self):
+        raise requests.exceptions.HTTPError(response=MagicMock(status_code=403))
+    f = decorators.role_authorization(roles=['write'])(backend_error)
+    await f(self)
+    self.send_error.assert_called_with(403, reason='Error authenticating user')
+
+    async def http_error(self):
+        raise HTTPError(400, reason='foo')
+    f = decorators.role_authorization(roles=['write'])(http_error)
+    self.send_error.reset_mock()
+    with pytest.raises(HTTPError, match='foo'):
+        await f(self)
+    self.send_error.assert_not_called()
+
+
 async def test_scope_role_auth():
     mock = AsyncMock()
     f = decorators.scope_role_auth(roles=['write'], prefix='test')(mock)
@@ -190,3 +220,111 @@ async def test_token_attribute_role_mapping_auth_groups():
     await f(self, 1, a='b')
     mock.assert_called_with(self, 1, a='b')
     assert self.auth_groups == ['bar', 'foo']  #: in sorted order
+
+
+async def test_role_authorization_cache():
+    cache = AuthDecisionCache()
+    mock = AsyncMock()
+    f = decorators.role_authorization(roles=['write'], cache=cache)(mock)
+
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_key = 'token'
+    self.auth_data = {'sub': 'sub', 'role': 'write', 'exp': time.time() + 60}
+    await f(self)
+    mock.assert_awaited()
+    assert len(cache) == 1
+
+    # the cached grant is used for the same token
+    self.auth_data = dict(self.auth_data, role='read')
+    await f(self)
+    assert mock.await_count == 2
+
+    # a different token is decided on its own
+    self.auth_key = 'other'
+    with pytest.raises(HTTPError, match='authorization failed'):
+        await f(self)
+    assert len(cache) == 2
+
+    # and its denial is cached too
+    self.auth_data = dict(self.auth_data, role='write')
+    with pytest.raises(HTTPError, match='authorization failed'):
+        await f(self)
+    assert mock.await_count == 2
+
+
+async def test_role_authorization_cache_no_exp():
+    cache = AuthDecisionCache()
+    mock = AsyncMock()
+    f = decorators.role_authorization(roles=['write'], cache=cache)(mock)
+
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_key = 'token'
+    self.auth_data = {'sub': 'sub', 'role': 'write'}
+    await f(self)
+    mock.assert_awaited()
+    assert len(cache) == 0
+
+
+async def test_scope_role_auth_cache():
+    cache = AuthDecisionCache()
+    mock = AsyncMock()
+    f = decorators.scope_role_auth(roles=['write'], prefix='test', cache=cache)(mock)
+    g = decorators.scope_role_auth(roles=['write'], prefix='other', cache=cache)(mock)
+
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_key = 'token'
+    self.auth_data = {'sub': 'sub', 'scope': 'test:write', 'exp': time.time() + 60}
+    await f(self)
+    mock.assert_awaited()
+
+    # a different policy on the same cache does not share decisions
+    with pytest.raises(HTTPError, match='authorization failed'):
+        await g(self)
+    assert len(cache) == 2
+
+
+async def test_keycloak_role_auth_cache():
+    cache = AuthDecisionCache()
+    mock = AsyncMock()
+    f = decorators.keycloak_role_auth(roles=['write'], cache=cache)(mock)
+
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_key = 'token'
+    self.auth_data = {'sub': 'sub', 'realm_access': {'roles': ['read']}, 'exp': time.time() + 60}
+    with pytest.raises(HTTPError, match='authorization failed'):
+        await f(self)
+    mock.assert_not_awaited()
+    assert len(cache) == 1
+
+
+async def test_token_attribute_role_mapping_auth_cache():
+    cache = AuthDecisionCache()
+    mock = AsyncMock()
+    d = decorators.token_attribute_role_mapping_auth(
+        role_attrs={r'\1': ['my.roles=(write)', 'my.roles=(read)']},
+        group_attrs={r'\1': [r'groups=(\w+)']},
+        cache=cache,
+    )
+    f = d(roles=['write'])(mock)
+
+    self = MagicMock()
+    self.current_user = 'sub'
+    self.auth_key = 'token'
+    self.auth_data = {'sub': 'sub', 'my': {'roles': ['write']}, 'groups': ['foo', 'bar'], 'exp': time.time() + 60}
+    await f(self)
+    assert self.auth_roles == ['write']
+    assert self.auth_groups == ['bar', 'foo']
+
+    # a new request for the same token gets the cached roles and groups
+    self2 = MagicMock()
+    self2.current_user = 'sub'
+    self2.auth_key = 'token'
+    self2.auth_data = {'sub': 'sub', 'exp': time.time() + 60}
+    await f(self2)
+    assert self2.auth_roles == ['write']
+    assert self2.auth_groups == ['bar', 'foo']
+    assert mock.await_count == 2
@@ -0,0 +1,82 @@
+"""Test server.metrics."""
+
+# fmt:off
+# pylint: skip-file
+
+import tornado.httpclient
+import tornado.testing
+
+from rest_tools.server import RestHandler, RestHandlerSetup, RestServer, authenticated, metrics
+from rest_tools.utils.auth import Auth
+
+
+class FruitHandler(RestHandler):
+    async def get(self, name):
+        self.write({'name': name, 'padding': 'x' * 2000})
+
+
+class SecretHandler(RestHandler):
+    @authenticated
+    async def get(self):
+        self.write({})
+
+
+def test_metrics_render():
+    m = metrics.Metrics()
+    m.start('Fruit')
+    m.start('Fruit')
+    m.finish('Fruit', 200, .03, 500)
+    m.shed('Fruit')
+    m.auth_failure('Fruit')
+    text = m.render()
+    assert 'rest_requests_total{route="Fruit",code="200"} 1\n' in text
+    assert 'rest_request_duration_seconds_bucket{route="Fruit",le="0.025"} 0\n' in text
+    assert 'rest_request_duration_seconds_bucket{route="Fruit",le="0.05"} 1\n' in text
+    assert 'rest_request_duration_seconds_bucket{route="Fruit",le="+Inf"} 1\n' in text
+    assert 'rest_request_duration_seconds_count{route="Fruit"} 1\n' in text
+    assert 'rest_response_size_bytes_bucket{route="Fruit",le="1000"} 1\n' in text
+    assert 'rest_response_size_bytes_sum{route="Fruit"} 500\n' in text
+    assert 'rest_requests_in_flight{route="Fruit"} 1\n' in text
+    assert 'rest_requests_shed_total{route="Fruit"} 1\n' in text
+    assert 'rest_auth_failures_total{route="Fruit"} 1\n' in text
+
+
+async def test_metrics_handler():
+    auth = Auth('secret' * 20)
+    config = RestHandlerSetup({'metrics': True, 'auth': {'secret': 'secret' * 20}})
+    sock, port = tornado.testing.bind_unused_port()
+    server = RestServer()
+    server.add_route(r'/fruits/(\w+)', FruitHandler, config)
+    server.add_route('/secret', SecretHandler, config)
+    server.add_metrics_route(config['metrics'])
+    app = tornado.web.Application(server.routes)
+    http_server = tornado.httpserver.HTTPServer(app)
+    http_server.add_sockets([sock])
+
+    client = tornado.httpclient.AsyncHTTPClient()
+    try:
+        for name in ('apple', 'banana', 'cherry'):
+            await client.fetch(f'http://localhost:{port}/fruits/{name}')
+        ret = await client.fetch(f'http://localhost:{port}/secret', raise_error=False, headers={'Authorization': 'Bearer bad'})
+        assert ret.code == 403
+        ret = await client.fetch(f'http://localhost:{port}/secret', headers={'Authorization': 'Bearer ' + auth.create_token('sub')})
+        assert ret.code == 200
+
+        ret = await client.fetch(f'http://localhost:{port}/metrics')
+        assert ret.headers['Content-Type'].startswith('text/plain')
+        text = ret.body.decode('utf-8')
+    finally:
+        http_server.stop()
+        await http_server.close_all_connections()
+
+    fruit = FruitHandler().get_route_stats_key()
+    secret = SecretHandler().get_route_stats_key()
+    assert 'rest_requests_total{route="%s",code="200"} 3\n' % fruit in text
+    assert 'rest_requests_total{route="%s",code="403"} 1\n' % secret in text
+    assert 'rest_requests_total{route="%s",code="200"} 1\n' % secret in text
+    assert 'rest_response_size_bytes_bucket{route="%s",le="1000"} 0\n' % fruit in text
+    assert 'rest_response_size_bytes_bucket{route="%s",le="10000"} 3\n' % fruit in text
+    assert 'rest_requests_in_flight{route="%s"} 0\n' % fruit in text
+    assert 'rest_auth_failures_total{route="%s"} 1\n' % secret in text
+    assert 'rest_route_stats_seconds_count{route="%s"} 3\n' % fruit in text
+    assert fruit.endswith('metrics_test.FruitHandler')
@@ -0,0 +1,160 @@
+"""Test server.policy."""
+
+# fmt:off
+# pylint: skip-file
+
+import random
+import re
+
+import pytest
+
+# local imports
+from rest_tools.server.policy import AttributeRolePolicy, AttrExpression, AuthDecisionCache
+
+
+def _reference_eval(token, e):
+    """The original, uncompiled expression evaluation."""
+    name, val = e.split('=',1)
+    if name == 'scope':
+        token_val = token.get('scope','').split()
+    else:
+        prefix = name.split('.')[:-1]
+        while prefix:
+            token = token.get(prefix[0], {})
+            prefix = prefix[1:]
+        token_val = token.get(name.split('.')[-1], None)
+    if token_val is None:
+        return []
+    prog = re.compile(val)
+    if isinstance(token_val, list):
+        ret = (prog.fullmatch(v) for v in token_val)
+    else:
+        ret = [prog.fullmatch(token_val)]
+    return [r for r in ret if r]
+
+
+def _reference_roles(role_attrs, token, roles):
+    authorized = set()
+    for name in role_attrs:
+        for expression in role_attrs[name]:
+            if re.fullmatch(r'\w+', name):
+                if name in roles and _reference_eval(token, expression):
+                    authorized.add(name)
+            else:
+                rolenames = [m.expand(name) for m in _reference_eval(token, expression)]
+                authorized.update(role for role in roles if role in rolenames)
+    return authorized
+
+
+def test_attr_expression():
+    e = AttrExpression('my.attr=foo(.*)')
+    assert (e.attr, e.path, e.key) == ('my.attr', ['my'], 'attr')
+    values = {}
+    token = {'my': {'attr': ['foobar', 'baz']}}
+    assert [m.group(1) for m in e.matches(token, values)] == ['bar']
+    assert values == {'my.attr': ['foobar', 'baz']}
+    assert e.matches({}, {}) == []
+
+    e = AttrExpression('scope=a:(.*)')
+    assert [m.group(1) for m in e.matches({'scope': 'a:b c a:d'}, {})] == ['b', 'd']
+
+    with pytest.raises(ValueError):
+        AttrExpression('groups')
+    with pytest.raises(ValueError):
+        AttrExpression('groups=(')
+
+
+def test_policy_roles():
+    policy = AttributeRolePolicy({
+        'write': ['groups=admins', 'my.roles=write'],
+        'read': ['groups=.*'],
+        'data-read': ['scope=data:read'],
+        r'\1': ['my.roles=(x.*)'],
+    }, {
+        r'\1': [r'groups=service-(\w+)'],
+    })
+    token = {'groups': ['service-foo', 'bar'], 'my': {'roles': ['xa', 'xb', 'write']}, 'scope': 'data:read'}
+    assert policy.match_roles(token, ['write', 'read']) == {'write', 'read'}
+    assert policy.match_roles(token, ['data-read', 'xb', 'xc']) == {'data-read', 'xb'}
+    assert policy.match_roles({}, ['write']) == set()
+    assert policy.match_groups(token) == {'foo'}
+
+
+def test_policy_only_requested_roles(mocker):
+    policy = AttributeRolePolicy({'read': ['groups=.*'], 'write': ['roles=write']})
+    spy = mocker.spy(AttrExpression, 'extract')
+    policy.match_roles({'groups': ['a'], 'roles': ['write']}, ['read'])
+    assert [call.args[0].attr for call in spy.call_args_list] == ['groups']
+
+
+def test_policy_matches_reference():
+    rng = random.Random(42)
+    attrs = ['groups', 'my.roles', 'scope', 'a.b.c']
+    values = ['admin', 'user', 'data:read', 'data:write', 'svc-foo', 'svc-bar', 'x']
+    role_attrs = {}
+    for i in range(30):
+        role_attrs[f'role{i}'] = [f'{rng.choice(attrs)}={rng.choice(values + [".*", "svc-.*"])}' for _ in range(2)]
+    role_attrs[r'\1'] = ['groups=svc-(.*)', 'my.roles=(role\\d+)']
+    role_attrs['data-reader'] = ['scope=data:.*']
+    role_attrs[r'svc-\1'] = ['a.b.c=(.*)']
+    policy = AttributeRolePolicy(role_attrs)
+
+    for _ in range(200):
+        token = {
+            'groups': rng.sample(values, rng.randint(0, 3)),
+            'my': {'roles': rng.sample(values + ['role3', 'role7'], rng.randint(0, 3))},
+            'scope': ' '.join(rng.sample(values, rng.randint(0, 3))),
+        }
+        if rng.random() < .5:
+            token['a'] = {'b': {'c': rng.choice(values)}}
+        roles = rng.sample(list(role_attrs) + ['foo', 'bar', 'svc-x', 'role3'], rng.randint(1, 5))
+        assert policy.match_roles(token, roles) == _reference_roles(role_attrs, token, roles)
+
+
+def test_auth_decision_cache(mocker):
+    now = mocker.patch('time.time', return_value=1000.)
+    cache = AuthDecisionCache(max_size=2)
+    k1 = cache.key('token1', ('role',), ['read'])
+    k2 = cache.key('token2', ('role',), ['read'])
+    k3 = cache.key('token3', ('role',), ['read'])
+    assert k1 != cache.key('token1', ('role',), ['write'])
+    assert 'token1' not in repr(k1)
+
+    cache.set(k1, 'read', exp=1010)
+    assert cache.get(k1) == 'read'
+    cache.set(k2, None, exp=1010)
+    assert cache.get(k2, 'missing') is None
+
+    # least-recently-used is dropped
+    cache.get(k1)
+    cache.set(k3, 'read', exp=1010)
+    assert len(cache) == 2
+    assert cache.get(k2, 'missing') == 'missing'
+    assert cache.get(k1) == 'read'
+
+    # expired
+    now.return_value = 1010.
+    assert cache.get(k1, 'missing') == 'missing'
+    assert len(cache) == 1
+
+    # no exp, or already expired
+    cache.clear()
+    cache.set(k1, 'read')
+    cache.set(k2, 'read', exp=1000)
+    assert len(cache) == 0
+
+
+def test_auth_decision_cache_ttl(mocker):
+    now = mocker.patch('time.time', return_value=1000.)
+    cache = AuthDecisionCache(ttl=5)
+    k = cache.key('token', ('role',), ['read'])
+    cache.set(k, 'read')
+    assert cache.get(k) == 'read'
+    now.return_value = 1004.
+    assert cache.get(k) == 'read'
+    now.return_value = 1005.
+    assert cache.get(k) is None
+
+    cache.set(k, 'read', exp=1007.)
+    now.return_value = 1007.
+    assert cache.get(k) is None
@@ -0,0 +1,149 @@
+"""Test server.ratelimit."""
+
+# fmt:off
+# pylint: skip-file
+
+import asyncio
+import time
+
+import pytest
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
+
+# local imports
+from rest_tools.server import RestHandler, RestHandlerSetup, RestServer, authenticated, rate_limit, ratelimit
+
+
+def test_memory_store():
+    store = ratelimit.MemoryRateLimitStore()
+    now = 100.
+    for _ in range(3):
+        assert store.take('a', rate=1, burst=3, now=now) == 0
+    assert store.take('a', rate=1, burst=3, now=now) == pytest.approx(1.)
+    assert store.take('b', rate=1, burst=3, now=now) == 0
+
+    # refills at `rate`, up to `burst`
+    assert store.take('a', rate=1, burst=3, now=now + .5) == pytest.approx(.5)
+    assert store.take('a', rate=1, burst=3, now=now + 1) == 0
+    for _ in range(3):
+        assert store.take('a', rate=1, burst=3, now=now + 100) == 0
+    assert store.take('a', rate=1, burst=3, now=now + 100) > 0
+
+
+def test_memory_store_max_keys():
+    store = ratelimit.MemoryRateLimitStore(max_keys=2)
+    store.take('a', rate=1, burst=1, now=0)
+    store.take('b', rate=1, burst=1, now=0)
+    store.take('a', rate=1, burst=1, now=0)
+    store.take('c', rate=1, burst=1, now=0)
+    assert list(store._buckets) == ['a', 'c']
+
+
+def test_setup():
+    store = ratelimit.RateLimitSetup({'max_keys': 10})
+    assert isinstance(store, ratelimit.MemoryRateLimitStore)
+    assert store.max_keys == 10
+    assert isinstance(RestHandlerSetup({'rate_limit': {}})['rate_limit_store'], ratelimit.MemoryRateLimitStore)
+    assert RestHandlerSetup({})['rate_limit_store'] is None
+
+    with pytest.raises(ValueError):
+        rate_limit(rate=0)
+    with pytest.raises(ValueError):
+        rate_limit(rate=1, key='foo')
+
+
+async def test_rate_limit_handler():
+    sock, port = bind_unused_port()
+    sock.close()
+
+    class Jobs(RestHandler):
+        @authenticated
+        @rate_limit(rate=.5, burst=2)
+        async def get(self):
+            self.write({})
+
+    class Public(RestHandler):
+        @rate_limit(rate=.5, burst=1, key='ip')
+        def get(self):
+            self.write({})
+
+    config = RestHandlerSetup({'auth': {'secret': 'secret'*11}, 'rate_limit': {}})
+    rs = RestServer()
+    rs.add_route('/jobs', Jobs, config)
+    rs.add_route('/public', Public, config)
+    rs.startup(address='localhost', port=port)
+    client = AsyncHTTPClient(force_instance=True)
+    alice = config['auth'].create_token('alice')
+    bob = config['auth'].create_token('bob')
+
+    async def get(path, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        return await client.fetch(f'http://localhost:{port}{path}', headers=headers, raise_error=False)
+
+    try:
+        assert (await get('/jobs', alice)).code == 200
+        assert (await get('/jobs', alice)).code == 200
+        ret = await get('/jobs', alice)
+        assert ret.code == 429
+        assert ret.headers['Retry-After'] == '2'
+
+        # other users have their own bucket
+        assert (await get('/jobs', bob)).code == 200
+
+        assert (await get('/public')).code == 200
+        assert (await get('/public')).code == 429
+    finally:
+        client.close()
+        await rs.stop()
+
+
+@pytest.mark.skipif(not ratelimit.redis_available, reason='redis not installed')
+def test_redis_store():
+    store = ratelimit.RedisRateLimitStore(prefix=f'test-{time.time()}')
+    assert store.take('a', rate=1, burst=2) == 0
+    assert store.take('a', rate=1, burst=2) == 0
+    assert 0 < store.take('a', rate=1, burst=2) <= 1
+    store.close()
+
+
+class FakeRedis:
+    def __init__(self, script):
+        self.script = script
+
+    def register_script(self, source):
+        return self.script
+
+    def close(self):
+        pass
+
+
+@pytest.mark.skipif(not ratelimit.redis_available, reason='redis not installed')
+async def test_redis_store_unavailable(mocker, caplog):
+    import redis.exceptions
+
+    def hung(keys, args):
+        time.sleep(.3)
+        raise redis.exceptions.TimeoutError('Timeout reading from socket')
+    conn = mocker.patch.object(ratelimit, 'redis_connection', return_value=FakeRedis(hung))
+    store = ratelimit.RedisRateLimitStore(timeout=.3)
+    assert conn.call_args.kwargs['socket_timeout'] == .3
+    assert conn.call_args.kwargs['socket_connect_timeout'] == .3
+
+    # the event loop keeps running while redis hangs
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(.01)
+    ticker = asyncio.create_task(tick())
+    assert await store.take_async('a', rate=1, burst=1) == 0  # fail open
+    ticker.cancel()
+    assert ticks > 10
+    assert 'redis unavailable' in caplog.text
+
+    # errors are not raised to the handler
+    store._take = mocker.Mock(side_effect=redis.exceptions.ConnectionError('refused'))
+    assert await store.take_async('a', rate=1, burst=1) == 0
+    store.close()
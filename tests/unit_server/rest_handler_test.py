@@ -5,7 +5,7 @@
 
 import json
 import logging
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import jwt.algorithms
 import pytest
@@ -15,8 +15,13 @@ from rest_tools.server import (
     OpenIDLoginHandler,
     RestHandler,
     RestHandlerSetup,
+    RestServer,
+    authenticated,
 )
+from rest_tools.server.stats import CoDelRouteStats
 from rest_tools.utils.auth import Auth, OpenIDAuth
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import bind_unused_port
 from tornado.web import Application, HTTPError
 
 from .fixtures import gen_keys, gen_keys_bytes, shared_key  # noqa: F401
@@ -50,6 +55,17 @@ def test_rest_handler_setup(requests_mock, shared_key):  # noqa: F811
     ret = RestHandlerSetup({'rest_api': {'auth_key': 'foo'}})
     assert ret['module_auth_key'] == 'foo'
 
+    ret = RestHandlerSetup({'route_stats': {'window_size': 10, 'max_routes': 5}})
+    assert ret['route_stats'].max_routes == 5
+    assert ret['route_stats']['foo'].window_size == 10
+
+    ret = RestHandlerSetup({'route_stats': {'policy': 'codel', 'target': .1}})
+    assert isinstance(ret['route_stats']['foo'], CoDelRouteStats)
+    assert ret['route_stats']['foo'].target == .1
+
+    with pytest.raises(ValueError):
+        RestHandlerSetup({'route_stats': {'policy': 'foo'}})
+
 
 def test_rest_handler_initialize():
     rh = RestHandler()
@@ -57,6 +73,17 @@ def test_rest_handler_initialize():
     assert rh.debug
 
 
+def test_rest_handler_route_stats_key():
+    class DatasetHandler(RestHandler):
+        pass
+    key = DatasetHandler().get_route_stats_key()
+    assert key == f'{__name__}.test_rest_handler_route_stats_key.<locals>.DatasetHandler'
+
+    # same name, other module
+    OtherHandler = type('DatasetHandler', (RestHandler,), {'__module__': 'other'})
+    assert OtherHandler().get_route_stats_key() == 'other.DatasetHandler'
+
+
 def test_rest_handler_get_current_user(shared_key):  # noqa: F811
     a = Auth(shared_key)
     rh = RestHandler()
@@ -73,6 +100,59 @@ def test_rest_handler_get_current_user(shared_key):  # noqa: F811
     assert rh.auth_key == token
 
 
+async def test_rest_handler_refresh_auth_keys(mocker):
+    auth = MagicMock(spec=OpenIDAuth)
+    rh = RestHandler()
+    rh.initialize(auth=auth)
+    rh.request = MagicMock()
+    rh.request.headers = {'Authorization': 'bearer tok'}
+    header = mocker.patch('rest_tools.server.handler.jwt.get_unverified_header', return_value={'kid': 'k'})
+
+    # a cached token skips decoding
+    auth.is_validated.return_value = True
+    await rh._refresh_auth_keys()
+    header.assert_not_called()
+    auth.refresh_keys_async.assert_not_called()
+
+    auth.is_validated.return_value = False
+    await rh._refresh_auth_keys()
+    auth.refresh_keys_async.assert_awaited_once_with('k')
+
+
+async def test_rest_handler_execute_refreshes_auth_keys(mocker):
+    sock, port = bind_unused_port()
+    sock.close()
+    refresh = mocker.patch.object(RestHandler, '_refresh_auth_keys', new_callable=AsyncMock)
+    mocker.patch.object(RestHandler, 'get_current_user', return_value='user')
+
+    class Plain(RestHandler):
+        def get(self):
+            self.write({})
+
+    class Authed(RestHandler):
+        @authenticated
+        def get(self):
+            self.write({})
+
+    limited = Authed().get_route_stats_key()
+    config = RestHandlerSetup({'concurrency': {'routes': {limited: {'max_in_flight': 1}}}})
+    rs = RestServer()
+    rs.add_route('/plain', Plain, config)
+    rs.add_route('/authed', Authed, config)
+    rs.startup(address='localhost', port=port)
+    client = AsyncHTTPClient(force_instance=True)
+    try:
+        # once per request, with or without a concurrency limit
+        for path in ('/plain', '/authed'):
+            refresh.reset_mock()
+            ret = await client.fetch(f'http://localhost:{port}{path}')
+            assert ret.code == 200
+            refresh.assert_awaited_once()
+    finally:
+        client.close()
+        await rs.stop()
+
+
 def test_keycloak_username_mixin():
     auth_data = {}
 
@@ -0,0 +1,206 @@
+"""Test server.server."""
+
+# fmt:off
+# pylint: skip-file
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+import requests
+from tornado.testing import bind_unused_port
+
+# local imports
+import rest_tools
+from rest_tools.client import RestClient, unix_socket_url
+from rest_tools.server import RestHandler, RestServer, server
+
+WORKER_SCRIPT = textwrap.dedent('''
+    import os, sys
+    from tornado.ioloop import IOLoop
+    from rest_tools.server import RestServer, RestHandler
+
+    class Pid(RestHandler):
+        def get(self):
+            self.write({'pid': os.getpid(), 'task_id': self.settings['server'].task_id})
+
+    class Crash(RestHandler):
+        def get(self):
+            os._exit(3)
+
+    def init(task_id):
+        print('init', task_id, flush=True)
+
+    s = RestServer()
+    s.app_args['server'] = s
+    s.add_route('/pid', Pid)
+    s.add_route('/crash', Crash)
+    s.startup(port=int(sys.argv[1]), processes=int(sys.argv[3]), reuse_port=sys.argv[2] == '1', worker_init=init)
+    IOLoop.current().start()
+    print('stopped', s.task_id, flush=True)
+''')
+
+
+def _worker_script(port, reuse_port=False, processes=2):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(rest_tools.__file__)))
+    return subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT, str(port), '1' if reuse_port else '0', str(processes)],
+                            stdout=subprocess.PIPE, text=True, env=env)
+
+
+def _pids(port, timeout=30, count=2):
+    pids = {}
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            ret = requests.get(f'http://localhost:{port}/pid', timeout=1).json()
+        except requests.exceptions.RequestException:
+            time.sleep(.05)
+            continue
+        pids[ret['pid']] = ret['task_id']
+        if len(pids) == count:
+            break
+    return pids
+
+
+@pytest.mark.parametrize('reuse_port', [False, True])
+def test_prefork(reuse_port):
+    sock, port = bind_unused_port()
+    sock.close()
+    proc = _worker_script(port, reuse_port)
+    try:
+        pids = _pids(port)
+        assert sorted(pids.values()) == [0, 1]
+
+        # a crashed worker is restarted
+        with pytest.raises(requests.exceptions.RequestException):
+            while True:
+                requests.get(f'http://localhost:{port}/crash', timeout=1)
+        for _ in range(100):
+            new_pids = _pids(port)
+            if len(new_pids) == 2 and new_pids != pids:
+                break
+        assert sorted(new_pids.values()) == [0, 1]
+        assert new_pids != pids
+
+        # clean shutdown
+        proc.send_signal(signal.SIGTERM)
+        out, _ = proc.communicate(timeout=10)
+        assert proc.returncode == 0
+        lines = out.splitlines()
+        assert sorted(line for line in lines if line.startswith('stopped')) == ['stopped 0', 'stopped 1']
+        assert lines.count('init 0') + lines.count('init 1') == 3
+        for pid in new_pids:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
+def test_single_process():
+    sock, port = bind_unused_port()
+    sock.close()
+    proc = _worker_script(port, processes=1)
+    try:
+        pids = _pids(port, count=1)
+        assert list(pids) == [proc.pid]
+
+        # clean shutdown, without forking
+        proc.send_signal(signal.SIGTERM)
+        out, _ = proc.communicate(timeout=10)
+        assert proc.returncode == 0
+        assert out.splitlines() == ['init 0', 'stopped None']
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+
+def test_fork_workers_max_restarts():
+    pid = os.fork()
+    if pid == 0:
+        try:
+            server.fork_workers(1, max_restarts=2)
+            os._exit(5)  # the worker keeps crashing
+        except SystemExit as e:
+            os._exit(e.code)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 1
+
+
+class Echo(RestHandler):
+    def get(self):
+        self.write({'host': self.request.host, 'arg': self.get_argument('a', None)})
+
+
+async def test_unix_socket(tmp_path):
+    path = str(tmp_path / 'api.sock')
+    rs = RestServer()
+    rs.add_route('/echo', Echo)
+    rs.startup(port=None, unix_socket=path, unix_socket_mode=0o660)
+    assert os.stat(path).st_mode & 0o777 == 0o660
+    try:
+        for transport in ('requests', 'tornado'):
+            rc = RestClient(unix_socket_url(path), transport=transport, retries=0)
+            ret = await rc.request('GET', '/echo', {'a': 'b'})
+            assert ret == {'host': 'localhost', 'arg': 'b'}
+            rc.close()
+
+        # sync calls, from another thread so the server can respond
+        rc = RestClient(unix_socket_url(path, '/'), retries=0)
+        ret = await asyncio.to_thread(rc.request_seq, 'GET', 'echo')
+        assert ret['arg'] is None
+        rc.close()
+    finally:
+        await rs.stop()
+
+
+async def test_unix_socket_missing(tmp_path):
+    rc = RestClient(unix_socket_url(str(tmp_path / 'nothing.sock')), retries=0)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        await rc.request('GET', '/echo')
+    rc.close()
+
+
+@pytest.mark.skipif(not socket.has_ipv6, reason='no IPv6 support')
+async def test_ipv6():
+    sock, port = bind_unused_port()
+    sock.close()
+    rs = RestServer()
+    rs.add_route('/echo', Echo)
+    try:
+        rs.startup(address='::1', port=port)
+    except OSError:
+        pytest.skip('no IPv6 loopback')
+    try:
+        assert [s.family for s in rs.http_server._sockets.values()] == [socket.AF_INET6]
+        rc = RestClient(f'http://[::1]:{port}', retries=0)
+        ret = await rc.request('GET', '/echo')
+        assert ret['host'] == f'[::1]:{port}'
+        rc.close()
+    finally:
+        await rs.stop()
+
+
+async def test_sigterm_handler_restored():
+    sock, port = bind_unused_port()
+    sock.close()
+    prev = signal.getsignal(signal.SIGTERM)
+    rs = RestServer()
+    rs.startup(address='localhost', port=port)
+    try:
+        assert signal.getsignal(signal.SIGTERM) == rs._on_sigterm
+    finally:
+        await rs.stop()
+    assert signal.getsignal(signal.SIGTERM) == prev
@@ -3,12 +3,17 @@
 # fmt:off
 # pylint: skip-file
 
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
 import time
 
 import pytest
 
 # local imports
-from rest_tools.server import stats
+from rest_tools.server import stats, stats_backend
 
 
 @pytest.fixture
@@ -23,6 +28,15 @@ def test_stats_empty():
     assert not s.is_overloaded()
 
 
+def test_stats_window_size():
+    with pytest.raises(ValueError):
+        stats.RouteStats(window_size=0)
+    s = stats.RouteStats(window_size=1)
+    s.append(1)
+    s.append(2)
+    assert s.data == [2]
+
+
 def test_stats_basic(random_half):
     s = stats.RouteStats(window_size=10, timeout=10)
     for i in range(10):
@@ -46,3 +60,225 @@ def test_stats_expiring(random_half):
         s.append(i)
 
     assert not s.is_overloaded()
+
+
+def test_stats_quantiles():
+    s = stats.RouteStats(window_size=50)
+    values = [random.uniform(0, 100) for _ in range(200)]
+    for i, v in enumerate(values):
+        s.append(v)
+        window = values[max(0, i-49):i+1]
+        assert len(s) == len(window)
+        assert s._sorted == sorted(window)
+        if len(window) >= 4:
+            assert [s._quantile(j, 4) for j in (1, 2, 3)] == pytest.approx(statistics.quantiles(window))
+            assert s._median() == pytest.approx(statistics.median(window))
+
+
+def test_stats_ring_buffer(mocker):
+    now = [1000.]
+    mocker.patch('time.time', lambda: now[0])
+    s = stats.RouteStats(window_size=5, window_time=10)
+    for i in range(8):
+        now[0] += 1
+        s.append(i)
+    assert s.data == [3., 4., 5., 6., 7.]
+    assert s.times == [1004., 1005., 1006., 1007., 1008.]
+
+    # only the expired calls are removed
+    now[0] = 1017.5
+    s.is_overloaded()
+    assert s.data == [7.]
+    assert s._sorted == [7.]
+
+    now[0] += 1
+    s.append(1)
+    assert s.data == [7., 1.]
+    assert s._sorted == [1., 7.]
+
+    s.clear()
+    assert len(s) == 0 and s.data == []
+
+
+def test_stats_map():
+    m = stats.RouteStatsMap(max_routes=2)
+    a = m['a']
+    assert isinstance(a, stats.RouteStats)
+    assert m['a'] is a
+    m['b']
+    m['a']  # a is now most recently used
+    m['c']
+    assert list(m) == ['a', 'c']
+    assert m['a'] is a
+
+    m = stats.RouteStatsMap()
+    for i in range(100):
+        m[f'/dataset/{i}']
+    assert len(m) == 100
+
+
+def test_histogram_quantiles():
+    values = [random.uniform(0.01, 100) for _ in range(1000)]
+    counts = [0] * len(stats_backend.BUCKETS)
+    for v in values:
+        counts[stats_backend._bucket(v)] += 1
+    count, qs = stats_backend.histogram_quantiles(counts)
+    assert count == 1000
+    for q, real in zip(qs, statistics.quantiles(values)):
+        assert q == pytest.approx(real, rel=.1)
+
+
+def _fill(backend, n, call_time):
+    for _ in range(n):
+        backend.append('route', call_time)
+
+
+def test_shared_memory_backend(random_half):
+    backend = stats_backend.SharedMemoryStatsBackend(max_routes=4, refresh_interval=0)
+    s = stats.RouteStats(timeout=10, backend=backend, route='route')
+    assert not s.is_overloaded()
+
+    # other processes report slow calls
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_fill, args=(backend, 10, 100)) for _ in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert backend.quantiles('route')[0] == 30
+    assert s.is_overloaded()
+    assert 180 < s.get_backoff_time() < 220
+    assert len(s) == 0
+
+    # time slices expire
+    backend.append('route', 100, now=time.time() - 2*backend.window_time)
+    assert backend.quantiles('route')[0] == 30
+    backend.close()
+
+
+def test_stats_map_backend():
+    backend = stats_backend.SharedMemoryStatsBackend(max_routes=4)
+    m = stats.RouteStatsMap(max_routes=2, backend=backend)
+    assert m['a'].backend is backend
+    assert m['a'].route == 'a'
+    backend.close()
+
+
+@pytest.mark.skipif(not stats_backend.redis_available, reason='redis not installed')
+def test_redis_backend(random_half):
+    backend = stats_backend.RedisStatsBackend(prefix=f'test-{time.time()}', refresh_interval=0)
+    s1 = stats.RouteStats(timeout=10, backend=backend, route='route')
+    s2 = stats.RouteStats(timeout=10, backend=backend, route='route')
+    for i in range(5):
+        s1.append(100)
+        s2.append(100)
+    assert backend.quantiles('route') is None  # not fetched yet
+    backend.refresh()
+    assert backend.quantiles('route')[0] == 10
+    assert s1.is_overloaded()
+    backend.close()
+
+
+@pytest.mark.skipif(not stats_backend.redis_available, reason='redis not installed')
+def test_redis_backend_fork(mocker):
+    mocker.patch.object(stats_backend.redis, 'Redis')
+    backend = stats_backend.RedisStatsBackend(refresh_interval=60)
+    assert backend._thread is None  # started on first use
+
+    backend.append('route', 100)
+    parent_thread = backend._thread
+    assert parent_thread.is_alive()
+    backend._merged['route'] = (1, [100, 100, 100])
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            assert backend.quantiles('route') is None  # nothing fetched in this process yet
+            assert backend._thread is not parent_thread and backend._thread.is_alive()
+            assert not backend._pending  # the parent's calls are sent by the parent
+            backend.append('route', 10)
+            assert len(backend._pending) == 1
+            backend._stop.set()
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+    # the parent is unchanged
+    assert backend._thread is parent_thread
+    assert backend.quantiles('route')[0] == 1
+    backend.close()
+    assert not parent_thread.is_alive()
+
+
+class BrokenBackend(stats_backend.RouteStatsBackend):
+    def append(self, route, call_time, now=None):
+        pass
+
+    def _histogram(self, route, now):
+        raise Exception('unreachable')
+
+
+def test_backend_unavailable(random_half):
+    backend = BrokenBackend(refresh_interval=0)
+    s = stats.RouteStats(timeout=10, backend=backend, route='route')
+    for i in range(5):
+        s.append(100)
+    assert backend.quantiles('route') is None
+    assert s.quantiles()[0] == 5
+    assert s.is_overloaded()
+    assert s.get_backoff_time() == 200
+
+
+def test_codel_stats():
+    s = stats.CoDelRouteStats(target=.05, interval=1.)
+    now = 100.
+
+    # a short burst is not shed
+    s.observe_delay(.01, now=now)
+    for i in range(5):
+        s.observe_delay(.5, now=now + i/10)
+        assert not s.is_overloaded()
+    s.observe_delay(.01, now=now + .6)
+
+    # a standing queue, for a whole interval
+    now += 1
+    s.observe_delay(.5, now=now)
+    assert not s.is_overloaded()
+    now += 1
+    s.observe_delay(.5, now=now)
+    assert s.is_overloaded()
+
+    # only requests that waited too long are shed
+    s.observe_delay(.01, now=now + .1)
+    assert not s.is_overloaded()
+    s.observe_delay(.5, now=now + .2)
+    assert s.is_overloaded()
+
+    # the queue drained
+    now += 1
+    s.observe_delay(.5, now=now)
+    assert not s.is_overloaded()
+
+    # call times are still tracked
+    for i in range(4):
+        s.append(10)
+    assert s.get_backoff_time() == 20
+
+
+async def test_event_loop_lag():
+    lag = stats.EventLoopLag(interval=.01)
+    assert lag.get() == 0
+    time.sleep(.1)  # block the loop
+    await asyncio.sleep(.005)
+    assert lag.get() >= .05
+    await asyncio.sleep(.05)
+    assert lag.get() < .05
+    lag._handle.cancel()
+
+
+def test_stats_policy_default():
+    s = stats.RouteStats()
+    s.observe_delay(100)
+    assert not s.is_overloaded()
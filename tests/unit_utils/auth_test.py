@@ -3,6 +3,8 @@
 # fmt:off
 # pylint: skip-file
 
+import asyncio
+import json
 import secrets
 import time
 
@@ -111,3 +113,166 @@ def test_auth_rsa_aud_iss(gen_keys_bytes):  # noqa: F811
     a = auth.Auth(gen_keys_bytes[0], pub_secret=gen_keys_bytes[1], issuer='foo', audience=['bar'], issuers=['foo'], algorithm='RS256')
     tok = a.create_token('subj', expiration=20, payload={'aud': 'bar'})
     a.validate(tok)
+
+
+def test_discovery_cache(tmp_path):
+    fetch = lambda url: {'url': url, 'time': time.time()}  # noqa: E731
+    cache = auth.DiscoveryCache(ttl=60)
+    doc = cache.get('http://test/a', fetch)
+    assert cache.get('http://test/a', fetch) is doc
+    assert cache.get('http://test/b', fetch) is not doc
+    assert cache.get('http://test/a', fetch, force=True) is not doc
+
+    cache = auth.DiscoveryCache(ttl=0)
+    doc = cache.get('http://test/a', fetch)
+    assert cache.get('http://test/a', fetch) is not doc
+
+    # file tier, shared between processes
+    doc = auth.DiscoveryCache(ttl=60, path=tmp_path).get('http://test/a', fetch)
+    assert auth.DiscoveryCache(ttl=60, path=tmp_path).get('http://test/a', fetch) == doc
+    assert auth.DiscoveryCache(ttl=0, path=tmp_path).get('http://test/a', fetch) != doc
+
+
+def test_discovery_cache_file_trust(tmp_path):
+    fetch = lambda url: {'url': url, 'time': time.time()}  # noqa: E731
+    path = tmp_path / 'cache'
+    doc = auth.DiscoveryCache(ttl=60, path=path).get('http://test/a', fetch)
+    assert path.stat().st_mode & 0o777 == 0o700
+    filename = auth.DiscoveryCache(path=path)._file('http://test/a')
+
+    # a timestamp from the future is clamped
+    with open(filename, 'w') as f:
+        json.dump({'url': 'http://test/a', 'fetched': time.time() + 1e9, 'doc': doc}, f)
+    assert auth.DiscoveryCache(ttl=60, path=path).get('http://test/a', fetch) == doc
+    assert auth.DiscoveryCache(ttl=1, path=path)._read_file('http://test/a')[0] <= time.time()
+
+    # files that others can write are ignored
+    filename.chmod(0o666)
+    assert auth.DiscoveryCache(ttl=60, path=path).get('http://test/a', fetch) != doc
+
+
+def test_openid_auth_shared_discovery(requests_mock):
+    well_known = requests_mock.get('http://test/.well-known/openid-configuration', json={
+        'token_endpoint': 'http://test/token',
+        'jwks_uri': 'http://test/jwks',
+    })
+    jwks = requests_mock.get('http://test/jwks', json={'keys': []})
+
+    a1 = auth.OpenIDAuth('http://test')
+    a2 = auth.OpenIDAuth('http://test')
+    assert a1.token_url == a2.token_url == 'http://test/token'
+    assert well_known.call_count == 1
+    assert jwks.call_count == 1
+
+    # an unknown key id skips the cache
+    with pytest.raises(Exception, match='not found'):
+        a2.validate(jwt.encode({}, 'secret' * 8, headers={'kid': 'foo'}))
+    assert jwks.call_count == 2
+
+    auth.OpenIDAuth('http://test', discovery_cache=None)
+    assert well_known.call_count == 2
+    assert jwks.call_count == 3
+
+
+def _openid_mocks(requests_mock, keys):
+    requests_mock.get('http://test/.well-known/openid-configuration', json={
+        'token_endpoint': 'http://test/token',
+        'jwks_uri': 'http://test/jwks',
+    })
+    return requests_mock.get('http://test/jwks', json=lambda req, ctx: {'keys': keys})
+
+
+def test_openid_auth_refresh_limits(requests_mock, gen_keys):  # noqa: F811
+    jwks = _openid_mocks(requests_mock, [{**json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(gen_keys[1])), 'kid': 'other'}])
+    a = auth.OpenIDAuth('http://test', discovery_cache=None)
+    assert jwks.call_count == 1
+
+    tok = jwt.encode({}, 'secret' * 8, headers={'kid': 'foo'})
+    with pytest.raises(Exception, match='not found'):
+        a.validate(tok)
+    assert jwks.call_count == 2
+
+    # missing kid is remembered
+    a._last_refresh = float('-inf')
+    with pytest.raises(Exception, match='not found'):
+        a.validate(tok)
+    assert jwks.call_count == 2
+
+    # other kids are rate-limited
+    a._last_refresh = time.time()
+    with pytest.raises(Exception, match='not found'):
+        a.validate(jwt.encode({}, 'secret' * 8, headers={'kid': 'bar'}))
+    assert jwks.call_count == 2
+
+
+async def test_openid_auth_refresh_async(requests_mock, gen_keys, gen_keys_bytes):  # noqa: F811
+    keys = []
+    jwks = _openid_mocks(requests_mock, keys)
+    a = auth.OpenIDAuth('http://test', discovery_cache=None, min_refresh_interval=0)
+    signer = auth.Auth(gen_keys_bytes[0], pub_secret=gen_keys_bytes[1], algorithm='RS256')
+    tok = signer.create_token('subj', headers={'kid': 'new'})
+
+    # rotate in a new key
+    keys.append({**json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(gen_keys[1])), 'kid': 'new'})
+
+    # on the event loop, validate() does not wait for the refresh
+    with pytest.raises(Exception, match='not found'):
+        a.validate(tok)
+    await asyncio.gather(*[a.refresh_keys_async('new') for _ in range(5)])
+    assert jwks.call_count == 2
+    assert a.validate(tok)['sub'] == 'subj'
+
+
+def test_auth_validate_cache(shared_key, mocker):
+    a = auth.Auth(shared_key, cache_size=2)
+    decode = mocker.spy(auth.jwt, 'decode')
+    toks = [a.create_token(f'subj{i}', expiration=300) for i in range(3)]
+
+    assert a.validate(toks[0])['sub'] == 'subj0'
+    data = a.validate(toks[0])
+    assert data['sub'] == 'subj0'
+    assert decode.call_count == 1
+    data['sub'] = 'changed'  # callers get a copy
+    assert a.validate(toks[0])['sub'] == 'subj0'
+
+    # kwargs skip the cache
+    a.validate(toks[0], leeway=0)
+    assert decode.call_count == 2
+
+    # LRU eviction
+    a.validate(toks[1])
+    a.validate(toks[2])
+    assert decode.call_count == 4
+    a.validate(toks[0])
+    assert decode.call_count == 5
+
+    # not cached past exp - leeway
+    a = auth.Auth(shared_key, leeway=30)
+    tok = a.create_token('subj', expiration=20)
+    a.validate(tok)
+    a.validate(tok)
+    assert decode.call_count == 7
+
+    # invalid tokens are never cached
+    with pytest.raises(jwt.exceptions.InvalidSignatureError):
+        auth.Auth(b'other' * 13).validate(toks[0])
+
+
+def test_openid_auth_validate_cache(requests_mock, gen_keys, gen_keys_bytes, mocker):  # noqa: F811
+    _openid_mocks(requests_mock, [{**json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(gen_keys[1])), 'kid': 'k'}])
+    a = auth.OpenIDAuth('http://test', discovery_cache=None, min_refresh_interval=0)
+    signer = auth.Auth(gen_keys_bytes[0], algorithm='RS256')
+    tok = signer.create_token('subj', headers={'kid': 'k'})
+    decode = mocker.spy(auth.jwt, 'decode')
+
+    assert not a.is_validated(tok)
+    a.validate(tok)
+    a.validate(tok)
+    assert decode.call_count == 1
+    assert a.is_validated(tok)
+
+    # key rotation drops the cache
+    a._refresh_keys(force=True)
+    assert not a.is_validated(tok)
+    a.validate(tok)
+    assert decode.call_count == 2